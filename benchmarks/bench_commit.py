@@ -0,0 +1,85 @@
+"""Compare le débit de commits : porcelaine (`git add` + `git commit`) contre la session de plomberie.
+
+Le push n'est pas mesuré : seul `GitHandler.commit_changes` est chronométré.
+La sortie de `git commit` est envoyée vers /dev/null pendant les mesures,
+pour ne pas compter l'écriture sur le terminal contre la porcelaine.
+
+Le gain de la plomberie croît avec la taille de l'index : net sur un gros
+dépôt (x3 à 20 000 fichiers), il est faible sur un petit dépôt (quelques
+centaines de fichiers), où `git add` et `git commit` ont peu à relire ; selon
+la machine et le bruit de mesure, la porcelaine peut y être la plus rapide.
+Mesurer avec plusieurs `--files` pour situer le point de bascule.
+
+Usage : python benchmarks/bench_commit.py --files 20000 --commits 50 --changed 5
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_staging import generate_repo  # noqa: E402
+from git_observer.git_handler import GitHandler  # noqa: E402
+
+
+def silenced(fn, *args):
+    """Exécute `fn` avec la sortie standard du processus (et de ses enfants Git) vers /dev/null."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        return fn(*args)
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def bench(handler, use_plumbing, paths, commits, changed):
+    """Enchaîne `commits` commits de `changed` fichiers modifiés ; retourne les commits par seconde."""
+    handler.use_plumbing = use_plumbing
+    start = time.perf_counter()
+    for commit in range(commits):
+        for i in range(changed):
+            path = paths[(commit * changed + i) * 7919 % len(paths)]
+            with open(path, "a") as f:
+                f.write(f"{use_plumbing} {commit}\n")
+            handler.dirty_set.add(path, "modified")
+        if not handler.commit_changes(f"bench {commit}"):
+            raise RuntimeError("aucun commit créé")
+    return commits / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000, help="Nombre de fichiers suivis.")
+    parser.add_argument("--commits", type=int, default=50, help="Nombre de commits par configuration.")
+    parser.add_argument("--changed", type=int, default=5, help="Fichiers modifiés par commit.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    try:
+        print(f"Génération de {args.files} fichiers dans {root}...")
+        paths = generate_repo(root, args.files)
+        # Pas de `gc --auto` en arrière-plan pendant les mesures
+        subprocess.run(["git", "-C", root, "config", "gc.auto", "0"], check=True)
+        handler = GitHandler(repo_path=root)
+        rates = {}
+        for label, use_plumbing in (("porcelaine", False), ("plomberie", True)):
+            rates[label] = silenced(bench, handler, use_plumbing, paths, args.commits, args.changed)
+            print(f"{label:>12} : {rates[label]:8.1f} commits/s")
+        ratio = rates["plomberie"] / rates["porcelaine"]
+        verdict = "plus rapide" if ratio >= 1 else "plus lente"
+        print(f"La plomberie est {verdict} que la porcelaine sur {args.files} fichiers (x{ratio:.2f}).")
+        handler.close_plumbing()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
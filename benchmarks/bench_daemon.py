@@ -0,0 +1,91 @@
+"""Mesure les ressources du démon selon le nombre de dépôts : threads et processus Git persistants.
+
+Chaque configuration tourne dans un nouvel interpréteur : le démon surveille
+`--repos` dépôts générés, committe une fois dans chacun (ce qui ouvre les
+sessions de plomberie), puis compte ses threads et ses processus `git`
+enfants (Linux, via /proc).
+
+Usage : python benchmarks/bench_daemon.py --repos 1 2 6 --files 200
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_staging import generate_repo  # noqa: E402
+
+# Exécuté dans le sous-processus : affiche les comptes en JSON
+PROBE = """
+import json, os, sys, threading, time
+from git_observer.daemon import GitObserverDaemon
+
+def git_children():
+    count = 0
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/comm") as f:
+                name = f.read().strip()
+        except OSError:
+            continue
+        if int(fields[1]) == os.getpid() and name == "git":
+            count += 1
+    return count
+
+before = threading.active_count()
+daemon = GitObserverDaemon(workers=4)
+handlers = [daemon.add_repository({"path": path, "notify": "headless", "guard": False, "journal": False})
+            for path in sys.argv[1:]]
+daemon.start_observers()
+time.sleep(1)
+idle = threading.active_count()
+for handler in handlers:
+    path = os.path.join(handler.git_handler.repo_path, "bench.txt")
+    with open(path, "w") as f:
+        f.write("bench\\n")
+    handler.git_handler.dirty_set.add(path, "created")
+    handler.git_handler.executor.submit(handler.git_handler.git_commit_push, "bench",
+                                        key=handler.git_handler.repo_path).result()
+time.sleep(0.5)
+print(json.dumps({"threads_before": before, "threads_idle": idle, "threads": threading.active_count(),
+                  "git_processes": git_children()}))
+os._exit(0)
+"""
+
+
+def measure(paths, env):
+    output = subprocess.run([sys.executable, "-c", PROBE, *paths], env=env, capture_output=True, text=True,
+                            check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, nargs="+", default=[1, 2, 6], help="Nombres de dépôts à mesurer.")
+    parser.add_argument("--files", type=int, default=200, help="Nombre de fichiers suivis par dépôt.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [sys.path[0], os.environ.get("PYTHONPATH")])))
+    try:
+        paths = []
+        for i in range(max(args.repos)):
+            path = os.path.join(root, f"repo{i}")
+            generate_repo(path, args.files)
+            paths.append(path)
+        print(f"{'dépôts':>7} {'threads (repos)':>16} {'threads (après commit)':>23} {'processus git':>14}")
+        for count in args.repos:
+            result = measure(paths[:count], env)
+            print(f"{count:>7} {result['threads_idle']:>16} {result['threads']:>23} {result['git_processes']:>14}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
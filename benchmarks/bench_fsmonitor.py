@@ -0,0 +1,79 @@
+"""Mesure `git status` avec et sans le hook fsmonitor servi par le watcher.
+
+Usage : python benchmarks/bench_fsmonitor.py --files 200000 --runs 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watchdog.observers import Observer  # type: ignore # noqa: E402
+from bench_staging import generate_repo  # noqa: E402
+from git_observer import fsmonitor  # noqa: E402
+from git_observer.watcher import WATCHED_EVENTS  # noqa: E402
+
+
+def time_status(root, runs, env):
+    """Lance `git status` `runs` fois après un passage de chauffe."""
+    timings = []
+    for run in range(runs + 1):
+        with open(os.path.join(root, "d0", "s0", "f0.txt"), "a") as f:
+            f.write(f"{run}\n")
+        start = time.perf_counter()
+        subprocess.run(["git", "status", "--porcelain"], cwd=root, capture_output=True, check=True, env=env)
+        if run:
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:>12} : médiane {statistics.median(timings) * 1000:8.1f} ms, "
+          f"min {min(timings) * 1000:8.1f} ms, max {max(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000, help="Nombre de fichiers suivis.")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre de mesures par configuration.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    # Le hook est lancé par Git : il doit pouvoir importer git_observer
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [sys.path[0], os.environ.get("PYTHONPATH")])))
+    try:
+        print(f"Génération de {args.files} fichiers dans {root}...")
+        paths = generate_repo(root, args.files)
+        report("sans hook", time_status(root, args.runs, env))
+
+        server = fsmonitor.FsmonitorServer(root, os.path.join(root, ".git"))
+        server.start()
+        observer = Observer()
+        observer.schedule(fsmonitor.FsmonitorEventHandler(server), root, recursive=True, event_filter=WATCHED_EVENTS)
+        observer.start()
+        # Attend que les watches soient installées (jusqu'au dernier dossier) avant de mesurer
+        token = server.journal.token()
+        probe = os.path.join(os.path.dirname(paths[-1]), "probe")
+        while not server.journal.changes_since(token)[1]:
+            with open(probe, "w"):
+                pass
+            time.sleep(0.1)
+        os.remove(probe)
+        try:
+            fsmonitor.enable(root)
+            report("avec hook", time_status(root, args.runs, env))
+        finally:
+            observer.stop()
+            observer.join()
+            server.stop()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Mesure le temps et le CPU des scans du backend `ScandirEmitter` sur un gros arbre généré.
+
+Compare avec l'instantané complet de watchdog (`DirectorySnapshot`, utilisé par
+son `PollingObserver`) qui relit tout l'arbre à chaque passage.
+
+Usage : python benchmarks/bench_polling.py --files 1000000 --runs 3
+"""
+import argparse
+import os
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watchdog.observers.api import ObservedWatch  # type: ignore # noqa: E402
+from watchdog.utils.dirsnapshot import DirectorySnapshot  # type: ignore # noqa: E402
+from git_observer.polling import RACY_NS, ScandirEmitter  # noqa: E402
+
+
+def generate_tree(root, file_count, files_per_dir=100):
+    """Crée `file_count` fichiers répartis dans des sous-dossiers (sans dépôt Git)."""
+    paths = []
+    for i in range(file_count):
+        directory = os.path.join(root, f"d{i // (files_per_dir * files_per_dir)}", f"s{(i // files_per_dir) % files_per_dir}")
+        if i % files_per_dir == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"f{i}.txt")
+        with open(path, "w") as f:
+            f.write(f"{i}\n")
+        paths.append(path)
+    return paths
+
+
+def measure(function, runs):
+    """Retourne (médiane du temps écoulé, médiane du temps CPU) de `runs` appels."""
+    wall, cpu = [], []
+    for _ in range(runs):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        function()
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+    return statistics.median(wall), statistics.median(cpu)
+
+
+def report(label, timings, detail=""):
+    wall, cpu = timings
+    print(f"{label:>28} : {wall * 1000:9.1f} ms, CPU {cpu * 1000:9.1f} ms {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000000, help="Nombre de fichiers générés.")
+    parser.add_argument("--runs", type=int, default=3, help="Nombre de mesures par scénario.")
+    parser.add_argument("--changed", type=int, default=10, help="Fichiers réécrits (sauvegarde atomique) par scan actif.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    try:
+        print(f"Génération de {args.files} fichiers dans {root}...")
+        paths = generate_tree(root, args.files)
+        time.sleep(RACY_NS / 10**9)  # Les dossiers tout juste créés seraient relus à chaque scan
+        events = queue.Queue()
+        emitter = ScandirEmitter(events, ObservedWatch(root, recursive=True))
+
+        report("scan initial", measure(emitter.baseline, 1), f"({emitter.stats['files']} fichiers)")
+        report("scan sans changement", measure(emitter.scan, args.runs), f"({emitter.stats['dirs']} dossiers, "
+               f"{emitter.stats['listed']} relus)")
+
+        run = [0]
+
+        def active_scan():
+            # Sauvegarde d'éditeur : écriture d'un fichier temporaire puis renommage
+            for path in paths[run[0] * args.changed:(run[0] + 1) * args.changed]:
+                with open(path + ".tmp", "w") as f:
+                    f.write(f"run {run[0]}\n")
+                os.replace(path + ".tmp", path)
+            run[0] += 1
+            emitter.scan()
+
+        report("scan après sauvegardes", measure(active_scan, args.runs), f"({emitter.stats['listed']} dossier(s) relu(s), "
+               f"{events.qsize()} événement(s))")
+        report("scan complet", measure(lambda: emitter.scan(full=True), args.runs))
+        report("DirectorySnapshot watchdog", measure(lambda: DirectorySnapshot(root, recursive=True), args.runs))
+        if resource is not None:
+            print(f"{'RSS max':>28} : {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:9.1f} Mio")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare `git add .` et l'indexation ciblée sur un gros dépôt généré.
+
+Usage : python benchmarks/bench_staging.py --files 200000 --changed 1 --runs 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from git_observer.git_handler import GitHandler, STAGE_ALL, STAGE_PATHS  # noqa: E402
+
+
+def generate_repo(root, file_count, files_per_dir=100):
+    """Crée un dépôt de `file_count` fichiers répartis dans des sous-dossiers."""
+    subprocess.run(["git", "init", "-q", root], check=True)
+    subprocess.run(["git", "-C", root, "config", "user.email", "bench@example.com"], check=True)
+    subprocess.run(["git", "-C", root, "config", "user.name", "bench"], check=True)
+    paths = []
+    for i in range(file_count):
+        directory = os.path.join(root, f"d{i // (files_per_dir * files_per_dir)}", f"s{(i // files_per_dir) % files_per_dir}")
+        if i % files_per_dir == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"f{i}.txt")
+        with open(path, "w") as f:
+            f.write(f"{i}\n")
+        paths.append(path)
+    subprocess.run(["git", "-C", root, "add", "."], check=True)
+    subprocess.run(["git", "-C", root, "commit", "-q", "-m", "init"], check=True)
+    return paths
+
+
+def bench(handler, mode, paths, changed, runs):
+    """Mesure le temps d'indexation pour `runs` lots de `changed` fichiers modifiés."""
+    handler.staging_mode = mode
+    timings = []
+    for run in range(runs):
+        batch = paths[run * changed:(run + 1) * changed]
+        for path in batch:
+            with open(path, "a") as f:
+                f.write(f"{mode} {run}\n")
+        start = time.perf_counter()
+        handler.stage_changes(batch)
+        timings.append(time.perf_counter() - start)
+        subprocess.run(["git", "commit", "-q", "-m", f"{mode} {run}"], check=True)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000, help="Nombre de fichiers suivis.")
+    parser.add_argument("--changed", type=int, default=1, help="Fichiers modifiés par commit.")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre de mesures par mode.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    cwd = os.getcwd()
+    try:
+        print(f"Génération de {args.files} fichiers dans {root}...")
+        paths = generate_repo(root, args.files)
+        os.chdir(root)
+        handler = GitHandler()
+        # Premier passage pour chauffer le cache du système de fichiers et l'index
+        subprocess.run(["git", "status", "--porcelain"], capture_output=True)
+        for mode in (STAGE_ALL, STAGE_PATHS):
+            offset = 0 if mode == STAGE_ALL else args.runs * args.changed
+            timings = bench(handler, mode, paths[offset:], args.changed, args.runs)
+            print(f"{mode:>6} : médiane {statistics.median(timings) * 1000:8.1f} ms, "
+                  f"min {min(timings) * 1000:8.1f} ms, max {max(timings) * 1000:8.1f} ms")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
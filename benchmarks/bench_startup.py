@@ -0,0 +1,78 @@
+"""Mesure le démarrage du watcher : import du paquet puis installation de la première watch.
+
+Chaque mesure est faite dans un nouvel interpréteur (imports à froid du
+point de vue de Python, cache disque chaud après la passe de chauffe).
+
+Usage : python benchmarks/bench_startup.py --runs 10 --files 1000
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_staging import generate_repo  # noqa: E402
+
+# Exécuté dans le sous-processus : affiche les durées en JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from git_observer.git_handler import GitHandler
+from git_observer.notification import Notifier
+from git_observer.watcher import GitAutoCommitHandler, NativeObserver
+imported = time.perf_counter()
+git_handler = GitHandler(notifier=Notifier(["headless"]))
+handler = GitAutoCommitHandler(git_handler=git_handler)
+observer = NativeObserver()
+handler.attach(observer, ".")
+observer.start()
+watching = time.perf_counter()
+observer.stop()
+observer.join()
+handler.detach()
+print(json.dumps({"import": imported - start, "first_watch": watching - start,
+                  "gui_loaded": any(name in sys.modules for name in ("tkinter", "win10toast"))}))
+"""
+
+
+def measure(root, runs, env):
+    """Lance la sonde `runs` fois après un passage de chauffe."""
+    results = []
+    for run in range(runs + 1):
+        output = subprocess.run([sys.executable, "-c", PROBE], cwd=root, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        if run:
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def report(label, timings):
+    print(f"{label:>12} : médiane {statistics.median(timings) * 1000:8.1f} ms, "
+          f"min {min(timings) * 1000:8.1f} ms, max {max(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000, help="Nombre de fichiers suivis dans le dépôt de test.")
+    parser.add_argument("--runs", type=int, default=10, help="Nombre de mesures.")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [sys.path[0], os.environ.get("PYTHONPATH")])))
+    try:
+        generate_repo(root, args.files)
+        results = measure(root, args.runs, env)
+        report("import", [result["import"] for result in results])
+        report("1re watch", [result["first_watch"] for result in results])
+        print(f"{'tk/toast':>12} : {'chargés' if any(result['gui_loaded'] for result in results) else 'non chargés'}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
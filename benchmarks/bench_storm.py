@@ -0,0 +1,324 @@
+"""Rejoue des rafales d'événements sur un dépôt généré et mesure la chaîne complète du watcher.
+
+Chaque scénario est une suite d'opérations horodatées (écritures, suppressions,
+déplacements, commandes Git) rejouée sur un dépôt de `--files` fichiers relié à
+un dépôt distant nu local. Le watcher tourne sans interface (notifications
+headless) avec l'observer natif, les commits et les pushs réels.
+
+Mesures par scénario : latence entre l'écriture d'un marqueur `commit_name=`
+et la fin du commit (percentiles), événements traités par seconde, événements
+filtrés, RSS maximal, nombre de sous-processus Git par sous-commande.
+Les résultats sont écrits en JSON (`--output`) pour comparer les versions.
+
+Scénarios générés : editor-saves (sauvegardes atomiques avec marqueur),
+branch-switch (aller-retour entre deux branches), npm-install (milliers de
+fichiers dans node_modules/, ignoré). `--replay storm.jsonl` rejoue une rafale
+enregistrée, `--save-storm` enregistre les rafales générées au même format :
+une opération JSON par ligne, {"t": secondes, "op": "write" | "delete" |
+"move" | "git", "path": ..., "dest": ..., "data": ..., "args": [...], "marker": ...}.
+
+Usage : python benchmarks/bench_storm.py --files 20000 --scenarios editor-saves,npm-install --output storm.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_staging import generate_repo  # noqa: E402
+from git_observer.git_handler import GitHandler  # noqa: E402
+from git_observer.notification import Notifier  # noqa: E402
+from git_observer.watcher import GitAutoCommitHandler, start_observer  # noqa: E402
+
+SCENARIOS = ("editor-saves", "branch-switch", "npm-install")
+GIT_CALLS = Counter()  # Sous-commande Git -> nombre de processus lancés
+
+
+class CountingPopen(subprocess.Popen):
+    """`subprocess.Popen` qui compte les processus Git (sessions de plomberie comprises)."""
+
+    def __init__(self, args, *rest, **kwargs):
+        if isinstance(args, (list, tuple)) and args and os.path.basename(str(args[0])) == "git":
+            GIT_CALLS[git_subcommand(args[1:])] += 1
+        super().__init__(args, *rest, **kwargs)
+
+
+def git_subcommand(args):
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in ("-c", "-C"):
+            skip = True
+        elif not str(arg).startswith("-"):
+            return str(arg)
+    return "?"
+
+
+class StormHandler(GitAutoCommitHandler):
+    """Handler du watcher qui compte les événements reçus, filtrés et les chemins retenus."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counts = Counter()
+
+    def dispatch(self, event):
+        self.counts["received"] += 1
+        recorded = self.counts["recorded"]
+        super().dispatch(event)
+        if self.counts["recorded"] == recorded:
+            self.counts["filtered"] += 1  # Chemin ignoré, dossier, ou `stat` inchangé
+
+    def record_change(self, path, event_type):
+        self.counts["recorded"] += 1
+        super().record_change(path, event_type)
+
+
+def editor_saves(paths, count, interval, rng):
+    """Sauvegardes atomiques (fichier temporaire puis renommage), chacune avec un marqueur de commit."""
+    ops = []
+    for i in range(count):
+        path = rng.choice(paths)
+        marker = f"storm save {i}"
+        ops.append({"t": i * interval, "op": "write", "path": path, "atomic": True, "marker": marker,
+                    "data": f"{i}\ncommit_name=\"{marker}\"\n"})
+    return ops
+
+
+def branch_switch(paths, count, interval, rng):
+    """Aller-retour vers une branche préparée qui modifie une partie des fichiers."""
+    del paths, rng
+    ops = []
+    for i in range(count):
+        ops.append({"t": 2 * i * interval, "op": "git", "args": ["checkout", "-q", "storm"]})
+        ops.append({"t": (2 * i + 1) * interval, "op": "git", "args": ["checkout", "-q", "-"]})
+    return ops
+
+
+def npm_install(paths, count, interval, rng):
+    """Écriture d'un trait de `count` fichiers dans node_modules/ (ignoré), puis une sauvegarde suivie avec marqueur."""
+    ops = [{"t": 0, "op": "write", "path": f"node_modules/pkg{i // 50}/lib/f{i}.js",
+            "data": f"module.exports = {i};\n"} for i in range(count)]
+    path = rng.choice(paths)
+    ops.append({"t": interval, "op": "write", "path": path, "marker": "storm install",
+                "data": "commit_name=\"storm install\"\n"})
+    return ops
+
+
+GENERATORS = {"editor-saves": (editor_saves, 50), "branch-switch": (branch_switch, 3), "npm-install": (npm_install, 20000)}
+
+
+def setup_repository(root, file_count, branch_files):
+    """Dépôt généré, relié à un dépôt nu local, avec une branche `storm` qui modifie `branch_files` fichiers."""
+    paths = generate_repo(os.path.join(root, "work"), file_count)
+    work, remote = os.path.join(root, "work"), os.path.join(root, "remote.git")
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=work, check=True, capture_output=True)
+
+    git("config", "gc.auto", "0")
+    with open(os.path.join(work, ".gitignore"), "w") as f:
+        f.write("node_modules/\n")
+    git("add", ".gitignore")
+    git("commit", "-q", "-m", "gitignore")
+    subprocess.run(["git", "init", "-q", "--bare", remote], check=True)
+    git("remote", "add", "origin", remote)
+    git("push", "-q", "-u", "origin", "HEAD")
+    git("checkout", "-q", "-b", "storm")
+    for path in paths[:branch_files]:
+        with open(path, "a") as f:
+            f.write("branche storm\n")
+    git("commit", "-q", "-a", "-m", "storm")
+    git("checkout", "-q", "-")
+    return work, remote, [os.path.relpath(path, work) for path in paths]
+
+
+def replay(work, ops, written):
+    """Rejoue les opérations à leurs horodatages ; `written` reçoit marqueur -> instant d'écriture."""
+    start = time.perf_counter()
+    for op in ops:
+        delay = start + op["t"] - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        path = os.path.join(work, op.get("path", ""))
+        if op["op"] == "write":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            target = path + ".tmp" if op.get("atomic") else path
+            with open(target, "w") as f:
+                f.write(op.get("data", ""))
+            if op.get("atomic"):
+                os.replace(target, path)
+        elif op["op"] == "delete":
+            if os.path.lexists(path):
+                os.remove(path)
+        elif op["op"] == "move":
+            os.replace(path, os.path.join(work, op["dest"]))
+        elif op["op"] == "git":
+            subprocess.run(["git", *op["args"]], cwd=work, check=True, capture_output=True)
+        if op.get("marker"):
+            written[op["marker"]] = time.perf_counter()
+    return time.perf_counter() - start
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99), "max": ordered[-1], "count": len(ordered)}
+
+
+def run_scenario(ops, work, remote, args):
+    """Démarre un watcher neuf, rejoue `ops` et retourne les mesures du scénario."""
+    git_handler = GitHandler(repo_path=work, notifier=Notifier(["headless"]))
+    git_handler.PUSH_INTERVAL = args.push_interval
+    git_handler.enable_journal()
+    handler = StormHandler(quiet_period=args.quiet_period, max_wait=args.max_wait, git_handler=git_handler)
+    committed, written = {}, {}
+    commit_lock = threading.Lock()
+    commit_push = git_handler.git_commit_push
+
+    def timed_commit_push(message):
+        result = commit_push(message)
+        if result:
+            with commit_lock:
+                committed.setdefault(message, time.perf_counter())
+        return result
+    git_handler.git_commit_push = timed_commit_push
+
+    observer, _ = start_observer(handler, work, backend="native")
+    handler.reconcile()
+    time.sleep(0.5)  # Watches installées
+    GIT_CALLS.clear()
+    handler.counts.clear()
+    cpu_start, started = time.process_time(), time.perf_counter()
+
+    duration = replay(work, ops, written)
+    # Attente des derniers commits, puis d'un état calme
+    deadline = time.perf_counter() + args.settle
+    while time.perf_counter() < deadline:
+        with commit_lock:
+            done = all(marker in committed for marker in written)
+        if done and not git_handler.executor.qsize(work) and time.time() - git_handler.dirty_set.last_change_time > 2 * args.quiet_period:
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    git_handler.executor.submit(git_handler.get_push_scheduler().push_pending, key=work).result()
+    cpu = time.process_time() - cpu_start
+
+    observer.stop()
+    observer.join()
+    handler.detach()
+    git_handler.executor.shutdown()
+    git_handler.close_plumbing()
+    git_handler.change_index.close()
+
+    head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=work, capture_output=True, text=True).stdout.strip()
+    branch = git_handler.current_branch()
+    remote_head = subprocess.run(["git", "rev-parse", f"refs/heads/{branch}"], cwd=remote,
+                                 capture_output=True, text=True).stdout.strip()
+    latencies = [committed[marker] - written[marker] for marker in written if marker in committed]
+    return {
+        "operations": len(ops),
+        "replay_seconds": duration,
+        "elapsed_seconds": elapsed,
+        "cpu_seconds": cpu,
+        "events_received": handler.counts["received"],
+        "events_recorded": handler.counts["recorded"],
+        "events_filtered": handler.counts["filtered"],
+        "events_per_second": handler.counts["received"] / elapsed if elapsed else None,
+        "markers": len(written),
+        "commits": len(committed),
+        "missed_markers": sorted(set(written) - set(committed)),
+        "latency_seconds": percentiles(latencies),
+        "pushed": bool(head) and head == remote_head,
+        "git_processes": dict(GIT_CALLS),
+        "git_processes_total": sum(GIT_CALLS.values()),
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None,
+    }
+
+
+def load_storm(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_storm(path, ops):
+    with open(path, "w", encoding="utf-8") as f:
+        for op in ops:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000, help="Nombre de fichiers suivis du dépôt généré.")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS), help=f"Scénarios générés : {', '.join(SCENARIOS)}.")
+    parser.add_argument("--replay", type=str, action="append", default=[], help="Rafale enregistrée (JSON lines) à rejouer.")
+    parser.add_argument("--save-storm", type=str, help="Dossier où enregistrer les rafales générées.")
+    parser.add_argument("--count", type=int, help="Taille des scénarios générés (sauvegardes, allers-retours, fichiers).")
+    parser.add_argument("--interval", type=float, default=0.5, help="Secondes entre deux opérations générées.")
+    parser.add_argument("--branch-files", type=int, default=1000, help="Fichiers modifiés par la branche du scénario branch-switch.")
+    parser.add_argument("--quiet-period", type=float, default=0.2, help="Période de calme du regroupement.")
+    parser.add_argument("--max-wait", type=float, default=5.0, help="Attente maximale du regroupement.")
+    parser.add_argument("--push-interval", type=float, default=1.0, help="Intervalle des pushs groupés.")
+    parser.add_argument("--settle", type=float, default=30.0, help="Attente maximale des derniers commits après la rafale.")
+    parser.add_argument("--seed", type=int, default=1, help="Graine des rafales générées.")
+    parser.add_argument("--output", type=str, help="Fichier JSON des résultats.")
+    args = parser.parse_args()
+
+    source = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    version = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=source, capture_output=True, text=True).stdout.strip()
+    subprocess.Popen = CountingPopen
+
+    root = tempfile.mkdtemp(prefix="gitobserver-bench-")
+    results = {"version": version or None, "python": platform.python_version(), "platform": platform.platform(),
+               "config": vars(args), "scenarios": {}}
+    try:
+        print(f"Génération de {args.files} fichiers dans {root}...")
+        work, remote, paths = setup_repository(root, args.files, args.branch_files)
+        rng = random.Random(args.seed)
+        storms = []
+        for name in filter(None, args.scenarios.split(",")):
+            generator, default_count = GENERATORS[name]
+            storms.append((name, generator(paths, args.count or default_count, args.interval, rng)))
+        storms += [(os.path.basename(path), load_storm(path)) for path in args.replay]
+
+        for name, ops in storms:
+            if args.save_storm:
+                os.makedirs(args.save_storm, exist_ok=True)
+                save_storm(os.path.join(args.save_storm, f"{name}.jsonl"), ops)
+            print(f"Scénario {name} : {len(ops)} opération(s)...")
+            result = run_scenario(ops, work, remote, args)
+            results["scenarios"][name] = result
+            latency = result["latency_seconds"]
+            print(f"{name:>16} : {result['events_per_second'] or 0:9.1f} événements/s, "
+                  f"{result['events_filtered']} filtré(s), {result['commits']}/{result['markers']} commit(s), "
+                  f"latence p50 {latency['p50'] * 1000 if latency else 0:.0f} ms / p99 {latency['p99'] * 1000 if latency else 0:.0f} ms, "
+                  f"{result['git_processes_total']} processus Git, push {'ok' if result['pushed'] else 'KO'}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Index de détection des vrais changements : `stat` d'abord, hash du contenu ensuite."""
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .dirty_journal import blob_oid
+from .polling import RACY_NS
+
+
+class IndexEntry:
+    """Dernier état connu d'un fichier."""
+
+    __slots__ = ("size", "mtime_ns", "inode", "mode", "digest", "racy")
+
+    def __init__(self, size, mtime_ns, inode, mode, digest, racy=False):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.mode = mode
+        self.digest = digest
+        # Comme le « racy clean » de Git : mtime trop récente au moment du relevé, une écriture
+        # dans le même intervalle de résolution garderait le même `stat`
+        self.racy = racy
+
+    def same_stat(self, st):
+        return (self.size, self.mtime_ns, self.inode, self.mode) == (st.st_size, st.st_mtime_ns, st.st_ino, st.st_mode)
+
+    def unchanged(self, st):
+        """True si `st` prouve que le fichier n'a pas changé : même `stat` et relevé hors de la fenêtre racy."""
+        return not self.racy and self.same_stat(st)
+
+
+class ChangeIndex:
+    """Distingue les modifications de contenu des simples sauvegardes sans changement (`touch`).
+
+    Pour chaque chemin, l'index garde (taille, mtime_ns, inode, mode) et l'oid
+    du blob Git du contenu. Un fichier dont le `stat` n'a pas bougé n'est pas
+    relu, sauf si sa mtime datait de moins de RACY_NS lors du relevé ; sinon
+    il est hashé par blocs de `chunk_size` octets, jamais chargé en entier.
+    Les lots de plus de `parallel_threshold` fichiers sont hashés sur un pool
+    de threads (hashlib relâche le GIL), propre à l'index ou partagé (`pool`,
+    fourni par le démon pour tous les dépôts). L'index est un LRU borné à
+    `max_entries` chemins.
+    """
+
+    def __init__(self, max_entries=65536, chunk_size=1024 * 1024, workers=4, parallel_threshold=8, pool=None):
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self._entries = OrderedDict()  # chemin -> IndexEntry
+        self._lock = threading.Lock()
+        self._pool = pool
+        self._owns_pool = pool is None  # Un pool partagé est arrêté par son propriétaire
+
+    def stat_unchanged(self, path):
+        """Vérification sans lecture (thread de l'observer) : True si le `stat` est celui du dernier passage.
+
+        Une entrée relevée dans la fenêtre racy ne prouve rien : l'événement est traité.
+        """
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return False
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry is not None and entry.unchanged(st)
+
+    def digest(self, path):
+        """Oid connu du contenu de `path`, ou None."""
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry.digest if entry else None
+
+    def has_changed(self, path, baseline=None):
+        return bool(self.filter_changed([path], baseline))
+
+    def filter_changed(self, paths, baseline=None):
+        """Retourne les chemins de `paths` dont le contenu (ou le mode) a changé depuis le dernier passage.
+
+        `baseline(path)` donne l'oid de référence d'un chemin encore inconnu
+        de l'index (blob de HEAD) ; sans référence, un chemin inconnu est
+        considéré modifié. Un chemin disparu est toujours modifié.
+        """
+        checked_at = time.time_ns()  # Avant les `lstat` : la fenêtre racy est comptée au plus large
+        changed, to_hash = [], []
+        for path in dict.fromkeys(paths):
+            try:
+                st = os.lstat(path)
+            except OSError:
+                self.forget(path)
+                changed.append(path)
+                continue
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry.unchanged(st):
+                    self._entries.move_to_end(path)
+                    continue
+            to_hash.append((path, st, entry))
+
+        if len(to_hash) >= self.parallel_threshold:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="change-index")
+            digests = list(self._pool.map(self._hash, to_hash))
+        else:
+            digests = [self._hash(item) for item in to_hash]
+
+        for (path, st, entry), digest in zip(to_hash, digests):
+            if entry is not None:
+                previous = entry.digest if entry.mode == st.st_mode else None
+            else:
+                previous = baseline(path) if baseline else None
+            if digest is None or digest != previous:
+                changed.append(path)
+            racy = checked_at - st.st_mtime_ns < RACY_NS
+            self._store(path, IndexEntry(st.st_size, st.st_mtime_ns, st.st_ino, st.st_mode, digest, racy))
+        return changed
+
+    def _hash(self, item):
+        path, st, _ = item
+        if not stat.S_ISREG(st.st_mode):
+            return None  # Lien symbolique, fichier spécial : toujours considéré modifié
+        try:
+            return blob_oid(path, st.st_size, chunk_size=self.chunk_size)
+        except OSError:
+            return None
+
+    def _store(self, path, entry):
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, path):
+        """Retire un chemin de l'index (fichier supprimé)."""
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def close(self):
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown(wait=False)
+        self._pool = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,217 @@
+"""Contrôle des fichiers avant commit : taille, binaires, secrets.
+
+Les chemins candidats d'un lot sont classés avant l'indexation : fichiers
+plus gros que `max_size`, binaires (un octet nul dans le premier bloc, comme
+l'heuristique de Git) et fichiers qui ressemblent à des identifiants (nom
+de clé privée, motifs de jetons dans le contenu). Chaque raison a sa
+politique : `allow` (committé quand même), `hold` (retenu, le reste du lot
+part sans attendre) ou `exclude` (retenu et ajouté à `.git/info/exclude`).
+Les gros lots sont classés sur un pool de processus, propre au dépôt ou
+partagé par le démon : la lecture et la recherche des motifs ne prennent
+pas le GIL du watcher.
+"""
+import fnmatch
+import multiprocessing
+import os
+import re
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from colorama import Fore, Style
+
+SNIFF_SIZE = 8000  # Comme Git : un octet nul dans ce bloc signale un fichier binaire
+SCAN_LIMIT = 4 * 1024 * 1024  # Octets lus au plus pour chercher des secrets
+DEFAULT_MAX_SIZE = 50 * 1024 * 1024
+MAX_VERDICTS = 65536  # Verdicts gardés en cache
+POLICIES = ("allow", "hold", "exclude")
+DEFAULT_POLICY = {"size": "hold", "binary": "allow", "secret": "hold"}
+DEFAULT_SECRET_PATTERNS = (
+    r"-----BEGIN (?:RSA |DSA |EC |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----",
+    r"\bAKIA[0-9A-Z]{16}\b",  # Clé d'accès AWS
+    r"\bgh[pousr]_[A-Za-z0-9]{36,}\b",  # Jeton GitHub
+    r"\bglpat-[A-Za-z0-9_-]{20,}\b",  # Jeton GitLab
+    r"\bxox[abposr]-[A-Za-z0-9-]{10,}\b",  # Jeton Slack
+    r"\bsk_live_[A-Za-z0-9]{24,}\b",  # Clé Stripe
+)
+SECRET_FILE_NAMES = (".env", ".env.*", "id_rsa", "id_dsa", "id_ecdsa", "id_ed25519", "*.pem", "*.p12", "*.pfx",
+                     "*.keystore", ".netrc", ".pgpass", "credentials.json")
+# Modèles versionnés exprès : seul leur contenu est contrôlé
+TEMPLATE_FILE_NAMES = (".env.example", ".env.sample", ".env.template", ".env.dist")
+
+_compiled = {}  # motifs -> expression compilée (un cache par processus du pool)
+
+
+def parse_policy(text):
+    """Lit `size=hold,binary=allow,secret=exclude` en dictionnaire de politiques."""
+    policy = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        reason, _, action = item.partition("=")
+        if reason not in DEFAULT_POLICY or action not in POLICIES:
+            raise ValueError(f"Politique invalide : {item} (raisons : {', '.join(DEFAULT_POLICY)} ; "
+                             f"politiques : {', '.join(POLICIES)})")
+        policy[reason] = action
+    return policy
+
+
+def format_size(size):
+    for unit in ("o", "Kio", "Mio", "Gio"):
+        if size < 1024 or unit == "Gio":
+            return f"{size:.0f} {unit}" if unit == "o" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def classify(path, max_size, patterns, names):
+    """Classe un fichier régulier. Retourne (raison, détail), ou None s'il peut être committé.
+
+    Exécutée dans les processus du pool : ne dépend que de ses arguments.
+    """
+    try:
+        size = os.path.getsize(path)
+        if max_size and size > max_size:
+            return "size", f"{format_size(size)} > {format_size(max_size)}"
+        name = os.path.basename(path)
+        if any(fnmatch.fnmatch(name, pattern) for pattern in names) and name not in TEMPLATE_FILE_NAMES:
+            return "secret", f"nom de fichier d'identifiants ({name})"
+        with open(path, "rb") as f:
+            block = f.read(SNIFF_SIZE)
+            if b"\0" in block:
+                return "binary", f"fichier binaire ({format_size(size)})"
+            if not patterns:
+                return None
+            content = block + f.read(SCAN_LIMIT - len(block))
+    except OSError:
+        return None  # Disparu ou illisible : Git tranchera à l'indexation
+    expression = _compiled.get(patterns)
+    if expression is None:
+        expression = _compiled[patterns] = re.compile("|".join(f"(?:{p})" for p in patterns).encode())
+    match = expression.search(content)
+    if match:
+        line = content.count(b"\n", 0, match.start()) + 1
+        return "secret", f"motif d'identifiant ligne {line}"
+    return None
+
+
+def _classify_item(item):
+    return classify(*item)
+
+
+def create_pool(workers=None):
+    """Pool de processus du contrôle.
+
+    `spawn` : les processus ne copient pas les threads (observer, workers Git) du watcher.
+    """
+    return ProcessPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+class CommitGuard:
+    """Filtre les chemins candidats d'un commit selon la taille, le type et les motifs de secrets.
+
+    Les verdicts sont gardés par (taille, mtime_ns, inode) : un fichier
+    retenu qui n'a pas changé n'est ni relu ni signalé une seconde fois.
+    """
+
+    def __init__(self, repo_root, git_dir, max_size=DEFAULT_MAX_SIZE, policy=None, secret_patterns=(),
+                 workers=None, parallel_threshold=16, pool=None):
+        self.repo_root = repo_root
+        self.git_dir = git_dir
+        self.max_size = max_size  # 0 : pas de limite
+        self.policy = dict(DEFAULT_POLICY, **(policy or {}))
+        parse_policy(",".join(f"{reason}={action}" for reason, action in self.policy.items()))  # Valide les réglages
+        self.patterns = DEFAULT_SECRET_PATTERNS + tuple(secret_patterns)
+        self.names = SECRET_FILE_NAMES
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.parallel_threshold = parallel_threshold
+        self.held = {}  # chemin -> (raison, détail) des fichiers retenus
+        self._verdicts = {}  # chemin -> ((taille, mtime_ns, inode), verdict)
+        self._pool = pool
+        self._owns_pool = pool is None  # Un pool partagé est arrêté par son propriétaire
+
+    def filter(self, paths):
+        """Retourne (chemins à committer, {chemin: (raison, détail)} des fichiers retenus).
+
+        Les chemins disparus (suppressions) et ceux qui ne sont pas des fichiers
+        réguliers passent toujours.
+        """
+        allowed, offenders, to_classify = [], {}, []
+        for path in paths:
+            try:
+                st = os.lstat(path)
+            except OSError:
+                allowed.append(path)
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                allowed.append(path)
+                continue
+            key = (st.st_size, st.st_mtime_ns, st.st_ino)
+            cached = self._verdicts.get(path)
+            if cached is not None and cached[0] == key:
+                self._apply(path, cached[1], allowed, offenders, announce=False)
+            else:
+                to_classify.append((path, key))
+
+        if len(self._verdicts) + len(to_classify) > MAX_VERDICTS:
+            self._verdicts.clear()
+        for (path, key), verdict in zip(to_classify, self._classify([path for path, _ in to_classify])):
+            self._verdicts[path] = (key, verdict)
+            self._apply(path, verdict, allowed, offenders, announce=True)
+        return allowed, offenders
+
+    def _classify(self, paths):
+        items = [(path, self.max_size, self.patterns, self.names) for path in paths]
+        if len(items) >= self.parallel_threshold:
+            try:
+                if self._pool is None:
+                    self._pool = create_pool(self.workers)
+                    self._owns_pool = True
+                return list(self._pool.map(_classify_item, items, chunksize=max(1, len(items) // (self.workers * 4))))
+            except (BrokenProcessPool, OSError) as e:
+                print(f"{Fore.YELLOW}⚠️ Pool de contrôle indisponible, contrôle dans le worker Git : {e}{Style.RESET_ALL}")
+                self.close()
+        return [_classify_item(item) for item in items]
+
+    def _apply(self, path, verdict, allowed, offenders, announce):
+        if verdict is None:
+            self.held.pop(path, None)
+            allowed.append(path)
+            return
+        reason, detail = verdict
+        action = self.policy.get(reason, "hold")
+        if action == "allow":
+            self.held.pop(path, None)
+            allowed.append(path)
+            return
+        self.held[path] = verdict
+        offenders[path] = verdict
+        if not announce:
+            return
+        rel = os.path.relpath(path, self.repo_root)
+        if action == "exclude" and self.exclude(rel):
+            print(f"{Fore.RED}🚫 {rel} exclu du dépôt (.git/info/exclude) : {detail}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.RED}🚫 {rel} retenu hors du commit : {detail}{Style.RESET_ALL}")
+
+    def exclude(self, rel):
+        """Ajoute `rel` à .git/info/exclude. Retourne True si la règle a été écrite."""
+        path = os.path.join(self.git_dir, "info", "exclude")
+        rule = "/" + rel.replace(os.sep, "/")
+        for special in "\\*?[!#":
+            rule = rule.replace(special, "\\" + special)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a+", encoding="utf-8") as f:
+                f.seek(0)
+                content = f.read()
+                if rule in content.splitlines():
+                    return True
+                f.write(("" if not content or content.endswith("\n") else "\n") + rule + "\n")
+        except OSError as e:
+            print(f"{Fore.YELLOW}⚠️ Exclusion impossible ({path}) : {e}{Style.RESET_ALL}")
+            return False
+        return True
+
+    def close(self):
+        """Arrête le pool s'il appartient au contrôle ; un pool partagé cassé est seulement abandonné."""
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
@@ -0,0 +1,148 @@
+"""Messages de commit générés à partir du diff indexé, en un seul appel Git.
+
+`git diff --raw --numstat -M -z` donne pour chaque fichier le type de
+changement (ajout, modification, suppression, renommage) et le nombre de
+lignes ajoutées et supprimées. Les changements sont regroupés par dossier et
+résumés en un message borné (`MAX_GROUPS` dossiers, `MAX_RENAMES`
+renommages), quelle que soit la taille du lot. Le tout tient dans un budget
+de temps : au-delà, l'appelant garde son message par défaut.
+"""
+import os
+import subprocess
+import time
+
+DEFAULT_MESSAGE = "Mise à jour automatique"
+SUBJECT_WIDTH = 72
+MAX_GROUPS = 6
+MAX_RENAMES = 5
+GROUP_DEPTH = 2  # Composants de chemin gardés pour regrouper par dossier
+RENAME_LIMIT = 1000  # Paires examinées au plus pour la détection des renommages inexacts
+KINDS = {"A": ("ajouté", "ajoutés"), "M": ("modifié", "modifiés"), "D": ("supprimé", "supprimés"),
+         "R": ("renommé", "renommés"), "C": ("copié", "copiés"), "T": ("type changé", "types changés")}
+KIND_ORDER = "AMDRCT"
+
+
+class FileChange:
+    """Changement d'un fichier dans le diff."""
+
+    __slots__ = ("kind", "path", "old_path", "added", "deleted")
+
+    def __init__(self, kind, path, old_path=None, added=None, deleted=None):
+        self.kind = kind  # Lettre de `git diff --raw` (A, M, D, R, C, T)
+        self.path = path
+        self.old_path = old_path  # Source d'un renommage ou d'une copie
+        self.added = added  # Lignes ajoutées, None si inconnu ou binaire
+        self.deleted = deleted
+
+    @property
+    def binary(self):
+        return self.added is None and self.kind != "D"
+
+
+def parse_diff(output, deadline=None):
+    """Lit la sortie de `git diff --raw --numstat -z` en liste de `FileChange`.
+
+    Les enregistrements `--raw` (type) précèdent les enregistrements
+    `--numstat` (lignes), dans le même ordre. Retourne (changements, complet) :
+    la lecture s'arrête à `deadline` (horloge `time.monotonic`).
+    """
+    tokens = output.decode(errors="surrogateescape").split("\0")
+    changes, i = [], 0
+    while i < len(tokens) and tokens[i].startswith(":"):
+        kind = tokens[i].split()[-1][:1]
+        if kind in "RC":
+            changes.append(FileChange(kind, tokens[i + 2], tokens[i + 1]))
+            i += 3
+        else:
+            changes.append(FileChange(kind, tokens[i + 1]))
+            i += 2
+        if deadline and len(changes) % 1024 == 0 and time.monotonic() > deadline:
+            return changes, False
+
+    for change in changes:
+        if i >= len(tokens) or not tokens[i]:
+            break
+        added, deleted, path = tokens[i].split("\t", 2)
+        i += 1 if path else 3  # Renommage : chemins source et destination dans les deux champs suivants
+        if added != "-":
+            change.added, change.deleted = int(added), int(deleted)
+    return changes, True
+
+
+def group_of(path, depth=GROUP_DEPTH):
+    directory = os.path.dirname(path)
+    return "/".join(directory.split("/")[:depth]) if directory else "(racine)"
+
+
+def plural(count, word):
+    return f"{count} {word}{'s' if count > 1 else ''}"
+
+
+def summarize(changes, complete=True, max_groups=MAX_GROUPS, max_renames=MAX_RENAMES):
+    """Message borné (objet et corps) décrivant `changes`, regroupés par dossier."""
+    if not changes:
+        return DEFAULT_MESSAGE
+    groups = {}  # dossier -> [compteurs par type, binaires, lignes ajoutées, lignes supprimées]
+    for change in changes:
+        group = groups.setdefault(group_of(change.path), [dict.fromkeys(KIND_ORDER, 0), 0, 0, 0])
+        group[0][change.kind] = group[0].get(change.kind, 0) + 1
+        group[1] += change.binary
+        group[2] += change.added or 0
+        group[3] += change.deleted or 0
+    counted = any(change.added is not None for change in changes)
+    added = sum(group[2] for group in groups.values())
+    deleted = sum(group[3] for group in groups.values())
+    ordered = sorted(groups.items(), key=lambda item: (-(item[1][2] + item[1][3]), -sum(item[1][0].values()), item[0]))
+
+    def lines(a, d):
+        return f" (+{a} -{d})" if counted else ""
+
+    # Objet : nombre de fichiers, dossiers principaux tant qu'ils tiennent dans la largeur
+    subject = f"Auto-commit : {plural(len(changes), 'fichier')}"
+    names = []
+    for name, _ in ordered:
+        candidate = ", ".join(names + [name])
+        rest = len(ordered) - len(names) - 1
+        more = f" et {rest} autre(s)" if rest else ""
+        if len(f"{subject} dans {candidate}{more}{lines(added, deleted)}") > SUBJECT_WIDTH and names:
+            break
+        names.append(name)
+    rest = len(ordered) - len(names)
+    subject += f" dans {', '.join(names)}" + (f" et {rest} autre(s)" if rest else "") + lines(added, deleted)
+
+    body = []
+    for name, (kinds, binaries, a, d) in ordered[:max_groups]:
+        parts = [f"{kinds[kind]} {KINDS[kind][kinds[kind] > 1]}" for kind in KIND_ORDER if kinds.get(kind)]
+        if binaries:
+            parts.append(plural(binaries, "binaire"))
+        body.append(f"{name} : {', '.join(parts)}{lines(a, d)}")
+    if len(ordered) > max_groups:
+        others = ordered[max_groups:]
+        files = sum(sum(group[0].values()) for _, group in others)
+        body.append(f"... et {len(others)} autre(s) dossier(s) : {plural(files, 'fichier')}"
+                    f"{lines(sum(group[2] for _, group in others), sum(group[3] for _, group in others))}")
+
+    renames = [change for change in changes if change.kind == "R"]
+    if renames:
+        body.append("")
+        body.extend(f"{change.old_path} -> {change.path}" for change in renames[:max_renames])
+        if len(renames) > max_renames:
+            body.append(f"... et {len(renames) - max_renames} autre(s) renommage(s)")
+    if not complete:
+        body.append("")
+        body.append("Liste tronquée : budget de temps dépassé.")
+    return subject + "\n\n" + "\n".join(body)
+
+
+def summarize_diff(repo_path, diff_args=("--cached",), budget=1.0, env=None):
+    """Résume `git diff --raw --numstat -M -z <diff_args>`. Retourne None si Git dépasse le budget (secondes)."""
+    deadline = time.monotonic() + budget
+    try:
+        result = subprocess.run(["git", "diff", "--raw", "--numstat", "-M",
+                                 f"-l{RENAME_LIMIT}", "-z", *diff_args], cwd=repo_path, capture_output=True,
+                                env=env, timeout=budget)
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0:
+        return None
+    return summarize(*parse_diff(result.stdout, deadline))
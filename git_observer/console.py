@@ -0,0 +1,124 @@
+"""Console asyncio du watcher : lecture de stdin sans blocage et invite de commit."""
+import asyncio
+import os
+import sys
+import threading
+import time
+from colorama import Fore, Style
+from .executor import CommitQueueFull
+
+
+class ConsoleSession:
+    """Possède stdin pour la boucle asyncio du watcher.
+
+    Les lignes saisies sont d'abord remises aux demandes en attente (saisie
+    d'un rappel depuis le thread des rappels, via `readline`) ; sinon elles sont
+    traitées comme un message de commit. Pendant la saisie, la boucle continue
+    de recevoir les événements, de réconcilier et de committer.
+    """
+
+    QUIET_PERIOD = 2  # Secondes sans modification avant d'afficher l'invite
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.git_handler = None
+        self._changed = asyncio.Event()
+        self._change_pending = False
+        self._waiters = []  # Futures des `readline` en attente
+        self._buffer = b""
+        self._reader_fd = None
+
+    def start(self, git_handler):
+        """Commence à lire stdin : `add_reader` si possible, sinon un thread lecteur (Windows, fichier)."""
+        self.git_handler = git_handler
+        if sys.stdin is None:
+            return
+        try:
+            fd = sys.stdin.fileno()
+            self.loop.add_reader(fd, self._read_ready, fd)
+            self._reader_fd = fd
+        except (NotImplementedError, ValueError, OSError):
+            threading.Thread(target=self._read_blocking, name="stdin-reader", daemon=True).start()
+
+    def close(self):
+        if self._reader_fd is not None:
+            self.loop.remove_reader(self._reader_fd)
+            self._reader_fd = None
+
+    def notify_change(self):
+        """Signale une modification (thread de l'observer) ; un seul réveil de la boucle par rafale."""
+        if not self._change_pending:
+            self._change_pending = True
+            self.loop.call_soon_threadsafe(self._on_change)
+
+    def _on_change(self):
+        self._change_pending = False
+        self._changed.set()
+
+    def _read_ready(self, fd):
+        data = os.read(fd, 65536)
+        if not data:
+            self.close()  # Fin de stdin
+            return
+        self._buffer += data
+        while b"\n" in self._buffer:
+            line, self._buffer = self._buffer.split(b"\n", 1)
+            self._on_line(line.decode(errors="replace").rstrip("\r"))
+
+    def _read_blocking(self):
+        for line in sys.stdin:
+            self.loop.call_soon_threadsafe(self._on_line, line.rstrip("\r\n"))
+
+    def _on_line(self, line):
+        while self._waiters:
+            waiter = self._waiters.pop(0)
+            if not waiter.done():
+                waiter.set_result(line)
+                return
+        if line and not line.startswith("[main"):
+            self.loop.create_task(self.commit(line))
+
+    async def commit(self, message):
+        """Confie le commit au worker Git du dépôt et attend son résultat sans bloquer la boucle."""
+        future = self.git_handler.executor.submit(self.git_handler.git_commit_push, message,
+                                                  key=self.git_handler.repo_path)
+        try:
+            return await asyncio.wrap_future(future)
+        except CommitQueueFull:
+            return False  # Déjà signalé par l'executor
+        except Exception as e:
+            print(f"{Fore.RED}❌ Erreur lors du commit : {e}{Style.RESET_ALL}")
+            return False
+
+    async def next_line(self):
+        waiter = self.loop.create_future()
+        self._waiters.append(waiter)
+        return await waiter
+
+    def readline(self, prompt=""):
+        """Équivalent de `input()` pour les autres threads (backend console des rappels)."""
+        print(prompt, end='', flush=True)
+        return asyncio.run_coroutine_threadsafe(self.next_line(), self.loop).result()
+
+    async def prompt_loop(self):
+        """Affiche l'invite de commit une fois par série de modifications, après QUIET_PERIOD secondes de calme."""
+        dirty_set = self.git_handler.dirty_set
+        seen_version = dirty_set.version
+        prompt_shown = False
+        while True:
+            self._changed.clear()
+            if dirty_set.version != seen_version:
+                seen_version = dirty_set.version
+                prompt_shown = False
+
+            quiet_time = time.time() - dirty_set.last_change_time
+            if dirty_set and not prompt_shown and quiet_time > self.QUIET_PERIOD:
+                print(f"\n{Fore.CYAN}💡 Vous pouvez entrer un message de commit : {Style.RESET_ALL}", end='', flush=True)
+                prompt_shown = True
+                continue
+
+            timeout = self.QUIET_PERIOD - quiet_time if dirty_set and not prompt_shown else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), None if timeout is None else max(timeout, 0.1))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,197 @@
+"""Démon multi-dépôts : un seul processus, un seul observer et un pool Git partagé.
+
+Fichier de configuration (JSON) :
+
+    {
+        "workers": 4,
+        "metrics": {"file": "~/.gitobserver-metrics.prom", "interval": 15, "port": 9464},
+        "repositories": [
+            "~/src/api",
+            {"path": "~/src/web", "quiet_period": 5, "max_wait": 60,
+             "notification_delay": 900, "reconcile_interval": 300, "stage_all": false, "porcelain": false,
+             "checkpoint": true, "squash_interval": 1800, "push_interval": 60,
+             "journal": true, "backend": "auto", "notify": "headless",
+             "guard": {"max_file_size": 50, "policy": {"binary": "exclude"}, "secret_patterns": []}}
+        ]
+    }
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+from .commit_guard import create_pool
+from .executor import CommitExecutor
+from .fsmonitor import FsmonitorListener
+from .git_handler import GitHandler, STAGE_ALL
+from .metrics import get_metrics, start_exporters
+from .notification import Notifier, parse_backend_names
+from .polling import ScandirObserver, WATCH_LIMIT_ERRORS, polling_reason
+from .watcher import GitAutoCommitHandler, NativeObserver
+
+DEFAULT_CONFIG = os.path.join(os.path.expanduser("~"), ".gitobserver.json")
+
+
+def load_config(path):
+    """Lit le fichier de configuration et normalise la liste des dépôts."""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    repositories = []
+    for entry in config.get("repositories", []):
+        settings = {"path": entry} if isinstance(entry, str) else dict(entry)
+        settings["path"] = os.path.abspath(os.path.expanduser(settings["path"]))
+        repositories.append(settings)
+    if not repositories:
+        raise ValueError(f"Aucun dépôt dans {path}")
+    metrics = dict(config.get("metrics", {}))
+    if metrics.get("file"):
+        metrics["file"] = os.path.abspath(os.path.expanduser(metrics["file"]))
+    return {"workers": int(config.get("workers", 4)), "metrics": metrics, "repositories": repositories}
+
+
+class GitObserverDaemon:
+    """Surveille plusieurs dépôts avec un observer et des pools (workers Git, hash, contrôle) communs.
+
+    Chaque dépôt garde son propre état (ensemble des fichiers modifiés, fenêtre
+    de regroupement, réglages de `GitHandler`). Les opérations Git passent par
+    le pool, avec une file par dépôt, et les rappels, fenêtres de regroupement
+    et réconciliations sont des échéances du planificateur partagé.
+
+    Restent propres à chaque dépôt : sous Linux, l'instance inotify et ses
+    deux threads (voir `inotify`), et jusqu'à cinq processus Git persistants
+    ouverts par la session de plomberie au premier commit (voir `plumbing`).
+    """
+
+    def __init__(self, workers=4, metrics=None):
+        self.executor = CommitExecutor(max_workers=workers, name="git-pool")
+        # Pools de hash (index des changements) et de contrôle avant commit, communs à tous les dépôts
+        self.hash_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="change-index")
+        self.guard_pool = create_pool()
+        self.metrics = metrics or {}  # Exportation des métriques : {"file", "interval", "port"}
+        self.observer = NativeObserver()
+        self.polling_observer = None  # Scan des dossiers, pour les dépôts que l'observer natif ne peut pas suivre
+        self.fsmonitor_listener = FsmonitorListener()
+        self.handlers = []
+
+    def add_repository(self, settings):
+        """Ajoute un dépôt à surveiller à partir de ses réglages."""
+        path = settings["path"]
+        notifier = Notifier(parse_backend_names(settings.get("notify")))
+        git_handler = GitHandler(repo_path=path, executor=self.executor, notifier=notifier,
+                                 hash_pool=self.hash_pool, guard_pool=self.guard_pool)
+        git_handler.NOTIFICATION_DELAY = settings.get("notification_delay", git_handler.NOTIFICATION_DELAY)
+        git_handler.RECONCILE_INTERVAL = settings.get("reconcile_interval", git_handler.RECONCILE_INTERVAL)
+        if settings.get("stage_all"):
+            git_handler.staging_mode = STAGE_ALL
+        git_handler.use_plumbing = not settings.get("porcelain", False)
+        git_handler.checkpoints = settings.get("checkpoint", False)
+        git_handler.SQUASH_INTERVAL = settings.get("squash_interval", git_handler.SQUASH_INTERVAL)
+        git_handler.PUSH_INTERVAL = settings.get("push_interval", git_handler.PUSH_INTERVAL)
+        if settings.get("journal", True):
+            git_handler.enable_journal()
+        guard = settings.get("guard", {})
+        if guard is not False:  # `false` désactive le contrôle avant commit
+            git_handler.enable_guard(max_size=int(guard.get("max_file_size", 50) * 1024 * 1024),
+                                     policy=guard.get("policy"), secret_patterns=guard.get("secret_patterns", ()))
+        git_handler.enable_reminders()
+
+        handler = GitAutoCommitHandler(quiet_period=settings.get("quiet_period", 2.0),
+                                       max_wait=settings.get("max_wait", 30.0),
+                                       git_handler=git_handler)
+        backend = settings.get("backend", "auto")
+        reason = "demandé" if backend == "polling" else polling_reason(path) if backend == "auto" else None
+        if reason:
+            print(f"{Fore.YELLOW}🐢 {path} : surveillance par scan des dossiers ({reason}){Style.RESET_ALL}")
+        watch_count = handler.attach(self.get_polling_observer() if reason else self.observer, path,
+                                     self.fsmonitor_listener)
+        self.handlers.append(handler)
+        print(f"{Fore.MAGENTA}👀 Surveillance du dépôt : {path} ({watch_count} watch(es)){Style.RESET_ALL}")
+        return handler
+
+    def get_polling_observer(self):
+        if self.polling_observer is None:
+            self.polling_observer = ScandirObserver()
+        return self.polling_observer
+
+    def start_observers(self):
+        """Démarre l'observer natif ; si ses watches échouent (limites inotify), ses dépôts passent au scan."""
+        try:
+            self.observer.start()
+        except OSError as e:
+            if e.errno not in WATCH_LIMIT_ERRORS:
+                raise
+            failed, self.observer = self.observer, NativeObserver()  # Jamais démarré : remplacé par un observer vide
+            failed.unschedule_all()
+            for handler in self.handlers:
+                if handler.watch_scheduler.observer is failed:
+                    print(f"{Fore.YELLOW}🐢 {handler.git_handler.repo_path} : surveillance par scan des dossiers ({e}){Style.RESET_ALL}")
+                    handler.detach()
+                    handler.attach(self.get_polling_observer(), handler.git_handler.repo_path, self.fsmonitor_listener)
+            self.observer.start()
+        if self.polling_observer is not None:
+            self.polling_observer.start()
+
+    def run(self):
+        """Démarre l'observer et la boucle principale jusqu'à Ctrl+C."""
+        exporters = []
+        try:
+            self.start_observers()
+            # Profils (SIGUSR2) écrits à côté du fichier de métriques, sinon dans le dossier personnel
+            profile_dir = os.path.dirname(self.metrics["file"]) if self.metrics.get("file") else os.path.expanduser("~")
+            exporters = start_exporters(get_metrics(), self.metrics.get("file"), self.metrics.get("interval", 15),
+                                        self.metrics.get("port"), profile_dir)
+            for handler in self.handlers:
+                # Le journal restaure l'état en premier dans la file du dépôt ; la réconciliation rattrape le reste
+                handler.restore_journal()
+                handler.request_reconcile()
+                handler.schedule_reconciliation()
+                handler.git_handler.resume_pushes()
+            # Tout le travail est planifié ou fait par le pool : le thread principal attend Ctrl+C
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            print(f"\n{Fore.YELLOW}🛑 Arrêt de la surveillance...{Style.RESET_ALL}")
+        for observer in (self.observer, self.polling_observer):
+            if observer is not None and observer.is_alive():
+                observer.stop()
+                observer.join()
+        for handler in self.handlers:
+            handler.detach()
+        self.fsmonitor_listener.close()
+        self.executor.shutdown()
+        for handler in self.handlers:
+            handler.save_journal()
+            handler.git_handler.change_index.close()
+            handler.git_handler.close_plumbing()
+            if handler.git_handler.guard is not None:
+                handler.git_handler.guard.close()
+        self.hash_pool.shutdown(wait=False)
+        self.guard_pool.shutdown(wait=False, cancel_futures=True)
+        for exporter in exporters:
+            exporter.stop()
+
+
+def parse_arguments():
+    """Analyse les arguments CLI du démon."""
+    parser = argparse.ArgumentParser(description="Surveille plusieurs dépôts Git depuis un seul processus.")
+    parser.add_argument("--config", type=str, default=DEFAULT_CONFIG, help="Fichier de configuration JSON listant les dépôts.")
+
+    return parser.parse_args()
+
+
+def start_daemon():
+    """Démarre le démon multi-dépôts"""
+    args = parse_arguments()
+    config = load_config(args.config)
+    print(f"{Fore.GREEN}🚀 {len(config['repositories'])} dépôt(s), {config['workers']} worker(s) Git{Style.RESET_ALL}")
+
+    daemon = GitObserverDaemon(workers=config["workers"], metrics=config["metrics"])
+    for settings in config["repositories"]:
+        daemon.add_repository(settings)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    start_daemon()
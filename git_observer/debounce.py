@@ -0,0 +1,79 @@
+import threading
+import time
+from .metrics import SIZE_BUCKETS, get_metrics
+from .scheduler import get_scheduler
+
+
+class CommitBatch:
+    """Lot d'événements regroupés dans une même fenêtre."""
+
+    def __init__(self):
+        self.paths = {}  # chemin -> type du dernier événement
+        self.event_count = 0
+
+    def add(self, path, event_type):
+        self.paths[path] = event_type
+        self.event_count += 1
+
+
+class CommitCoalescer:
+    """Regroupe les rafales d'événements en un seul lot par fenêtre.
+
+    Le lot est transmis à `flush_callback` lorsque aucun événement n'est arrivé
+    pendant `quiet_period` secondes, ou au plus tard `max_wait` secondes après
+    le premier événement de la fenêtre. L'échéance est tenue par le
+    planificateur partagé et simplement déplacée à chaque événement ; le
+    callback s'exécute sur le thread du planificateur et doit rester court.
+    Les métriques portent le label `repo=metrics_label` quand il est fourni.
+    """
+
+    def __init__(self, flush_callback, quiet_period=2.0, max_wait=30.0, scheduler=None, metrics_label=None):
+        self.flush_callback = flush_callback
+        self.quiet_period = quiet_period
+        self.max_wait = max_wait
+        self.scheduler = scheduler or get_scheduler()
+        self._batch = None
+        self._batch_start = 0  # Début de la fenêtre (horloge monotone)
+        self._deadline = None  # Échéance de la fenêtre courante
+        self._lock = threading.Lock()
+        self.metrics = get_metrics()
+        self.metric_labels = {"repo": metrics_label} if metrics_label else {}
+
+    def add(self, path, event_type="modified"):
+        """Ajoute un événement à la fenêtre courante (appelé depuis le thread de l'observer)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._batch is None:
+                self._batch = CommitBatch()
+                self._batch_start = now
+            elif path in self._batch.paths:
+                self.metrics.inc("debounce_merged_total", **self.metric_labels)  # Chemin déjà dans le lot : un seul passage au commit
+            self._batch.add(path, event_type)
+            when = min(now + self.quiet_period, self._batch_start + self.max_wait)
+            if self._deadline is None:
+                self._deadline = self.scheduler.call_at(when, self._on_deadline)
+            else:
+                self.scheduler.move(self._deadline, when)
+
+    def _on_deadline(self):
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self.flush_callback(batch)
+
+    def _take_batch(self):
+        batch, self._batch = self._batch, None
+        if batch:
+            self.metrics.inc("debounce_batches_total", **self.metric_labels)
+            self.metrics.observe("debounce_batch_paths", len(batch.paths), SIZE_BUCKETS, **self.metric_labels)
+        if self._deadline is not None:
+            self._deadline.cancel()
+            self._deadline = None
+        return batch
+
+    def flush(self):
+        """Transmet immédiatement le lot en attente."""
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self.flush_callback(batch)
@@ -0,0 +1,94 @@
+"""Fenêtre modale de saisie du message de commit (chargée seulement par le backend `tk`)."""
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+
+class CommitDialog:
+    def __init__(self):
+        self.result = None
+        self.message = None
+        self.dialog = None
+
+    def on_cancel(self, event=None):
+        """Gestion de l'annulation"""
+        self.result = False
+        self.message = None
+        self.dialog.destroy()  # Utiliser destroy() au lieu de quit()
+
+    def on_ok(self, event=None):
+        """Gestion de la validation"""
+        if self.entry.get().strip():
+            self.message = self.entry.get().strip()
+            self.result = True
+            self.dialog.destroy()  # Utiliser destroy() au lieu de quit()
+        else:
+            messagebox.showwarning("Attention", "Veuillez entrer un message de commit")
+
+    def show(self):
+        """Affiche la fenêtre de dialogue"""
+        # Création d'une nouvelle fenêtre root
+        root = tk.Tk()
+        root.withdraw()  # Cache la fenêtre root
+        
+        self.dialog = tk.Toplevel(root)  # Utiliser Toplevel au lieu de Tk
+        self.dialog.title("Git Auto Commit")
+        
+        # Configuration de la fenêtre
+        self.dialog.protocol("WM_DELETE_WINDOW", self.on_cancel)
+        self.dialog.attributes('-topmost', True)
+        self.dialog.focus_force()
+        self.dialog.grab_set()  # Rend la fenêtre modale
+        
+        # Centrer la fenêtre
+        window_width = 400
+        window_height = 200
+        screen_width = self.dialog.winfo_screenwidth()
+        screen_height = self.dialog.winfo_screenheight()
+        center_x = int(screen_width/2 - window_width/2)
+        center_y = int(screen_height/2 - window_height/2)
+        self.dialog.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
+        
+        # Frame principal
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Message
+        ttk.Label(main_frame, 
+                 text="Des modifications sont en attente depuis 30 minutes!", 
+                 wraplength=350,
+                 justify="center").pack(pady=10)
+        
+        # Champ de saisie
+        ttk.Label(main_frame, text="Message de commit:").pack(pady=5)
+        self.entry = ttk.Entry(main_frame, width=40)
+        self.entry.pack(pady=5)
+        self.entry.focus()
+        
+        # Boutons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=20)
+        
+        tk.Button(button_frame,
+                 text="Commit",
+                 command=self.on_ok,
+                 bg='#4CAF50',
+                 fg='white',
+                 padx=20,
+                 pady=5).pack(side=tk.LEFT, padx=5)
+        
+        tk.Button(button_frame,
+                 text="Annuler",
+                 command=self.on_cancel,
+                 bg='#f44336',
+                 fg='white',
+                 padx=20,
+                 pady=5).pack(side=tk.LEFT, padx=5)
+        
+        # Raccourcis clavier
+        self.dialog.bind('<Return>', self.on_ok)
+        self.dialog.bind('<Escape>', self.on_cancel)
+        
+        self.dialog.wait_window()  # Attendre que la fenêtre soit fermée
+        root.destroy()  # Nettoyer la fenêtre root
+        
+        return self.result, self.message
@@ -0,0 +1,246 @@
+"""Journal persistant des fichiers modifiés, pour redémarrer sans parcours complet.
+
+Le journal (.git/gitobserver/dirty.journal) est un fichier en ajout seul :
+une ligne JSON par chemin modifié, avec le type d'événement, la taille, la
+date de modification et le hash du contenu (oid de blob Git). Il est compacté
+après chaque commit et chaque réconciliation, et dès qu'il grossit trop.
+
+Au démarrage, le journal est rejoué puis confirmé par un seul passage de
+`stat` : un chemin dont le contenu est redevenu celui de HEAD est écarté. Les
+modifications faites pendant l'arrêt sont retrouvées en comparant la date de
+modification des dossiers à l'instantané pris à l'arrêt (.git/gitobserver/dirs.json).
+"""
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+
+STATE_DIR = "gitobserver"
+JOURNAL_FILE = "dirty.journal"
+DIRS_FILE = "dirs.json"
+HASH_LIMIT = 1024 * 1024  # Au-delà, le contenu n'est pas hashé (le chemin reste considéré modifié)
+MTIME_SLACK_NS = 2 * 10**9  # Marge sur les dates de modification (résolution des systèmes de fichiers)
+
+
+def blob_oid(path, size, algorithm="sha1", chunk_size=1024 * 1024):
+    """Oid du blob Git correspondant au contenu de `path` (sans filtres .gitattributes), lu par blocs."""
+    digest = hashlib.new(algorithm, b"blob %d\0" % size)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DirtyJournal:
+    """Journal des chemins modifiés d'un dépôt, rejoué au démarrage."""
+
+    def __init__(self, repo_root, git_dir, max_records=20000):
+        self.repo_root = repo_root
+        self.state_dir = os.path.join(git_dir, STATE_DIR)
+        self.path = os.path.join(self.state_dir, JOURNAL_FILE)
+        self.dirs_path = os.path.join(self.state_dir, DIRS_FILE)
+        self.max_records = max_records
+        self.entries = {}  # chemin relatif -> enregistrement
+        self._records = 0  # Lignes dans le fichier
+        self._pending = {}  # chemin relatif -> type d'événement, en attente d'écriture
+        self._lock = threading.Lock()
+
+    def relative(self, path):
+        rel = os.path.relpath(path, self.repo_root)
+        return None if rel.startswith("..") or rel == "." else rel.replace(os.sep, "/")
+
+    def absolute(self, rel):
+        return os.path.join(self.repo_root, os.path.normpath(rel))
+
+    # Écriture
+
+    def record(self, path, event_type):
+        """Note un chemin modifié (thread de l'observer). Retourne True s'il faut planifier `flush`."""
+        rel = self.relative(path)
+        if rel is None:
+            return False
+        with self._lock:
+            first = not self._pending
+            self._pending[rel] = event_type
+            return first
+
+    def describe(self, rel, event_type):
+        """Enregistrement d'un chemin : type d'événement, taille, date de modification et hash du contenu."""
+        record = {"p": rel, "e": event_type}
+        try:
+            st = os.lstat(self.absolute(rel))
+        except OSError:
+            record["e"] = "deleted"
+            return record
+        record["s"] = st.st_size
+        record["m"] = st.st_mtime_ns
+        if stat.S_ISREG(st.st_mode) and st.st_size <= HASH_LIMIT:
+            try:
+                record["h"] = blob_oid(self.absolute(rel), st.st_size)
+            except OSError:
+                pass
+        return record
+
+    def flush(self, dirty_paths):
+        """Écrit les chemins en attente encore présents dans `dirty_paths` (chemins absolus)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        records = [self.describe(rel, event_type) for rel, event_type in pending.items()
+                   if self.absolute(rel) in dirty_paths]
+        if not records:
+            return
+        with self._lock:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    self.entries[record["p"]] = record
+            self._records += len(records)
+            if self._records > self.max_records and self._records > 2 * len(self.entries):
+                self._rewrite()
+
+    def compact(self, dirty_paths):
+        """Réécrit le journal avec les seuls chemins encore modifiés (après un commit ou une réconciliation)."""
+        live = {rel for rel in map(self.relative, dirty_paths) if rel}
+        with self._lock:
+            if set(self.entries) == live and self._records == len(self.entries):
+                return
+            known = {rel: self.entries[rel] for rel in live if rel in self.entries}
+        # Les chemins connus seulement de `git status` sont décrits maintenant
+        missing = [self.describe(rel, "modified") for rel in live - set(known)]
+        with self._lock:
+            self.entries = known
+            for record in missing:
+                self.entries[record["p"]] = record
+            self._rewrite()
+
+    def _rewrite(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            for record in self.entries.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(temporary, self.path)
+        self._records = len(self.entries)
+
+    # Rejeu
+
+    def load(self):
+        """Relit le journal (dernier enregistrement de chaque chemin). Retourne False s'il n'existe pas."""
+        entries, records = {}, 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Ligne tronquée par un arrêt brutal
+                    entries[record["p"]] = record
+                    records += 1
+        except OSError:
+            return False
+        with self._lock:
+            self.entries, self._records = entries, records
+        return True
+
+    def confirm(self, head_blob=None, candidates=()):
+        """Confirme les chemins rejoués (et les `candidates` du balayage) par un passage de `stat`.
+
+        `head_blob(rel)` retourne l'oid du blob de HEAD pour un chemin (ou
+        None) ; un fichier revenu au contenu de HEAD, ou supprimé sans être
+        suivi, est écarté. Retourne [(chemin absolu, type d'événement)].
+        """
+        records = dict(self.entries)
+        for path, event_type in candidates:
+            rel = self.relative(path)
+            if rel is not None and rel not in records:
+                records[rel] = {"p": rel, "e": event_type}
+        confirmed = []
+        for rel, record in records.items():
+            try:
+                st = os.lstat(self.absolute(rel))
+            except OSError:
+                st = None
+            if st is None:
+                if head_blob is not None and head_blob(rel) is None:
+                    continue  # Créé puis supprimé sans jamais avoir été suivi
+                confirmed.append((self.absolute(rel), "deleted"))
+                continue
+            oid = record.get("h") if (record.get("s"), record.get("m")) == (st.st_size, st.st_mtime_ns) else None
+            if oid is None and stat.S_ISREG(st.st_mode) and st.st_size <= HASH_LIMIT:
+                try:
+                    oid = blob_oid(self.absolute(rel), st.st_size)
+                except OSError:
+                    oid = None
+            if head_blob is not None and oid is not None and head_blob(rel) == oid:
+                continue  # Contenu identique à HEAD
+            confirmed.append((self.absolute(rel), "modified" if record["e"] == "deleted" else record["e"]))
+        return confirmed
+
+    # Instantané des dossiers
+
+    def save_dirs(self, matcher):
+        """Enregistre la date de modification de chaque dossier non ignoré (`matcher` : `IgnoreMatcher`)."""
+        saved_at = time.time_ns()
+        dirs = {}
+        stack = [self.repo_root]
+        while stack:
+            directory = stack.pop()
+            try:
+                dirs[self.relative(directory) or "."] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and not matcher.is_ignored(entry.path, True):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        os.makedirs(self.state_dir, exist_ok=True)
+        temporary = self.dirs_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": saved_at, "dirs": dirs}, f)
+        os.replace(temporary, self.dirs_path)
+        return len(dirs)
+
+    def sweep(self, matcher):
+        """Retrouve les fichiers créés ou modifiés pendant l'arrêt à partir de l'instantané des dossiers.
+
+        Seuls les dossiers dont la date a changé sont listés. Un fichier
+        modifié sur place ne change pas la date de son dossier : la
+        réconciliation en arrière-plan qui suit le démarrage les rattrape.
+        Retourne None sans instantané, sinon [(chemin absolu, type d'événement)].
+        """
+        try:
+            with open(self.dirs_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        since = snapshot["saved_at"] - MTIME_SLACK_NS
+        dirs = snapshot["dirs"]
+        changes = []
+        stack = []
+        for rel, mtime in dirs.items():
+            directory = self.absolute(rel) if rel != "." else self.repo_root
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    stack.append((directory, False))
+            except OSError:
+                continue  # Dossier supprimé : ses fichiers le sont aussi, `git status` les retrouvera
+        while stack:
+            directory, new = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.relative(entry.path) not in dirs and not matcher.is_ignored(entry.path, True):
+                                stack.append((entry.path, True))  # Nouveau dossier : tout son contenu est nouveau
+                        elif ((new or entry.stat(follow_symlinks=False).st_mtime_ns >= since)
+                              and not matcher.is_ignored(entry.path, False)):
+                            changes.append((entry.path, "created"))
+            except OSError:
+                continue
+        return changes
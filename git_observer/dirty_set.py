@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class DirtySet:
+    """Ensemble des chemins modifiés, alimenté par les événements watchdog.
+
+    Chaque chemin est associé au type du dernier événement reçu et à un numéro
+    de version, ce qui permet de réconcilier l'ensemble avec `git status` sans
+    perdre les événements arrivés pendant la commande.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._paths = {}
+        self._overflow = False
+        self._lock = threading.Lock()
+        self.version = 0
+        self.last_change_time = 0
+
+    def add(self, path, event_type="modified"):
+        """Ajoute un chemin modifié."""
+        with self._lock:
+            self.version += 1
+            if not self._overflow:
+                self._paths[path] = (event_type, self.version)
+                if len(self._paths) > self.max_size:
+                    # Trop de chemins : on abandonne le détail, une réconciliation complète suivra
+                    self._paths.clear()
+                    self._overflow = True
+            self.last_change_time = time.time()
+
+    def mark_overflow(self):
+        """Signale que des événements ont pu être perdus : seule une réconciliation complète rétablit l'ensemble."""
+        with self._lock:
+            self.version += 1
+            self._paths.clear()
+            self._overflow = True
+            self.last_change_time = time.time()
+
+    @property
+    def overflowed(self):
+        return self._overflow
+
+    def snapshot(self):
+        """Retourne une copie {chemin: type d'événement}."""
+        with self._lock:
+            return {path: event_type for path, (event_type, _) in self._paths.items()}
+
+    def reconcile(self, paths, since_version):
+        """Remplace le contenu par le résultat de `git status`.
+
+        Les chemins ajoutés après `since_version` (pendant l'exécution de la
+        commande) sont conservés. En débordement, ces chemins n'ont pas été
+        gardés : si des événements sont arrivés pendant la commande, le
+        débordement reste signalé et une nouvelle réconciliation est
+        nécessaire. Retourne False dans ce cas.
+        """
+        with self._lock:
+            kept = {path: entry for path, entry in self._paths.items() if entry[1] > since_version}
+            for path in paths:
+                kept.setdefault(path, ("modified", since_version))
+            changed = set(kept) != set(self._paths)
+            self._paths = kept
+            self._overflow = self._overflow and self.version > since_version
+            if changed:
+                self.version += 1
+            return not self._overflow
+
+    def discard(self, paths, until_version=None):
+        """Retire des chemins (après un commit), sauf s'ils ont changé depuis `until_version`."""
+        with self._lock:
+            for path in paths:
+                entry = self._paths.get(path)
+                if entry and (until_version is None or entry[1] <= until_version):
+                    del self._paths[path]
+
+    def clear(self, until_version=None):
+        """Vide l'ensemble, en gardant les chemins modifiés après `until_version`."""
+        with self._lock:
+            if until_version is None:
+                self._paths.clear()
+            else:
+                self._paths = {path: entry for path, entry in self._paths.items() if entry[1] > until_version}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._paths)
+
+    def __bool__(self):
+        with self._lock:
+            return bool(self._paths) or self._overflow
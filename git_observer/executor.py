@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+from concurrent.futures import Future
+from colorama import Fore, Style
+
+
+class CommitQueueFull(Exception):
+    """La file des opérations Git d'un dépôt est pleine."""
+
+
+def log_failure(description):
+    """Callback de `Future` pour une opération dont personne n'attend le résultat : signale son échec."""
+    def callback(future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None and not isinstance(error, CommitQueueFull):  # File pleine : déjà signalée par submit
+            print(f"{Fore.RED}❌ {description} : {error}{Style.RESET_ALL}")
+    return callback
+
+
+class CommitExecutor:
+    """Exécute les opérations Git sur un pool borné de threads dédiés.
+
+    Chaque opération est associée à une clé (le dépôt) : les opérations d'une
+    même clé sont exécutées une par une, dans l'ordre, ce qui sérialise les
+    commandes Git d'un dépôt, tandis que des dépôts différents avancent en
+    parallèle sur les `max_workers` threads. Les appelants (thread de
+    l'observer, boucle principale, notifications) ne font qu'enfiler et
+    reçoivent un `Future`.
+    """
+
+    def __init__(self, max_workers=1, max_queue=16, name="git-worker"):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue  # Opérations en attente par clé
+        self._pending = {}  # clé -> deque de tâches
+        self._ready = deque()  # clés ayant des tâches et aucune en cours
+        self._running = set()
+        self._workers = []
+        self._shutdown = False
+        self._condition = threading.Condition()
+
+    def submit(self, fn, *args, key=None, **kwargs):
+        """Ajoute une opération à la file de `key` et retourne son `Future`."""
+        future = Future()
+        with self._condition:
+            tasks = self._pending.setdefault(key, deque())
+            if len(tasks) >= self.max_queue:
+                print(f"{Fore.RED}❌ File Git pleine ({self.max_queue} opérations en attente), demande ignorée.{Style.RESET_ALL}")
+                future.set_exception(CommitQueueFull(f"{self.max_queue} opérations déjà en attente"))
+                return future
+            tasks.append((future, fn, args, kwargs))
+            if key not in self._running and len(tasks) == 1:
+                self._ready.append(key)
+            if len(self._workers) < self.max_workers and len(self._ready) > self._idle_workers():
+                self._start_worker()
+            self._condition.notify()
+        return future
+
+    def qsize(self, key=None):
+        """Nombre d'opérations en attente pour `key`."""
+        with self._condition:
+            return len(self._pending.get(key, ()))
+
+    def _idle_workers(self):
+        return len(self._workers) - len(self._running)
+
+    def _start_worker(self):
+        thread = threading.Thread(target=self._run, name=f"{self.name}-{len(self._workers)}", daemon=True)
+        self._workers.append(thread)
+        thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._ready and not self._shutdown:
+                    self._condition.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                future, fn, args, kwargs = self._pending[key].popleft()
+                self._running.add(key)
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._condition:
+                self._running.discard(key)
+                if self._pending[key]:
+                    self._ready.append(key)
+                    self._condition.notify()
+                else:
+                    del self._pending[key]
+
+    def shutdown(self, wait=True):
+        """Arrête les workers après les opérations déjà en file."""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for thread in workers:
+                thread.join()
@@ -0,0 +1,331 @@
+"""Hook `core.fsmonitor` (protocole v2) servi par le watcher.
+
+Le watcher tient un journal des chemins modifiés et répond aux requêtes du
+hook sur une socket locale. Git n'a alors plus besoin de parcourir tout
+l'arbre pour `git status` / `git add`.
+
+    python -m git_observer.fsmonitor enable    # active le hook sur le dépôt courant
+    python -m git_observer.fsmonitor disable   # le désactive
+"""
+import itertools
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+STATE_DIR = "gitobserver"
+PORT_FILE = "fsmonitor.port"
+COOKIE_PREFIX = ".gitobserver-cookie-"
+TOKEN_PREFIX = "gitobserver"
+# Noté par `enable` quand il active lui-même core.untrackedCache, pour que `disable` le retire
+UNTRACKED_CACHE_MARK = "gitobserver.untrackedCacheSet"
+
+
+class ChangeJournal:
+    """Journal borné des chemins modifiés, numérotés par une séquence croissante."""
+
+    def __init__(self, max_entries=200000):
+        self.instance = f"{os.getpid()}-{time.time_ns()}"
+        self._entries = deque(maxlen=max_entries)  # (séquence, chemin relatif)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Des événements ont été perdus : les jetons déjà donnés demanderont un parcours complet."""
+        with self._lock:
+            self.instance = f"{os.getpid()}-{time.time_ns()}"
+            self._entries.clear()
+
+    def token(self):
+        return f"{TOKEN_PREFIX}:{self.instance}:{self._seq}"
+
+    def record(self, rel_path):
+        """Ajoute un chemin relatif (format Git, suffixe '/' pour un dossier)."""
+        with self._lock:
+            self._seq += 1
+            self._entries.append((self._seq, rel_path))
+
+    def changes_since(self, token):
+        """Retourne (nouveau jeton, chemins) ou (nouveau jeton, None) si tout doit être rescanné."""
+        with self._lock:
+            current = self.token()
+            prefix, _, rest = token.partition(":")
+            instance, _, seq = rest.rpartition(":")
+            if prefix != TOKEN_PREFIX or instance != self.instance or not seq.isdigit():
+                return current, None
+            seq = int(seq)
+            # Le journal a été tronqué depuis ce jeton
+            if self._entries and self._entries[0][0] > seq + 1:
+                return current, None
+            paths = {path for entry_seq, path in self._entries if entry_seq > seq}
+            return current, paths
+
+
+def repo_key(git_dir):
+    """Clé d'identification d'un dépôt partagée par le hook et le watcher."""
+    return os.path.normcase(os.path.realpath(git_dir))
+
+
+class FsmonitorListener:
+    """Socket locale qui reçoit les requêtes du hook, partagée entre les dépôts surveillés."""
+
+    def __init__(self):
+        self._servers = {}  # clé du dépôt -> FsmonitorServer
+        self._socket = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.port = None
+
+    def register(self, server):
+        """Ajoute un dépôt ; ouvre la socket au premier enregistrement."""
+        with self._lock:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self._socket.bind(("127.0.0.1", 0))
+                self._socket.listen(16)
+                self.port = self._socket.getsockname()[1]
+                self._thread = threading.Thread(target=self._serve, name="fsmonitor", daemon=True)
+                self._thread.start()
+            self._servers[repo_key(server.git_dir)] = server
+        return self.port
+
+    def unregister(self, server):
+        with self._lock:
+            self._servers.pop(repo_key(server.git_dir), None)
+
+    def close(self):
+        with self._lock:
+            if self._socket:
+                self._socket.close()
+                self._socket = None
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except (OSError, AttributeError):
+                return
+            with connection:
+                try:
+                    self._answer(connection)
+                except OSError:
+                    pass
+
+    def _answer(self, connection):
+        # Requête : "<jeton>\n<dossier .git>\n"
+        request = b""
+        while request.count(b"\n") < 2:
+            chunk = connection.recv(4096)
+            if not chunk:
+                break
+            request += chunk
+        token, _, git_dir = request.decode("utf-8", errors="replace").partition("\n")
+        server = self._servers.get(repo_key(git_dir.strip()))
+        if server is not None:
+            connection.sendall(server.answer(token.strip()).encode("utf-8"))
+
+
+class FsmonitorServer:
+    """Répond aux requêtes du hook fsmonitor à partir du journal du watcher."""
+
+    def __init__(self, repo_root, git_dir, journal=None, sync_timeout=1.0, check_watches=None):
+        self.repo_root = os.path.normpath(repo_root)
+        self.git_dir = os.path.normpath(git_dir)
+        self.journal = journal or ChangeJournal()
+        self.sync_timeout = sync_timeout
+        # Appelé avant chaque réponse : False si des chemins suivis n'étaient pas surveillés jusque-là
+        self.check_watches = check_watches
+        self.state_dir = os.path.join(self.git_dir, STATE_DIR)
+        # Les cookies vont dans .git/gitobserver/, sauf si le dossier Git est hors de l'arbre surveillé
+        inside = self.state_dir.startswith(self.repo_root + os.sep)
+        self.cookie_dir = self.state_dir if inside else self.repo_root
+        self._cookie_counter = itertools.count()
+        self._cookies = {}  # nom -> threading.Event
+        self._listener = None
+        self._owns_listener = False
+
+    def start(self, listener=None):
+        """S'enregistre sur la socket locale (partagée ou propre) et publie son port dans .git/gitobserver/."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._owns_listener = listener is None
+        self._listener = listener or FsmonitorListener()
+        port = self._listener.register(self)
+        with open(os.path.join(self.state_dir, PORT_FILE), "w") as f:
+            f.write(str(port))
+
+    def stop(self):
+        try:
+            os.remove(os.path.join(self.state_dir, PORT_FILE))
+        except OSError:
+            pass
+        if self._listener:
+            self._listener.unregister(self)
+            if self._owns_listener:
+                self._listener.close()
+
+    def on_event(self, event):
+        """Enregistre un événement watchdog dans le journal.
+
+        Retourne True pour les événements des cookies de synchronisation, que
+        les autres handlers doivent ignorer.
+        """
+        name = os.path.basename(event.src_path)
+        if name.startswith(COOKIE_PREFIX):
+            cookie = self._cookies.get(name)
+            if cookie and event.event_type == "created":
+                cookie.set()
+            return True
+        if event.event_type == "overflow":
+            self.journal.reset()
+            return False
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return False
+        if event.is_directory and event.event_type == "modified":
+            return False  # Les entrées ajoutées/retirées ont leurs propres événements
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if not path:
+                continue
+            rel = os.path.relpath(path, self.repo_root)
+            if rel.startswith("..") or rel == "." or rel.split(os.sep)[0] == ".git":
+                continue
+            rel = rel.replace(os.sep, "/")
+            self.journal.record(rel + "/" if event.is_directory else rel)
+        return False
+
+    def sync(self):
+        """Attend que les événements antérieurs à la requête soient passés par le journal.
+
+        Le dépôt a une seule watch, donc un seul flux d'événements : quand
+        l'événement du cookie est reçu, tout ce qui le précède a été journalisé.
+        """
+        name = f"{COOKIE_PREFIX}{os.getpid()}-{next(self._cookie_counter)}"
+        path = os.path.join(self.cookie_dir, name)
+        cookie = self._cookies[name] = threading.Event()
+        try:
+            with open(path, "w"):
+                pass
+            return cookie.wait(self.sync_timeout)
+        except OSError:
+            return False
+        finally:
+            self._cookies.pop(name, None)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def answer(self, token):
+        """Construit la réponse du hook pour `token` : nouveau jeton puis chemins, séparés par NUL.
+
+        Si des fichiers suivis viennent d'apparaître sous des dossiers qui
+        n'étaient pas surveillés, la réponse demande un parcours complet.
+        """
+        if (self.check_watches is None or self.check_watches()) and self.sync():
+            new_token, paths = self.journal.changes_since(token)
+        else:
+            new_token, paths = self.journal.token(), None
+        if paths is None:
+            return new_token + "\0/\0"
+        return new_token + "\0" + "".join(path + "\0" for path in sorted(paths))
+
+
+class FsmonitorEventHandler:
+    """Transmet les événements watchdog au serveur fsmonitor.
+
+    N'hérite pas de `FileSystemEventHandler` : le hook importe ce module et
+    doit démarrer sans charger watchdog.
+    """
+
+    def __init__(self, server):
+        self.server = server
+
+    def dispatch(self, event):
+        self.server.on_event(event)
+
+
+def find_git_dir():
+    """Trouve le dossier .git depuis le hook (lancé à la racine de l'arbre de travail)."""
+    git_dir = os.environ.get("GIT_DIR") or ".git"
+    if os.path.isfile(git_dir):
+        with open(git_dir) as f:
+            content = f.read().strip()
+        if content.startswith("gitdir:"):
+            git_dir = content[len("gitdir:"):].strip()
+    return git_dir
+
+
+def query(version, token, timeout=5.0):
+    """Interroge le watcher et écrit la réponse du hook. Retourne le code de sortie."""
+    if version != "2":
+        return 1
+    try:
+        git_dir = os.path.abspath(find_git_dir())
+        with open(os.path.join(git_dir, STATE_DIR, PORT_FILE)) as f:
+            port = int(f.read().strip())
+        with socket.create_connection(("127.0.0.1", port), timeout=timeout) as connection:
+            connection.sendall(f"{token}\n{git_dir}\n".encode("utf-8"))
+            chunks = []
+            while True:
+                chunk = connection.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except (OSError, ValueError):
+        return 1  # Watcher absent : Git fait un parcours complet
+    response = b"".join(chunks)
+    if b"\0" not in response:
+        return 1
+    sys.stdout.buffer.write(response)
+    sys.stdout.flush()
+    return 0
+
+
+def enable(repo="."):
+    """Configure le dépôt pour utiliser le hook servi par le watcher.
+
+    Le hook lance ce fichier par son chemin absolu (`-I` : sans le dossier
+    du script dans `sys.path`) : il ne dépend que de la bibliothèque
+    standard et fonctionne aussi depuis une copie des sources non installée.
+    """
+    hook = f"{shlex.quote(sys.executable)} -I {shlex.quote(os.path.abspath(__file__))}"
+    subprocess.run(["git", "-C", repo, "config", "core.fsmonitor", hook], check=True)
+    subprocess.run(["git", "-C", repo, "config", "core.fsmonitorHookVersion", "2"], check=True)
+    # Un réglage déjà présent dans le dépôt est laissé tel quel
+    configured = subprocess.run(["git", "-C", repo, "config", "--local", "--get", "core.untrackedCache"],
+                                capture_output=True).returncode == 0
+    if not configured:
+        subprocess.run(["git", "-C", repo, "config", "core.untrackedCache", "true"], check=True)
+        subprocess.run(["git", "-C", repo, "config", UNTRACKED_CACHE_MARK, "true"], check=True)
+
+
+def disable(repo="."):
+    """Retire la configuration du hook, et core.untrackedCache si `enable` l'avait ajouté."""
+    keys = ["core.fsmonitor", "core.fsmonitorHookVersion"]
+    marked = subprocess.run(["git", "-C", repo, "config", "--local", "--get", UNTRACKED_CACHE_MARK],
+                            capture_output=True).returncode == 0
+    if marked:
+        keys += ["core.untrackedCache", UNTRACKED_CACHE_MARK]
+    for key in keys:
+        subprocess.run(["git", "-C", repo, "config", "--unset", key])
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if args and args[0] in ("enable", "disable"):
+        repo = args[1] if len(args) > 1 else "."
+        (enable if args[0] == "enable" else disable)(repo)
+        print(f"fsmonitor {'activé' if args[0] == 'enable' else 'désactivé'} pour {os.path.abspath(repo)}")
+        return 0
+    if len(args) == 2:
+        # Appel par Git : <version> <jeton>
+        return query(args[0], args[1])
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,188 +1,565 @@
+import asyncio
+import os
 import subprocess
 import time
 from colorama import Fore, Style
 import threading
 from datetime import datetime
-from win10toast import ToastNotifier # type: ignore
-import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
-
-class CommitDialog:
-    def __init__(self):
-        self.result = None
-        self.message = None
-        self.dialog = None
-
-    def on_cancel(self, event=None):
-        """Gestion de l'annulation"""
-        self.result = False
-        self.message = None
-        self.dialog.destroy()  # Utiliser destroy() au lieu de quit()
-
-    def on_ok(self, event=None):
-        """Gestion de la validation"""
-        if self.entry.get().strip():
-            self.message = self.entry.get().strip()
-            self.result = True
-            self.dialog.destroy()  # Utiliser destroy() au lieu de quit()
-        else:
-            messagebox.showwarning("Attention", "Veuillez entrer un message de commit")
-
-    def show(self):
-        """Affiche la fenêtre de dialogue"""
-        # Création d'une nouvelle fenêtre root
-        root = tk.Tk()
-        root.withdraw()  # Cache la fenêtre root
-        
-        self.dialog = tk.Toplevel(root)  # Utiliser Toplevel au lieu de Tk
-        self.dialog.title("Git Auto Commit")
-        
-        # Configuration de la fenêtre
-        self.dialog.protocol("WM_DELETE_WINDOW", self.on_cancel)
-        self.dialog.attributes('-topmost', True)
-        self.dialog.focus_force()
-        self.dialog.grab_set()  # Rend la fenêtre modale
-        
-        # Centrer la fenêtre
-        window_width = 400
-        window_height = 200
-        screen_width = self.dialog.winfo_screenwidth()
-        screen_height = self.dialog.winfo_screenheight()
-        center_x = int(screen_width/2 - window_width/2)
-        center_y = int(screen_height/2 - window_height/2)
-        self.dialog.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
-        
-        # Frame principal
-        main_frame = ttk.Frame(self.dialog, padding="20")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Message
-        ttk.Label(main_frame, 
-                 text="Des modifications sont en attente depuis 30 minutes!", 
-                 wraplength=350,
-                 justify="center").pack(pady=10)
-        
-        # Champ de saisie
-        ttk.Label(main_frame, text="Message de commit:").pack(pady=5)
-        self.entry = ttk.Entry(main_frame, width=40)
-        self.entry.pack(pady=5)
-        self.entry.focus()
-        
-        # Boutons
-        button_frame = ttk.Frame(main_frame)
-        button_frame.pack(pady=20)
-        
-        tk.Button(button_frame,
-                 text="Commit",
-                 command=self.on_ok,
-                 bg='#4CAF50',
-                 fg='white',
-                 padx=20,
-                 pady=5).pack(side=tk.LEFT, padx=5)
-        
-        tk.Button(button_frame,
-                 text="Annuler",
-                 command=self.on_cancel,
-                 bg='#f44336',
-                 fg='white',
-                 padx=20,
-                 pady=5).pack(side=tk.LEFT, padx=5)
-        
-        # Raccourcis clavier
-        self.dialog.bind('<Return>', self.on_ok)
-        self.dialog.bind('<Escape>', self.on_cancel)
-        
-        self.dialog.wait_window()  # Attendre que la fenêtre soit fermée
-        root.destroy()  # Nettoyer la fenêtre root
-        
-        return self.result, self.message
+from .change_index import ChangeIndex
+from .commit_guard import CommitGuard
+from .commit_summary import DEFAULT_MESSAGE, summarize_diff
+from .dirty_journal import DirtyJournal
+from .dirty_set import DirtySet
+from .executor import CommitExecutor, log_failure
+from .marker_scanner import MarkerScanner
+from .metrics import get_metrics
+from .notification import Notifier, get_reminder_thread
+from .push import PushScheduler
+from .plumbing import BASE_TRAILER, PlumbingError, PlumbingSession, PlumbingUnsupported, checkpoint_base
+from .scheduler import get_scheduler
+
+CHECKPOINT_NAMESPACE = "refs/gitobserver/"  # Refs privées des checkpoints, jamais poussées
+
+# Modes d'indexation
+STAGE_PATHS = "paths"  # Seulement les chemins remontés par le watcher
+STAGE_ALL = "all"  # `git add .` sur tout l'arbre (mode de repli)
 
 class GitHandler:
     """Gère les interactions avec Git"""
     
-    def __init__(self):
+    def __init__(self, repo_path=None, executor=None, scheduler=None, notifier=None, hash_pool=None, guard_pool=None):
+        self.repo_path = repo_path  # None : dossier courant
         self.last_modification_time = None
-        self.notification_thread = None
+        self.scheduler = scheduler or get_scheduler()  # Échéances (rappel, regroupement...) partagées
+        self.reminders_enabled = False
+        self._reminder = None  # Échéance du rappel de commit
+        self._state_lock = threading.Lock()  # Protège last_modification_time et le rappel
         self.NOTIFICATION_DELAY = 900  # 15 minutes
         #self.NOTIFICATION_DELAY = 20  # Changez à 60 secondes pour tester
-        self.toaster = ToastNotifier()
-        self.use_gui = True  # Option pour choisir l'interface
+        self.RECONCILE_INTERVAL = 300  # Réconciliation complète avec `git status` toutes les 5 minutes
+        self.notifier = notifier or Notifier()  # Backends (toast, tk, console, headless) chargés au premier rappel
+        self.staging_mode = STAGE_PATHS
+        self.use_plumbing = True  # Commits par la session de plomberie persistante, porcelaine en repli
+        self._plumbing = None
+        self.checkpoints = False  # Rafales sans message : checkpoint sous refs/gitobserver/<branche>
+        self.SQUASH_INTERVAL = 0  # Secondes avant de regrouper les checkpoints en un commit poussé (0 : sur message uniquement)
+        self.checkpoint_count = 0
+        self._squash_deadline = None
+        self.PUSH_INTERVAL = 30  # Secondes pendant lesquelles les commits s'accumulent avant un push groupé
+        self._push_scheduler = None
+        self.journal = None  # Journal des chemins modifiés sous .git/, rejoué au redémarrage (voir `enable_journal`)
+        self.JOURNAL_DELAY = 1  # Secondes de regroupement des écritures du journal
+        self._journal_deadline = None
+        self.dirty_set = DirtySet()  # Chemins modifiés, alimentés par le watcher
+        self.guard = None  # Contrôle taille / binaires / secrets avant commit (voir `enable_guard`)
+        self.change_index = ChangeIndex(pool=hash_pool)  # (taille, mtime, inode) et hash du contenu : filtre les sauvegardes sans changement
+        self.guard_pool = guard_pool  # Pool de processus du contrôle avant commit, partagé par le démon
+        self.executor = executor or CommitExecutor()  # Worker qui sérialise les opérations Git du dépôt
+        self.marker_scanner = MarkerScanner()
+        self._repo_root = None
+        self._git_dir = None
+        self.metrics = get_metrics()  # Compteurs et durées partagés par tous les dépôts du processus
+        self.metrics_label = os.path.abspath(repo_path or ".")
+        self.metrics.gauge("queue_depth", lambda: self.executor.qsize(self.repo_path), repo=self.metrics_label)
+        self.metrics.gauge("dirty_paths", lambda: len(self.dirty_set), repo=self.metrics_label)
+        self._commit_method = None  # "plumbing" ou "porcelain" : moteur du dernier commit
+        self.MESSAGE_BUDGET = 1.0  # Secondes allouées à la génération d'un message depuis le diff
+        self.last_commit_message = None
 
-    @staticmethod
-    def extract_commit_message(file_path):
-        """Cherche une ligne contenant commit_name="message" et retourne le message."""
+    def extract_commit_message(self, file_path):
+        """Cherche une ligne contenant commit_name="message" et retourne le message.
+
+        Les fichiers inchangés depuis le dernier passage ne sont pas relus ;
+        les binaires et les trop gros sont ignorés (voir `MarkerScanner`).
+        """
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    if "commit_name=" in line:
-                        parts = line.split("commit_name=", 1)
-                        if len(parts) > 1:
-                            message = parts[1].strip().replace('"', '')
-                            return message if message else None
+            with self.metrics.timed("marker_scan_seconds", repo=self.metrics_label):
+                return self.marker_scanner.scan(file_path)
         except Exception as e:
             
             print(f"{Fore.RED}❌ Erreur lors de la lecture du fichier : {e}{Style.RESET_ALL}")
         return None
 
-    def check_notification_time(self):
-        """Vérifie si 30 minutes se sont écoulées depuis la dernière modification"""
-        while True:
-            if self.last_modification_time:
-                elapsed_time = time.time() - self.last_modification_time
-                if elapsed_time >= self.NOTIFICATION_DELAY:
-                    self.notify_user()
-                    self.last_modification_time = None  # Réinitialise le timer
-            time.sleep(60)  # Vérifie toutes les minutes
+    def check_notification_due(self):
+        """Notifie l'utilisateur si le délai depuis la dernière modification est dépassé."""
+        with self._state_lock:
+            if not self.last_modification_time or time.time() - self.last_modification_time < self.NOTIFICATION_DELAY:
+                return
+            self.last_modification_time = None  # Réinitialise le timer
+        self.notify_user()
+
+    def _on_reminder_due(self):
+        """Échéance du rappel : la notification (bloquante) va au thread des rappels, seul le commit au worker Git."""
+        get_reminder_thread().submit(self.check_notification_due)
 
     def notify_user(self):
-        """Notifie l'utilisateur avec une fenêtre modale et/ou le terminal"""
-        # Notification système Windows
-        self.toaster.show_toast(
-            "Git Auto Commit",
-            "Des modifications sont en attente depuis 30 minutes !",
-            duration=10,
-            threaded=True
-        )
-
-        if self.use_gui:
-            # Interface graphique
-            dialog = CommitDialog()
-            result, message = dialog.show()
-        else:
-            # Interface console
-            print(f"{Fore.YELLOW}⚠️ Des modifications sont en attente depuis 30 minutes !{Style.RESET_ALL}")
-            message = input(f"{Fore.GREEN}✏️ Entrez votre message de commit (ou 'skip' pour ignorer) : {Style.RESET_ALL}")
-            result = message != 'skip'
+        """Notifie l'utilisateur via les backends configurés et lui demande un message de commit"""
+        result, message = self.notifier.remind()
 
         if result and message:
-            self.git_commit_push(message)
+            self.submit_commit(message).add_done_callback(log_failure("Erreur lors du commit"))
         else:
             print(f"{Fore.YELLOW}Commit annulé - Les modifications restent en attente.{Style.RESET_ALL}")
-            self.last_modification_time = time.time()
+            self.update_modification_time()
 
-    def start_notification_thread(self):
-        """Démarre le thread de notification"""
-        self.notification_thread = threading.Thread(target=self.check_notification_time, daemon=True)
-        self.notification_thread.start()
+    def enable_reminders(self):
+        """Active le rappel de commit, planifié NOTIFICATION_DELAY secondes après la dernière modification"""
+        self.reminders_enabled = True
 
     def update_modification_time(self):
-        """Met à jour le temps de la dernière modification"""
-        self.last_modification_time = time.time()
+        """Met à jour le temps de la dernière modification et reporte le rappel"""
+        with self._state_lock:
+            self.last_modification_time = time.time()
+            if not self.reminders_enabled:
+                return
+            if self._reminder is None:
+                self._reminder = self.scheduler.call_later(self.NOTIFICATION_DELAY, self._on_reminder_due)
+            else:
+                self._reminder.move(self.NOTIFICATION_DELAY)
+
+    def reset_modification_time(self):
+        """Oublie la dernière modification et annule le rappel (après un commit)"""
+        with self._state_lock:
+            self.last_modification_time = None
+            if self._reminder is not None:
+                self._reminder.cancel()
+
+    def get_repo_root(self):
+        """Retourne (et met en cache) la racine du dépôt courant."""
+        if self._repo_root is None:
+            output = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=self.repo_path, capture_output=True, text=True).stdout.strip()
+            self._repo_root = os.path.normpath(output) if output else os.path.abspath(self.repo_path or os.getcwd())
+        return self._repo_root
+
+    def get_git_dir(self):
+        """Retourne (et met en cache) le dossier .git du dépôt courant."""
+        if self._git_dir is None:
+            output = subprocess.run(["git", "rev-parse", "--absolute-git-dir"], cwd=self.repo_path, capture_output=True, text=True).stdout.strip()
+            self._git_dir = os.path.normpath(output) if output else os.path.join(self.get_repo_root(), ".git")
+        return self._git_dir
+
+    @staticmethod
+    def parse_porcelain(output):
+        """Extrait les chemins d'une sortie `git status --porcelain -z` (source et destination des renommages)."""
+        paths = []
+        entries = iter(output.split("\0"))
+        for entry in entries:
+            if len(entry) < 4:
+                continue
+            paths.append(entry[3:])
+            if entry[0] in "RC":
+                paths.append(next(entries, ""))
+        return [path for path in paths if path]
+
+    def reconcile_status(self):
+        """Réconcilie l'ensemble des chemins modifiés avec `git status`.
+
+        Retourne True s'il reste des changements dans le dépôt.
+        """
+        since_version = self.dirty_set.version
+        with self.metrics.timed("git_command_seconds", command="status"):
+            status_output = subprocess.run(["git", "status", "--porcelain", "-z"], cwd=self.repo_path, capture_output=True, text=True).stdout
+        return self._apply_status(status_output, since_version)
+
+    async def reconcile_status_async(self):
+        """Variante asyncio de `reconcile_status` pour la boucle du watcher.
+
+        `--no-optional-locks` : le statut peut tourner pendant un commit du
+        worker Git sans prendre le verrou de l'index.
+        """
+        since_version = self.dirty_set.version
+        process = await asyncio.create_subprocess_exec("git", "--no-optional-locks", "status", "--porcelain", "-z",
+                                                       cwd=self.repo_path, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.DEVNULL)
+        status_output, _ = await process.communicate()
+        return self._apply_status(status_output.decode(errors="replace"), since_version)
+
+    def _apply_status(self, status_output, since_version):
+        root = self.get_repo_root()
+        paths = [os.path.join(root, os.path.normpath(path)) for path in self.parse_porcelain(status_output)]
+        self.dirty_set.reconcile(paths, since_version)
+        if self.journal is not None:
+            future = self.executor.submit(self.sync_journal, key=self.repo_path)
+            future.add_done_callback(log_failure("Erreur lors de la mise à jour du journal"))
+        return bool(paths)
 
-    def git_commit_push(self, commit_message):
-        """Ajoute, commit et pousse les modifications sur Git."""
+    def enable_journal(self):
+        """Active le journal persistant des chemins modifiés (.git/gitobserver/dirty.journal)."""
+        self.journal = DirtyJournal(self.get_repo_root(), self.get_git_dir())
+        return self.journal
+
+    def enable_guard(self, **settings):
+        """Active le contrôle des fichiers candidats avant commit (réglages de `CommitGuard`)."""
+        settings.setdefault("pool", self.guard_pool)
+        self.guard = CommitGuard(self.get_repo_root(), self.get_git_dir(), **settings)
+        return self.guard
+
+    def guard_paths(self, paths):
+        """Retire de `paths` les fichiers retenus par le contrôle avant commit."""
+        if self.guard is None or not paths:
+            return paths
+        with self.metrics.timed("guard_seconds", repo=self.metrics_label):
+            allowed, offenders = self.guard.filter(paths)
+        for reason, _ in offenders.values():
+            self.metrics.inc("guard_held_total", repo=self.metrics_label, reason=reason)
+        return allowed
+
+    def _guard_staged(self, env=None):
+        """Désindexe les fichiers retenus après un `git add .` (chemins inconnus du watcher)."""
+        if self.guard is None:
+            return
+        output = subprocess.run(["git", "diff", "--cached", "--name-only", "-z", "--no-renames", "--diff-filter=AMT"],
+                                cwd=self.repo_path, capture_output=True, env=env).stdout
+        root = self.get_repo_root()
+        staged = [os.path.join(root, name) for name in output.decode(errors="surrogateescape").split("\0") if name]
+        held = set(staged).difference(self.guard_paths(staged))
+        if held:
+            subprocess.run(["git", "reset", "-q", "--pathspec-from-file=-", "--pathspec-file-nul"], cwd=self.repo_path,
+                           input="\0".join(sorted(held)), text=True, env=env, capture_output=True)
+
+    def journal_change(self, path, event_type):
+        """Note un chemin modifié dans le journal ; l'écriture est groupée JOURNAL_DELAY secondes plus tard."""
+        if self.journal is None or not self.journal.record(path, event_type):
+            return
+        with self._state_lock:
+            if self._journal_deadline is None:
+                self._journal_deadline = self.scheduler.call_later(self.JOURNAL_DELAY, self._on_journal_due)
+            else:
+                self._journal_deadline.move(self.JOURNAL_DELAY)
+
+    def _on_journal_due(self):
+        future = self.executor.submit(self.flush_journal, key=self.repo_path)
+        future.add_done_callback(log_failure("Erreur lors de l'écriture du journal"))
+
+    def flush_journal(self):
+        """Écrit les chemins en attente dans le journal (sur le worker Git)."""
+        if self.journal is not None:
+            self.journal.flush(self.dirty_set.snapshot())
+
+    def sync_journal(self):
+        """Réduit le journal à l'ensemble des chemins modifiés (après un commit ou une réconciliation)."""
+        if self.journal is not None and not self.dirty_set.overflowed:
+            self.journal.compact(self.dirty_set.snapshot())
+
+    def restore_journal(self, matcher):
+        """Rejoue le journal et le balayage des dossiers dans l'ensemble des chemins modifiés.
+
+        Retourne le nombre de chemins restaurés, ou None sans état enregistré
+        (premier démarrage) : une réconciliation complète est alors nécessaire.
+        """
+        if self.journal is None:
+            return None
+        start = time.perf_counter()
+        replayed = self.journal.load()
+        swept = self.journal.sweep(matcher)
+        if not replayed and swept is None:
+            return None
+        head_blob = None
+        if self.journal.entries or swept:
+            try:
+                head_blob = self.get_plumbing().head_blobs()
+            except (PlumbingError, PlumbingUnsupported, OSError):
+                self.close_plumbing()  # Sans HEAD lisible, tous les chemins rejoués sont gardés
+        changes = self.journal.confirm(head_blob, swept or ())
+        for path, event_type in changes:
+            self.dirty_set.add(path, event_type)
+        if changes:
+            self.update_modification_time()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{Fore.MAGENTA}📓 {len(changes)} chemin(s) restauré(s) depuis le journal en {elapsed:.0f} ms{Style.RESET_ALL}")
+        return len(changes)
+
+    def save_journal_dirs(self, matcher):
+        """Enregistre l'instantané des dossiers utilisé par le balayage du prochain démarrage."""
+        if self.journal is not None:
+            self.flush_journal()
+            self.journal.save_dirs(matcher)
+
+    def filter_changes(self, paths):
+        """Retourne les chemins dont le contenu a vraiment changé (sur le worker Git).
+
+        Les autres (sauvegarde sans changement, `touch`) sont ignorés ; ceux
+        dont le contenu est celui de HEAD sont en plus retirés de l'ensemble
+        des fichiers modifiés. Le contenu n'est relu que si le `stat` a changé.
+        """
+        version = self.dirty_set.version
+        root = self.get_repo_root()
         try:
-            status_output = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout.strip()
-            
-            if not status_output:
+            lookup = self.get_plumbing().head_blobs() if self.use_plumbing else None
+        except (PlumbingError, PlumbingUnsupported, OSError):
+            self.close_plumbing()
+            lookup = None
+
+        def baseline(path):
+            rel = os.path.relpath(path, root)
+            return None if lookup is None or rel.startswith("..") else lookup(rel.replace(os.sep, "/"))
+
+        changed = self.change_index.filter_changed(paths, baseline)
+        unchanged = set(paths) - set(changed)
+        clean = [path for path in unchanged
+                 if self.change_index.digest(path) is not None and baseline(path) == self.change_index.digest(path)]
+        self.dirty_set.discard(clean, until_version=version)
+        return changed
+
+    def stage_changes(self, paths=None, env=None):
+        """Indexe les chemins modifiés en un appel groupé, ou tout l'arbre en repli.
+
+        Les chemins existants passent par `git add -A --pathspec-from-file`, les
+        chemins disparus (suppressions, sources de renommage) par
+        `git rm --cached --ignore-unmatch` pour ne pas échouer sur un fichier
+        créé puis supprimé sans avoir été suivi. `env` permet d'indexer dans un
+        autre fichier d'index (`GIT_INDEX_FILE`).
+        """
+        if self.staging_mode == STAGE_ALL or not paths:
+            with self.metrics.timed("git_command_seconds", command="add"):
+                subprocess.run(["git", "add", "."], cwd=self.repo_path, env=env, check=True)
+            return
+
+        existing = [path for path in paths if os.path.lexists(path)]
+        missing = [path for path in paths if not os.path.lexists(path)]
+
+        if existing:
+            with self.metrics.timed("git_command_seconds", command="add"):
+                result = subprocess.run(["git", "-c", "advice.addIgnoredFile=false", "add", "-A",
+                                         "--pathspec-from-file=-", "--pathspec-file-nul"], cwd=self.repo_path,
+                                        input="\0".join(existing), capture_output=True, text=True, env=env)
+            # Code 1 : certains chemins sont ignorés par .gitignore, les autres sont indexés
+            if result.returncode not in (0, 1):
+                print(f"{Fore.YELLOW}⚠️ Indexation ciblée impossible, repli sur `git add .` : {result.stderr.strip()}{Style.RESET_ALL}")
+                with self.metrics.timed("git_command_seconds", command="add"):
+                    subprocess.run(["git", "add", "."], cwd=self.repo_path, env=env, check=True)
+                return
+
+        if missing:
+            with self.metrics.timed("git_command_seconds", command="rm"):
+                subprocess.run(["git", "rm", "--cached", "-r", "-q", "--ignore-unmatch",
+                                "--pathspec-from-file=-", "--pathspec-file-nul"], cwd=self.repo_path,
+                               input="\0".join(missing), text=True, env=env, check=True)
+
+    def has_staged_changes(self):
+        """Indique si l'index diffère de HEAD (sans parcourir l'arbre de travail)."""
+        with self.metrics.timed("git_command_seconds", command="diff"):
+            return subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=self.repo_path).returncode != 0
+
+    def submit_commit(self, commit_message):
+        """Place un commit dans la file du worker Git et retourne son `Future`."""
+        return self.executor.submit(self.git_commit_push, commit_message, key=self.repo_path)
+
+    def get_plumbing(self):
+        """Retourne (et ouvre au besoin) la session de plomberie du dépôt."""
+        if self._plumbing is None:
+            self._plumbing = PlumbingSession(self.get_repo_root(), self.get_git_dir())
+        return self._plumbing
+
+    def close_plumbing(self):
+        if self._plumbing is not None:
+            self._plumbing.close()
+            self._plumbing = None
+
+    def _commit_plumbing(self, paths, commit_message):
+        """Commit par la plomberie. Retourne True/False, ou None pour repasser par la porcelaine."""
+        if not self.use_plumbing or paths is None or self.staging_mode == STAGE_ALL:
+            return None
+        try:
+            self._commit_method = "plumbing"
+            return self.get_plumbing().commit(
+                paths, lambda head_tree, tree: self.resolve_message(commit_message, head_tree, tree)) is not None
+        except PlumbingUnsupported:
+            return None
+        except (PlumbingError, OSError) as e:
+            print(f"{Fore.YELLOW}⚠️ Session de plomberie interrompue, repli sur `git commit` : {e}{Style.RESET_ALL}")
+            self.close_plumbing()
+            return None
+
+    def _commit_porcelain(self, paths, commit_message):
+        self._commit_method = "porcelain"
+        self.stage_changes(paths)
+        if paths is None or self.staging_mode == STAGE_ALL:
+            self._guard_staged()
+        if not self.has_staged_changes():
+            return False
+        commit_message = self.resolve_message(commit_message, "--cached")
+        with self.metrics.timed("git_command_seconds", command="commit"):
+            subprocess.run(["git", "commit", "-m", commit_message], cwd=self.repo_path, check=True)
+        return True
+
+    def resolve_message(self, commit_message, *diff_args):
+        """Message du commit : celui donné, sinon un résumé du diff (`diff_args` de `git diff`).
+
+        Le résumé vient d'un seul appel `git diff --raw --numstat -M` et tient
+        dans MESSAGE_BUDGET secondes ; au-delà, DEFAULT_MESSAGE est utilisé.
+        """
+        if commit_message is None:
+            with self.metrics.timed("message_seconds", repo=self.metrics_label):
+                commit_message = summarize_diff(self.repo_path, diff_args, self.MESSAGE_BUDGET) or DEFAULT_MESSAGE
+        self.last_commit_message = commit_message
+        return commit_message
+
+    def commit_changes(self, commit_message=None):
+        """Indexe et committe les chemins modifiés. Retourne True si un commit a été créé.
+
+        Sans `commit_message`, le message est généré à partir du diff (voir `resolve_message`).
+
+        Appelée par le worker Git (voir `git_commit_push`).
+        """
+        commit_version = self.dirty_set.version
+        # Sans chemin connu (ou après un débordement), on retombe sur un `git status` complet
+        if self.dirty_set.overflowed or not len(self.dirty_set):
+            self.reconcile_status()
+        paths = None if self.dirty_set.overflowed else list(self.dirty_set.snapshot())
+        if paths is not None:
+            paths = self.guard_paths(paths)  # Fichiers retenus : le reste du lot part sans attendre
+
+        if paths == []:
+            committed = False
+        else:
+            committed = self._commit_plumbing(paths, commit_message)
+            if committed is None:
+                committed = self._commit_porcelain(paths, commit_message)
+        self.dirty_set.clear(until_version=commit_version)
+        self.sync_journal()
+        if committed:
+            self.drop_checkpoints()  # Le commit contient tout ce que les checkpoints avaient enregistré
+        return committed
+
+    def current_branch(self):
+        """Branche courante lue dans .git/HEAD, sans lancer Git (None si HEAD est détaché)."""
+        try:
+            with open(os.path.join(self.get_git_dir(), "HEAD"), encoding="utf-8") as f:
+                head = f.read().strip()
+        except OSError:
+            return None
+        return head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else None
+
+    def checkpoint_ref(self):
+        """Ref des checkpoints de la branche courante."""
+        return CHECKPOINT_NAMESPACE + (self.current_branch() or "detached")
+
+    def checkpoint(self, paths):
+        """Enregistre un checkpoint des chemins `paths` sans toucher à HEAD, à l'index ni au dépôt distant.
+
+        Les chemins restent dans l'ensemble des fichiers modifiés : le prochain
+        commit réel les regroupe tous. Appelée par le worker Git. Retourne
+        l'oid du checkpoint, ou None si rien n'a changé.
+        """
+        paths = self.guard_paths(paths)
+        if not paths:
+            return None
+        ref = self.checkpoint_ref()
+        message = f"Checkpoint {datetime.now():%Y-%m-%d %H:%M:%S}"
+        oid = None
+        try:
+            if not self.use_plumbing:
+                raise PlumbingUnsupported("porcelaine demandée")
+            oid = self.get_plumbing().checkpoint(ref, paths, message,
+                                                 rebase_paths=self.guard_paths(list(self.dirty_set.snapshot())))
+        except PlumbingUnsupported:
+            oid = self._checkpoint_porcelain(ref, message)
+        except (PlumbingError, OSError) as e:
+            print(f"{Fore.YELLOW}⚠️ Session de plomberie interrompue, checkpoint par un index temporaire : {e}{Style.RESET_ALL}")
+            self.close_plumbing()
+            oid = self._checkpoint_porcelain(ref, message)
+        if oid:
+            self.checkpoint_count += 1
+            print(f"{Fore.BLUE}💾 Checkpoint {oid[:8]} ({len(paths)} fichier(s)) sous {ref}{Style.RESET_ALL}")
+            self._schedule_squash()
+        return oid
+
+    def _checkpoint_porcelain(self, ref, message):
+        """Checkpoint par un index temporaire (`GIT_INDEX_FILE`) : l'index de l'utilisateur n'est pas touché."""
+        def git(*args, **kwargs):
+            return subprocess.run(["git", *args], cwd=self.repo_path, capture_output=True, text=True, **kwargs).stdout.strip()
+
+        state_dir = os.path.join(self.get_git_dir(), "gitobserver")
+        os.makedirs(state_dir, exist_ok=True)
+        env = dict(os.environ, GIT_INDEX_FILE=os.path.join(state_dir, "checkpoint.index"))
+        head = git("rev-parse", "--verify", "-q", "HEAD^{commit}")
+        tip = git("rev-parse", "--verify", "-q", ref + "^{commit}")
+        parent = tip if tip and checkpoint_base(git("cat-file", "commit", tip)) == head else head
+
+        # La chaîne repart toujours de HEAD avec l'ensemble des fichiers modifiés
+        subprocess.run(["git", "read-tree", head or "--empty"], cwd=self.repo_path, env=env, check=True)
+        paths = self.guard_paths(list(self.dirty_set.snapshot()))
+        if paths:
+            self.stage_changes(paths, env=env)
+        tree = git("write-tree", env=env)
+        if not tree or (parent and tree == git("rev-parse", parent + "^{tree}")):
+            return None
+        commit = git("commit-tree", tree, *(["-p", parent] if parent else []),
+                     "-m", message, "-m", f"{BASE_TRAILER}: {head}")
+        subprocess.run(["git", "update-ref", ref, commit, tip or ""], cwd=self.repo_path, check=True)
+        return commit
+
+    def drop_checkpoints(self):
+        """Oublie les checkpoints une fois regroupés dans un commit réel."""
+        if not self.checkpoints:
+            return
+        self.checkpoint_count = 0
+        if self._squash_deadline is not None:
+            self._squash_deadline.cancel()
+        ref = self.checkpoint_ref()
+        try:
+            self.get_plumbing().delete_ref(ref)
+        except (PlumbingError, OSError):
+            self.close_plumbing()
+            subprocess.run(["git", "update-ref", "-d", ref], cwd=self.repo_path)
+
+    def _schedule_squash(self):
+        """Planifie le regroupement SQUASH_INTERVAL secondes après le premier checkpoint."""
+        if not self.SQUASH_INTERVAL or self.checkpoint_count != 1:
+            return
+        if self._squash_deadline is None:
+            self._squash_deadline = self.scheduler.call_later(self.SQUASH_INTERVAL, self._on_squash_due)
+        else:
+            self._squash_deadline.move(self.SQUASH_INTERVAL)
+
+    def _on_squash_due(self):
+        future = self.executor.submit(self.squash_checkpoints, key=self.repo_path)
+        future.add_done_callback(log_failure("Erreur lors du regroupement des checkpoints"))
+
+    def squash_checkpoints(self, commit_message=None):
+        """Regroupe les checkpoints (et les modifications suivantes) en un commit réel, puis le pousse."""
+        if not self.checkpoint_count and not self.dirty_set:
+            return False
+        return self.git_commit_push(commit_message)  # Sans message : résumé du diff
+
+    def get_push_scheduler(self):
+        """Retourne (et crée au besoin) le planificateur de pushs du dépôt."""
+        if self._push_scheduler is None:
+            self._push_scheduler = PushScheduler(self.repo_path, self.get_git_dir(), self.scheduler, self.executor,
+                                                 interval=self.PUSH_INTERVAL)
+        return self._push_scheduler
+
+    def resume_pushes(self):
+        """Relance les pushs restés en file lors d'une session précédente."""
+        self.get_push_scheduler().resume()
+
+    def git_commit_push(self, commit_message=None):
+        """Ajoute et commit les modifications, puis planifie leur push groupé.
+
+        Retourne True si un commit a été créé. Appelée par le worker Git :
+        utiliser `submit_commit` depuis les autres threads.
+        """
+        start = time.perf_counter()
+        try:
+            committed = self.commit_changes(commit_message)
+            self.metrics.observe("commit_seconds", time.perf_counter() - start, repo=self.metrics_label)
+            self.metrics.inc("commits_total", repo=self.metrics_label, method=self._commit_method,
+                             outcome="ok" if committed else "empty")
+            if not committed:
                 print(f"{Fore.YELLOW}⚠️ Aucun changement détecté, rien à commit.{Style.RESET_ALL}")
-                return  
+                return False
 
-            subprocess.run(["git", "add", "."], check=True)
-            subprocess.run(["git", "commit", "-m", commit_message], check=True)
-            subprocess.run(["git", "push"], check=True)
+            branch = self.current_branch()
+            if branch:
+                self.get_push_scheduler().enqueue(branch)
+            else:
+                print(f"{Fore.YELLOW}⚠️ HEAD détaché : commit gardé en local, pas de push.{Style.RESET_ALL}")
 
-            print(f"{Fore.GREEN}✅ Commit et push réussi : {commit_message}{Style.RESET_ALL}")
-            self.last_modification_time = None  # Réinitialise le timer après un commit réussi
+            print(f"{Fore.GREEN}✅ Commit réussi : {self.last_commit_message.splitlines()[0]}{Style.RESET_ALL}")
+            self.reset_modification_time()  # Réinitialise le timer après un commit réussi
+            return True
         except subprocess.CalledProcessError as e:
+            self.metrics.inc("commits_total", repo=self.metrics_label, method=self._commit_method, outcome="error")
             print(f"{Fore.RED}❌ Erreur Git : {e}{Style.RESET_ALL}")
+            return False
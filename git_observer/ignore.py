@@ -0,0 +1,280 @@
+import os
+import re
+import subprocess
+import threading
+
+
+class IgnoreRule:
+    """Motif compilé d'un fichier d'exclusion Git."""
+
+    __slots__ = ("regex", "negate", "dir_only", "base")
+
+    def __init__(self, regex, negate, dir_only, base):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.base = base
+
+
+def translate_pattern(pattern):
+    """Convertit un motif .gitignore (sans '!' ni '/' final) en expression régulière."""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    result = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            result.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+        elif c == "*":
+            result.append("[^/]*")
+            i += 1
+        elif c == "?":
+            result.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                result.append(re.escape(c))
+                i += 1
+                continue
+            content = pattern[i + 1:end]
+            if content[0] in "!^":
+                content = "^" + content[1:]
+            result.append("[" + content.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif c == "\\" and i + 1 < n:
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(c))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(result) + r"\Z", re.DOTALL)
+
+
+def parse_ignore_file(path, base):
+    """Lit un fichier d'exclusion et retourne ses règles compilées."""
+    rules = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+
+    for line in lines:
+        if not line or line.startswith("#"):
+            continue
+        # Les espaces finaux sont ignorés sauf s'ils sont échappés
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        rules.append(IgnoreRule(translate_pattern(line), negate, dir_only, base))
+    return rules
+
+
+class IgnoreMatcher:
+    """Indique si un chemin est ignoré par Git, avec un cache par dossier.
+
+    Les règles viennent, par priorité croissante, des exclusions globales
+    (`core.excludesFile`), de `info/exclude` puis des `.gitignore` de chaque
+    dossier. Comme pour Git, un dossier ignoré exclut tout son contenu.
+
+    `is_dir_pruned` indique les dossiers que les watches peuvent sauter :
+    ignorés, sauf s'ils contiennent des fichiers suivis (ajoutés avec
+    `git add -f`) ou s'ils ont été gardés avec `keep_dir`. Comme pour Git,
+    ces fichiers suivis ne sont jamais ignorés (voir `refresh_tracked`).
+    """
+
+    def __init__(self, repo_root, git_dir=None):
+        self.repo_root = os.path.normpath(repo_root)
+        self.git_dir = os.path.normpath(git_dir or os.path.join(self.repo_root, ".git"))
+        self._global_files = []
+        self._global_rules = []
+        self._global_mtimes = {}
+        self._rules_cache = {}  # dossier relatif -> règles applicables à ses entrées
+        self._dir_cache = {}  # dossier relatif -> ignoré ?
+        self._kept = set()  # dossiers relatifs toujours surveillés, et leurs parents
+        self._tracked_dirs = set()  # dossiers ignorés qui contiennent des fichiers suivis, et leurs parents
+        self._tracked_files = frozenset()  # fichiers suivis sous les dossiers ignorés
+        self._tracked_key = None
+        self._tracked_lock = threading.Lock()
+        self.reload()
+
+    def _global_exclude_files(self):
+        """Retourne les fichiers d'exclusion hors arbre : global puis info/exclude."""
+        files = []
+        excludes_file = subprocess.run(["git", "config", "--path", "core.excludesFile"],
+                                       cwd=self.repo_root, capture_output=True, text=True).stdout.strip()
+        if not excludes_file:
+            config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+            excludes_file = os.path.join(config_home, "git", "ignore")
+        files.append(excludes_file)
+        files.append(os.path.join(self.git_dir, "info", "exclude"))
+        return files
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self):
+        """Recharge toutes les règles et vide les caches."""
+        self._global_files = self._global_exclude_files()
+        self._global_mtimes = {path: self._mtime(path) for path in self._global_files}
+        rules = []
+        for path in self._global_files:
+            rules.extend(parse_ignore_file(path, ""))
+        self._global_rules = rules
+        self._rules_cache = {}
+        self._dir_cache = {}
+
+    def refresh_if_changed(self):
+        """Recharge les règles si un fichier d'exclusion hors arbre a changé."""
+        if any(self._mtime(path) != mtime for path, mtime in self._global_mtimes.items()):
+            self.reload()
+            return True
+        return False
+
+    def is_ignore_file(self, path):
+        """Indique si le chemin est un fichier d'exclusion dont dépend le matcher."""
+        return os.path.basename(path) == ".gitignore" or os.path.normpath(path) in self._global_files
+
+    def relative(self, path):
+        """Chemin relatif à la racine, au format Git, ou None hors du dépôt."""
+        rel = os.path.relpath(os.path.normpath(path), self.repo_root)
+        if rel == "." or rel.startswith(".." + os.sep) or rel == "..":
+            return None
+        return rel.replace(os.sep, "/")
+
+    def is_ignored(self, path, is_dir=None):
+        """Indique si `path` (absolu) est ignoré."""
+        rel = self.relative(path)
+        if rel is None:
+            return os.path.normpath(path) != self.repo_root
+        if rel in self._tracked_files:
+            return False
+        parent, _, name = rel.rpartition("/")
+        if name == ".git" or (parent and self._is_dir_ignored(parent)):
+            return True
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        return self._match(rel, parent, is_dir)
+
+    def is_dir_ignored(self, path):
+        """Indique si le dossier `path` (absolu) est ignoré, avec cache."""
+        rel = self.relative(path)
+        return rel is not None and self._is_dir_ignored(rel)
+
+    def _is_dir_ignored(self, rel_dir):
+        ignored = self._dir_cache.get(rel_dir)
+        if ignored is None:
+            parent, _, name = rel_dir.rpartition("/")
+            ignored = name == ".git" or bool(parent and self._is_dir_ignored(parent)) or self._match(rel_dir, parent, True)
+            self._dir_cache[rel_dir] = ignored
+        return ignored
+
+    def _match(self, rel, parent, is_dir):
+        # La dernière règle qui correspond l'emporte
+        for rule in reversed(self._rules_for(parent)):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.base:
+                if not rel.startswith(rule.base + "/"):
+                    continue
+                candidate = rel[len(rule.base) + 1:]
+            else:
+                candidate = rel
+            if rule.regex.match(candidate):
+                return not rule.negate
+        return False
+
+    def _rules_for(self, rel_dir):
+        rules = self._rules_cache.get(rel_dir)
+        if rules is None:
+            if rel_dir:
+                inherited = self._rules_for(rel_dir.rpartition("/")[0])
+                directory = os.path.join(self.repo_root, *rel_dir.split("/"))
+            else:
+                inherited = self._global_rules
+                directory = self.repo_root
+            own = parse_ignore_file(os.path.join(directory, ".gitignore"), rel_dir)
+            rules = inherited + own if own else inherited
+            self._rules_cache[rel_dir] = rules
+        return rules
+
+    def keep_dir(self, path):
+        """Garde `path` (absolu) et ses parents surveillés même s'ils sont ignorés (dossier des cookies fsmonitor)."""
+        rel = self.relative(path)
+        while rel:
+            self._kept.add(rel)
+            rel = rel.rpartition("/")[0]
+
+    def is_dir_pruned(self, path):
+        """Indique si les watches peuvent ignorer le dossier `path` (absolu) et tout son contenu."""
+        rel = self.relative(path)
+        if rel is None or rel in self._kept or rel in self._tracked_dirs:
+            return False
+        return self._is_dir_ignored(rel)
+
+    def ignored_roots(self):
+        """Dossiers ignorés déjà rencontrés dont le parent ne l'est pas (hors `.git`)."""
+        cache = dict(self._dir_cache)
+        return sorted(rel for rel, ignored in cache.items()
+                      if ignored and rel.rpartition("/")[2] != ".git" and not cache.get(rel.rpartition("/")[0]))
+
+    def refresh_tracked(self):
+        """Relit les fichiers suivis sous les dossiers ignorés si l'index a changé.
+
+        Seuls les dossiers ignorés rencontrés sont passés à `git ls-files` :
+        la commande reste bornée par la lecture de l'index. Les fichiers
+        trouvés ne sont plus ignorés par `is_ignored`. Retourne True si
+        l'ensemble des dossiers à surveiller malgré tout a changé.
+        """
+        with self._tracked_lock:
+            roots = self.ignored_roots()
+            try:
+                st = os.stat(os.path.join(self.git_dir, "index"))
+                key = (st.st_mtime_ns, st.st_size, st.st_ino, tuple(roots))
+            except OSError:
+                key = (None, tuple(roots))
+            if key == self._tracked_key:
+                return False
+            dirs, files = set(), set()
+            if roots:
+                # Sans hook fsmonitor : la commande peut être lancée pendant une réponse au hook
+                result = subprocess.run(["git", "-c", "core.fsmonitor=false", "--literal-pathspecs", "ls-files", "-z",
+                                         "--", *roots],
+                                        cwd=self.repo_root, capture_output=True)
+                if result.returncode != 0:
+                    return False  # Réessayé à la prochaine requête
+                for path in result.stdout.decode(errors="surrogateescape").split("\0"):
+                    if path:
+                        files.add(path)
+                    directory = path.rpartition("/")[0]
+                    while directory and directory not in dirs:
+                        dirs.add(directory)
+                        directory = directory.rpartition("/")[0]
+            self._tracked_key = key
+            changed = dirs != self._tracked_dirs
+            self._tracked_dirs = dirs
+            self._tracked_files = frozenset(files)
+            return changed
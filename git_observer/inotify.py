@@ -0,0 +1,204 @@
+"""Backend inotify (Linux) qui ne descend pas dans les sous-arbres ignorés.
+
+Chaque dépôt a une seule watch watchdog récursive, donc une seule instance
+inotify et un seul couple de threads (lecture du noyau, appariement des
+déplacements), quel que soit le nombre de dossiers. Ce couple n'est pas
+partagé entre dépôts : le démon compte deux threads de plus par dépôt
+surveillé (voir `benchmarks/bench_daemon.py`).
+Les watches du noyau ne sont posées que sur les dossiers que `prune`
+n'écarte pas (`.git`, dossiers ignorés par Git) : à l'installation, puis
+pour les dossiers créés ou déplacés dans l'arbre. Quand les règles
+d'exclusion changent, `rescan` retire et ajoute les watches nécessaires
+sans recréer l'instance. Un débordement de la file du noyau
+(IN_Q_OVERFLOW) ou une limite de watches atteinte en cours de route est
+remonté par `on_overflow`, sous forme d'`OverflowEvent`.
+"""
+import errno
+import os
+from watchdog.observers.api import DEFAULT_EMITTER_TIMEOUT, DEFAULT_OBSERVER_TIMEOUT  # type: ignore
+from watchdog.observers.inotify import InotifyEmitter  # type: ignore
+from watchdog.observers.inotify_buffer import InotifyBuffer  # type: ignore
+from watchdog.observers.inotify_c import (DEFAULT_EVENT_BUFFER_SIZE, Inotify, InotifyConstants,  # type: ignore
+                                          InotifyEvent, inotify_rm_watch)
+from watchdog.utils import BaseThread  # type: ignore
+from watchdog.utils.delayed_queue import DelayedQueue  # type: ignore
+from .polling import OverflowEvent, PruningObserver, WATCH_LIMIT_ERRORS
+
+
+class PrunedInotify(Inotify):
+    """Instance inotify dont les watches récursives s'arrêtent aux dossiers écartés par `prune(chemin)`.
+
+    `on_overflow()` est appelé quand des événements ont été perdus.
+    """
+
+    def __init__(self, path, *, recursive=False, event_mask=None, prune=None, on_overflow=None):
+        self.prune = prune
+        self.on_overflow = on_overflow
+        super().__init__(path, recursive=recursive, event_mask=event_mask)
+
+    def _pruned(self, path):
+        return self.prune is not None and path != self._path and self.prune(os.fsdecode(path))
+
+    def _add_dir_watch(self, path, mask, *, recursive):
+        if not os.path.isdir(path):
+            raise OSError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+        if recursive:
+            self._watch_tree(path)
+        else:
+            self._add_watch(path, mask)
+
+    def _watch_tree(self, path, events=None):
+        """Pose les watches de `path` et de ses sous-dossiers non écartés.
+
+        Au démarrage (`events` vaut None), les erreurs de la racine et les
+        limites inotify remontent à l'appelant. Ensuite, une limite atteinte
+        est signalée comme un débordement, les autres erreurs sont ignorées,
+        et `events` reçoit les créations du contenu déjà présent, qui n'a
+        généré aucun événement.
+        """
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                wd = self._add_watch(directory, self._event_mask)
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError as e:
+                if events is None and (directory == path or e.errno not in (errno.ENOENT, errno.ENOTDIR)):
+                    raise
+                if e.errno in WATCH_LIMIT_ERRORS:
+                    self._overflow()  # Ce sous-arbre n'est pas surveillé
+                continue
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if self._pruned(entry.path):
+                        continue
+                    stack.append(entry.path)
+                if events is not None:
+                    mask = InotifyConstants.IN_CREATE | (InotifyConstants.IN_ISDIR if is_dir else 0)
+                    events.append(InotifyEvent(wd, mask, 0, entry.name, entry.path))
+        return events
+
+    def _overflow(self):
+        if self.on_overflow is not None:
+            self.on_overflow()
+
+    def _unwatch(self, predicate):
+        """Retire les watches des dossiers pour lesquels `predicate(chemin)` est vrai."""
+        for path, wd in list(self._wd_for_path.items()):
+            if predicate(path):
+                del self._wd_for_path[path]
+                self._path_for_wd.pop(wd, None)
+                inotify_rm_watch(self._inotify_fd, wd)  # Son IN_IGNORED n'aura plus de chemin : ignoré
+
+    def _unwatch_tree(self, directory):
+        prefix = directory + os.sep.encode()
+        self._unwatch(lambda path: path == directory or path.startswith(prefix))
+
+    def rescan(self):
+        """Applique un changement des règles d'exclusion aux watches posées."""
+        with self._lock:
+            if self._closed or not self._is_recursive:
+                return
+            self._unwatch(self._pruned)
+            self._watch_tree(self._path, [])  # Un dossier déjà surveillé garde sa watch
+
+    def read_events(self, *, event_buffer_size=DEFAULT_EVENT_BUFFER_SIZE):
+        """Lit les événements comme `Inotify.read_events`, sans descendre dans les dossiers écartés."""
+        event_buffer = b""
+        while True:
+            try:
+                with self._lock:
+                    if self._closed:
+                        return []
+                    self._is_reading = True
+                if self._check_inotify_fd():
+                    event_buffer = os.read(self._inotify_fd, event_buffer_size)
+                with self._lock:
+                    self._is_reading = False
+                    if self._closed:
+                        self._close_resources()
+                        return []
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno == errno.EBADF:
+                    return []
+                raise
+            break
+
+        with self._lock:
+            event_list = []
+            for wd, mask, cookie, name in Inotify._parse_event_buffer(event_buffer):
+                if wd == -1 and mask & InotifyConstants.IN_Q_OVERFLOW:
+                    self._overflow()  # File du noyau pleine : des événements ont été perdus
+                    continue
+                wd_path = self._path_for_wd.get(wd)
+                if wd_path is None:
+                    continue  # Watch retirée par `rescan`, ou événement sans watch
+                src_path = os.path.join(wd_path, name) if name else wd_path
+                event = InotifyEvent(wd, mask, cookie, name, src_path)
+
+                if event.is_directory and self._is_recursive:
+                    # Dossier déplacé : ses watches sont reposées à l'arrivée, s'il arrive dans l'arbre
+                    # sans y être écarté (watchdog émet lui-même les événements de son contenu)
+                    if event.is_moved_from:
+                        self._unwatch_tree(src_path)
+                    elif event.is_moved_to and not self._pruned(src_path):
+                        self._watch_tree(src_path, [])
+
+                if event.is_ignored:
+                    path = self._path_for_wd.pop(wd)
+                    if self._wd_for_path.get(path) == wd:
+                        del self._wd_for_path[path]
+
+                event_list.append(event)
+                if self._is_recursive and event.is_directory and event.is_create and not self._pruned(src_path):
+                    self._watch_tree(src_path, event_list)
+        return event_list
+
+
+class PrunedInotifyBuffer(InotifyBuffer):
+    """`InotifyBuffer` construit sur `PrunedInotify`."""
+
+    def __init__(self, path, *, recursive=False, event_mask=None, prune=None, on_overflow=None):
+        BaseThread.__init__(self)
+        self._queue = DelayedQueue(self.delay)
+        self._inotify = PrunedInotify(path, recursive=recursive, event_mask=event_mask, prune=prune,
+                                      on_overflow=on_overflow)
+        self.start()
+
+    def rescan(self):
+        self._inotify.rescan()
+
+
+class PrunedInotifyEmitter(InotifyEmitter):
+    """Émetteur inotify dont la watch ne descend pas dans les dossiers écartés par le prédicat de la watch."""
+
+    def __init__(self, event_queue, watch, *, timeout=DEFAULT_EMITTER_TIMEOUT, event_filter=None, prune_for=None):
+        super().__init__(event_queue, watch, timeout=timeout, event_filter=event_filter)
+        self.prune = prune_for(watch.path) if prune_for else None
+
+    def on_thread_start(self):
+        self._inotify = PrunedInotifyBuffer(os.fsencode(self.watch.path), recursive=self.watch.is_recursive,
+                                            event_mask=self.get_event_mask_from_filter(), prune=self.prune,
+                                            on_overflow=self.on_overflow)
+
+    def on_overflow(self):
+        self.queue_event(OverflowEvent(self.watch.path))
+
+    def rescan(self):
+        inotify = self._inotify
+        if inotify is not None:
+            inotify.rescan()
+
+
+class PrunedInotifyObserver(PruningObserver):
+    """Observer inotify : une instance par watch, élaguée par le prédicat `prune` de `schedule`."""
+
+    def __init__(self, timeout=DEFAULT_OBSERVER_TIMEOUT):
+        super().__init__(PrunedInotifyEmitter, timeout=timeout)
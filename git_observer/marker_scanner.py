@@ -0,0 +1,79 @@
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+MARKER = b"commit_name="
+
+
+class MarkerScanner:
+    """Recherche le marqueur `commit_name=` dans les fichiers modifiés.
+
+    Un cache LRU borné mémorise (taille, mtime) et le résultat par chemin : un
+    fichier qui n'a pas changé depuis le dernier passage n'est pas relu. Les fichiers binaires
+    ou trop gros sont ignorés, et les gros fichiers texte sont parcourus via
+    mmap avec une seule recherche d'octets.
+    """
+
+    def __init__(self, max_entries=4096, max_file_size=50 * 1024 * 1024, mmap_threshold=1024 * 1024, sniff_size=8192):
+        self.max_entries = max_entries
+        self.max_file_size = max_file_size
+        self.mmap_threshold = mmap_threshold
+        self.sniff_size = sniff_size
+        self._cache = OrderedDict()  # chemin -> ((taille, mtime_ns), message ou None)
+        self._lock = threading.Lock()
+
+    def scan(self, file_path):
+        """Retourne le message du marqueur, ou None (absent, binaire ou trop gros).
+
+        Un fichier inchangé n'est pas relu : le résultat du dernier passage est
+        rendu, ce qui retrouve le marqueur d'un lot repris ou d'un commit raté.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._cache.get(file_path)
+            if cached is not None and cached[0] == signature:
+                self._cache.move_to_end(file_path)
+                return cached[1]  # Déjà analysé dans cet état
+
+        message = self._read(file_path, stat.st_size)
+        with self._lock:
+            self._cache[file_path] = (signature, message)
+            self._cache.move_to_end(file_path)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return message
+
+    def _read(self, file_path, size):
+        if size == 0 or size > self.max_file_size:
+            return None
+        with open(file_path, "rb") as f:
+            head = f.read(self.sniff_size)
+            if b"\0" in head:
+                return None  # Fichier binaire
+            if size <= self.mmap_threshold:
+                return self._extract(head + f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self._extract(data)
+
+    @staticmethod
+    def _extract(data):
+        """Extrait le message qui suit le premier marqueur, jusqu'à la fin de la ligne."""
+        start = data.find(MARKER)
+        if start < 0:
+            return None
+        start += len(MARKER)
+        end = data.find(b"\n", start)
+        line = data[start:end if end >= 0 else len(data)]
+        message = line.decode("utf-8", errors="replace").strip().replace('"', '')
+        return message if message else None
+
+    def forget(self, file_path):
+        """Retire un chemin du cache (fichier supprimé)."""
+        with self._lock:
+            self._cache.pop(file_path, None)
@@ -0,0 +1,368 @@
+"""Métriques d'exécution : compteurs, jauges et histogrammes du processus.
+
+Les points chauds (événements reçus et filtrés, regroupement, recherche de
+marqueur, sous-commandes Git, commits, pushs) alimentent le registre partagé
+(`get_metrics`). Il peut être écrit périodiquement dans un fichier JSON ou au
+format texte de Prometheus (`MetricsWriter`), ou servi en HTTP sur la boucle
+locale (`MetricsServer`). `SamplingProfiler` échantillonne les piles de tous
+les threads à la demande (HTTP ou signal SIGUSR2), au format « collapsed »
+des flame graphs.
+"""
+import bisect
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from colorama import Fore, Style
+from .scheduler import get_scheduler
+
+PREFIX = "gitobserver_"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 120.0)  # Secondes
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 20000)  # Nombres de chemins
+
+
+class Histogram:
+    """Répartition de valeurs (durées, tailles de lot) par seuils cumulés."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Dernière case : au-delà du plus grand seuil
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Registre des métriques du processus, utilisable depuis tous les threads.
+
+    Chaque série est identifiée par un nom et des étiquettes (`repo`,
+    `command`, `outcome`...). Les jauges sont des fonctions évaluées à
+    l'export (profondeur de file, taille de l'ensemble des fichiers modifiés).
+    """
+
+    def __init__(self):
+        self._counters = {}  # (nom, étiquettes) -> valeur
+        self._histograms = {}  # (nom, étiquettes) -> Histogram
+        self._gauges = {}  # (nom, étiquettes) -> fonction
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def gauge(self, name, function, **labels):
+        """Déclare une jauge calculée par `function()` à chaque export."""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = function
+
+    @contextmanager
+    def timed(self, name, **labels):
+        """Mesure la durée du bloc dans l'histogramme `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Copie cohérente des séries : {"counters", "gauges", "histograms"}."""
+        with self._lock:
+            counters = [(name, dict(labels), value) for (name, labels), value in self._counters.items()]
+            histograms = [(name, dict(labels), h.buckets, list(h.counts), h.sum, h.count)
+                          for (name, labels), h in self._histograms.items()]
+            gauges = list(self._gauges.items())
+        gauge_values = []
+        for (name, labels), function in gauges:
+            try:
+                gauge_values.append((name, dict(labels), function()))
+            except Exception:
+                continue  # Jauge indisponible (dépôt fermé...)
+        return {"counters": counters, "gauges": gauge_values, "histograms": histograms}
+
+    def to_json(self):
+        snapshot = self.snapshot()
+        return json.dumps({
+            "time": time.time(),
+            "counters": [{"name": name, "labels": labels, "value": value} for name, labels, value in snapshot["counters"]],
+            "gauges": [{"name": name, "labels": labels, "value": value} for name, labels, value in snapshot["gauges"]],
+            "histograms": [{"name": name, "labels": labels, "buckets": list(buckets), "counts": counts,
+                            "sum": total, "count": count}
+                           for name, labels, buckets, counts, total, count in snapshot["histograms"]],
+        }, indent=2)
+
+    def to_prometheus(self):
+        """Format texte d'exposition de Prometheus."""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for name, labels, value in sorted(snapshot["counters"], key=lambda series: series[0]):
+            declare(name, "counter")
+            lines.append(f"{PREFIX}{name}{format_labels(labels)} {value}")
+        for name, labels, value in sorted(snapshot["gauges"], key=lambda series: series[0]):
+            declare(name, "gauge")
+            lines.append(f"{PREFIX}{name}{format_labels(labels)} {value}")
+        for name, labels, buckets, counts, total, count in sorted(snapshot["histograms"], key=lambda series: series[0]):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{format_labels(dict(labels, le=bound))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (key + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for key, value in sorted(labels.items()))
+    return "{" + ",".join(escaped) + "}"
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_metrics():
+    """Retourne le registre de métriques partagé par tous les dépôts du processus."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry()
+        return _default_registry
+
+
+def write_atomic(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+class MetricsWriter:
+    """Écrit le registre dans `path` toutes les `interval` secondes (JSON si l'extension est .json, sinon Prometheus)."""
+
+    def __init__(self, registry, path, interval=15, scheduler=None):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.scheduler = scheduler or get_scheduler()
+        self._deadline = None
+
+    def render(self):
+        return self.registry.to_json() if self.path.endswith(".json") else self.registry.to_prometheus()
+
+    def start(self):
+        self.write()
+        self._deadline = self.scheduler.call_later(self.interval, self._on_due)
+
+    def _on_due(self):
+        self.write()
+        self._deadline.move(self.interval)
+
+    def write(self):
+        try:
+            write_atomic(self.path, self.render())
+        except OSError as e:
+            print(f"{Fore.YELLOW}⚠️ Écriture des métriques impossible : {e}{Style.RESET_ALL}")
+
+    def stop(self):
+        if self._deadline is not None:
+            self._deadline.cancel()
+        self.write()
+
+
+class SamplingProfiler:
+    """Profileur par échantillonnage : relève les piles de tous les threads toutes les `interval` secondes.
+
+    Les piles sont agrégées au format « collapsed » (`thread;fichier:fonction;... nombre`),
+    lisible par flamegraph.pl ou speedscope.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self.samples = Counter()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Arrête l'échantillonnage et retourne les piles agrégées."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return ""
+        self._stop.set()
+        thread.join()
+        return self.collapsed()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join([names.get(ident, str(ident))] + stack[::-1])] += 1
+
+    def toggle(self, directory):
+        """Démarre le profileur, ou l'arrête et écrit les piles dans `directory`. Retourne le fichier écrit."""
+        if self.start():
+            print(f"{Fore.MAGENTA}🔬 Profileur démarré{Style.RESET_ALL}")
+            return None
+        path = os.path.join(directory, f"profile-{datetime.now():%Y%m%d-%H%M%S}.txt")
+        write_atomic(path, self.stop())
+        print(f"{Fore.MAGENTA}🔬 Profil écrit dans {path}{Style.RESET_ALL}")
+        return path
+
+
+def install_profiler_signal(profiler, directory):
+    """SIGUSR2 démarre ou arrête le profileur (Unix, thread principal uniquement). Retourne True si installé."""
+    if not hasattr(signal, "SIGUSR2") or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGUSR2, lambda signum, frame: threading.Thread(
+        target=profiler.toggle, args=(directory,), daemon=True).start())
+    return True
+
+
+class MetricsServer:
+    """Sert les métriques en HTTP sur la boucle locale.
+
+    GET /metrics (Prometheus) et /metrics.json ; POST /profile/start et
+    /profile/stop (piles agrégées du profileur), qu'un simple lien ou un
+    préchargement du navigateur ne peut pas déclencher.
+    """
+
+    def __init__(self, registry, port, host="127.0.0.1", profiler=None):
+        self.registry = registry
+        self.profiler = profiler or SamplingProfiler()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                route = self.path.split("?", 1)[0]
+                if route == "/metrics":
+                    server._reply(self, registry.to_prometheus(), "text/plain; version=0.0.4")
+                elif route == "/metrics.json":
+                    server._reply(self, registry.to_json(), "application/json")
+                elif route in ("/profile/start", "/profile/stop"):
+                    self.send_error(405)  # Change l'état du processus : POST seulement
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                route = self.path.split("?", 1)[0]
+                if route == "/profile/start":
+                    started = server.profiler.start()
+                    server._reply(self, "started\n" if started else "already running\n", "text/plain")
+                elif route == "/profile/stop":
+                    server._reply(self, server.profiler.stop(), "text/plain")
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass  # Pas de journal d'accès dans la console
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    @staticmethod
+    def _reply(handler, body, content_type):
+        data = body.encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_exporters(registry, path=None, interval=15, port=None, profile_dir=".", scheduler=None):
+    """Démarre l'écriture périodique et/ou le serveur HTTP, et branche SIGUSR2 sur le profileur.
+
+    Retourne la liste des exportateurs démarrés (à arrêter avec `stop`).
+    """
+    exporters = []
+    profiler = SamplingProfiler()
+    if path:
+        writer = MetricsWriter(registry, path, interval, scheduler)
+        writer.start()
+        exporters.append(writer)
+        print(f"{Fore.MAGENTA}📊 Métriques écrites dans {path} toutes les {interval} s{Style.RESET_ALL}")
+    if port is not None:
+        try:
+            server = MetricsServer(registry, port, profiler=profiler)
+        except OSError as e:
+            print(f"{Fore.YELLOW}⚠️ Serveur de métriques indisponible sur le port {port} : {e}{Style.RESET_ALL}")
+        else:
+            server.start()
+            exporters.append(server)
+            print(f"{Fore.MAGENTA}📊 Métriques sur http://127.0.0.1:{server.port}/metrics{Style.RESET_ALL}")
+    install_profiler_signal(profiler, profile_dir)
+    return exporters
@@ -0,0 +1,204 @@
+"""Backends de notification et de saisie du message de commit.
+
+Chaque backend est importé seulement lorsqu'il est utilisé pour la première
+fois : `tkinter` et `win10toast` ne sont jamais chargés sur un serveur sans
+écran qui utilise `console` ou `headless`.
+
+    toast     notification système Windows (win10toast)
+    tk        fenêtre modale de saisie (tkinter)
+    console   avertissement et saisie dans le terminal
+    headless  simple message dans le journal, jamais de saisie
+"""
+import os
+import queue
+import sys
+import threading
+from colorama import Fore, Style
+
+REMINDER_TITLE = "Git Auto Commit"
+REMINDER_TEXT = "Des modifications sont en attente depuis 30 minutes !"
+
+
+class NotificationBackend:
+    """Interface d'un backend : notifier l'utilisateur et, s'il est interactif, lui demander un message."""
+
+    name = None
+    interactive = False  # True si `prompt` peut demander un message
+
+    def notify(self, title, text):
+        """Affiche une notification (sans bloquer)."""
+
+    def prompt(self):
+        """Demande un message de commit. Retourne (validé, message)."""
+        return False, None
+
+
+class ToastBackend(NotificationBackend):
+    name = "toast"
+
+    def __init__(self):
+        from win10toast import ToastNotifier  # type: ignore
+        self.toaster = ToastNotifier()
+
+    def notify(self, title, text):
+        self.toaster.show_toast(title, text, duration=10, threaded=True)
+
+
+class TkBackend(NotificationBackend):
+    name = "tk"
+    interactive = True
+
+    def __init__(self):
+        from .dialog import CommitDialog
+        self.dialog_class = CommitDialog
+
+    def prompt(self):
+        return self.dialog_class().show()
+
+
+class ConsoleBackend(NotificationBackend):
+    name = "console"
+    interactive = True
+
+    def __init__(self, readline=input):
+        self.readline = readline  # Remplacée par la console asyncio du watcher, qui possède stdin
+
+    def notify(self, title, text):
+        print(f"{Fore.YELLOW}⚠️ {text}{Style.RESET_ALL}")
+
+    def prompt(self):
+        message = self.readline(f"{Fore.GREEN}✏️ Entrez votre message de commit (ou 'skip' pour ignorer) : {Style.RESET_ALL}")
+        return message != 'skip', message
+
+
+class HeadlessBackend(NotificationBackend):
+    name = "headless"
+
+    def notify(self, title, text):
+        print(f"{Fore.YELLOW}⚠️ {text} (mode sans interface : ajoutez commit_name=\"...\" ou committez manuellement){Style.RESET_ALL}")
+
+
+BACKENDS = {
+    "toast": ToastBackend,
+    "tk": TkBackend,
+    "console": ConsoleBackend,
+    "headless": HeadlessBackend,
+}
+
+
+def default_backend_names():
+    """Choisit les backends selon l'environnement (Windows, affichage disponible, terminal)."""
+    if sys.platform == "win32":
+        return ["toast", "tk"]
+    if os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY") or sys.platform == "darwin":
+        return ["tk"]
+    if sys.stdin is not None and sys.stdin.isatty():
+        return ["console"]
+    return ["headless"]
+
+
+def parse_backend_names(value):
+    """Transforme "toast,tk" en liste de noms ; None ou "auto" donne le choix par défaut."""
+    if not value or value == "auto":
+        return None
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Backend(s) de notification inconnu(s) : {', '.join(unknown)} "
+                         f"(disponibles : {', '.join(BACKENDS)})")
+    return names
+
+
+class Notifier:
+    """Notifie via les backends choisis, chargés au premier rappel.
+
+    Un backend dont l'import échoue (pas d'affichage, bibliothèque absente)
+    est écarté avec un avertissement ; sans backend interactif restant, la
+    saisie se fait dans le terminal si possible, sinon le rappel est seulement
+    journalisé.
+    """
+
+    def __init__(self, backend_names=None, readline=input):
+        self.backend_names = backend_names
+        self.readline = readline  # Saisie utilisée par le backend console
+        self._backends = None
+        self._lock = threading.Lock()
+
+    def backends(self):
+        with self._lock:
+            if self._backends is None:
+                self._backends = self._load(self.backend_names or default_backend_names())
+            return self._backends
+
+    def _load(self, names):
+        backends = []
+        for name in names:
+            try:
+                backends.append(ConsoleBackend(self.readline) if name == "console" else BACKENDS[name]())
+            except Exception as e:
+                print(f"{Fore.YELLOW}⚠️ Backend de notification '{name}' indisponible : {e}{Style.RESET_ALL}")
+        if not any(backend.interactive for backend in backends):
+            fallback = ConsoleBackend(self.readline) if sys.stdin is not None and sys.stdin.isatty() else HeadlessBackend()
+            if not any(type(backend) is type(fallback) for backend in backends):
+                backends.append(fallback)
+        return backends
+
+    def remind(self, title=REMINDER_TITLE, text=REMINDER_TEXT):
+        """Affiche le rappel puis demande un message. Retourne (validé, message)."""
+        backends = self.backends()
+        for backend in backends:
+            try:
+                backend.notify(title, text)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Erreur de notification ({backend.name}) : {e}{Style.RESET_ALL}")
+        for backend in backends:
+            if backend.interactive:
+                try:
+                    return backend.prompt()
+                except Exception as e:
+                    # Par exemple une fenêtre impossible à ouvrir (TclError) : backend suivant
+                    print(f"{Fore.RED}❌ Saisie impossible ({backend.name}) : {e}{Style.RESET_ALL}")
+        return False, None
+
+
+class ReminderThread:
+    """Thread d'interface qui affiche les rappels un par un, hors des workers Git.
+
+    Un rappel peut bloquer longtemps (fenêtre tk, saisie console) : il ne
+    retarde ainsi ni les commits, ni les pushes, ni les réconciliations, et
+    n'occupe pas de place dans le pool du démon. Thread démon : un rappel
+    resté ouvert n'empêche pas le processus de s'arrêter.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+                self._thread.start()
+        self._queue.put((fn, args))
+
+    def _run(self):
+        while True:
+            fn, args = self._queue.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Erreur du rappel : {e}{Style.RESET_ALL}")
+
+
+_reminder_thread = None
+_reminder_lock = threading.Lock()
+
+
+def get_reminder_thread():
+    """Retourne le thread des rappels partagé par tous les dépôts du processus."""
+    global _reminder_thread
+    with _reminder_lock:
+        if _reminder_thread is None:
+            _reminder_thread = ReminderThread()
+        return _reminder_thread
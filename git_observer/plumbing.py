@@ -0,0 +1,423 @@
+"""Moteur de commit par la plomberie Git, avec des processus Git persistants.
+
+Un commit en porcelaine (`git add`, `git diff --cached`, `git commit`) lance
+plusieurs processus qui relisent chacun la configuration et l'index. Ici,
+les objets sont écrits par des sessions ouvertes une fois par dépôt :
+
+    cat-file --batch               lecture de HEAD et des arbres
+    hash-object -w --stdin-paths   blobs des fichiers modifiés (filtres .gitattributes appliqués)
+    mktree -z --batch              arbres reconstruits le long des chemins modifiés
+    hash-object -w -t commit ...   objet commit
+    update-ref --stdin             avance de la branche (transaction vérifiant l'ancien HEAD)
+
+Seule la mise à jour de l'index (`update-index --index-info`) reste un
+processus par commit : `update-index --stdin` n'écrit l'index qu'à sa sortie.
+Tout ce que ce moteur ne sait pas faire (hooks, signature, fusion en cours,
+liens symboliques, dossiers, sous-modules, index modifié par ailleurs)
+lève `PlumbingUnsupported` et l'appelant repasse par la porcelaine.
+
+Les checkpoints (`checkpoint`) passent par les mêmes sessions mais
+n'avancent qu'une ref privée : ni HEAD ni l'index ne sont modifiés.
+"""
+import os
+import stat
+import subprocess
+import time
+from collections import OrderedDict
+from colorama import Fore, Style
+from .metrics import get_metrics
+
+TREE_MODE = "40000"
+GITLINK_MODE = "160000"
+COMMIT_HOOKS = ("pre-commit", "prepare-commit-msg", "commit-msg", "post-commit")
+IN_PROGRESS = ("MERGE_HEAD", "CHERRY_PICK_HEAD", "REVERT_HEAD", "rebase-merge", "rebase-apply")
+HASH_CHUNK = 256  # Chemins envoyés à hash-object avant de lire les résultats (évite de remplir les tubes)
+BASE_TRAILER = "Gitobserver-Base"  # HEAD sur lequel repose une chaîne de checkpoints
+GC_EVERY = 100  # `git gc --auto` après ce nombre de commits, comme le ferait `git commit`
+
+
+class PlumbingError(Exception):
+    """Une session Git persistante a échoué (processus arrêté, réponse inattendue)."""
+
+
+class PlumbingUnsupported(Exception):
+    """Le commit demandé doit passer par la porcelaine."""
+
+
+class GitProcess:
+    """Processus Git lancé à la première requête et gardé ouvert."""
+
+    def __init__(self, args, cwd):
+        self.args = ["git", *args]
+        self.cwd = cwd
+        self._process = None
+
+    def _ensure(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(self.args, cwd=self.cwd, stdin=subprocess.PIPE,
+                                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return self._process
+
+    def write(self, data):
+        process = self._ensure()
+        try:
+            process.stdin.write(data)
+            process.stdin.flush()
+        except OSError as e:
+            raise PlumbingError(f"{' '.join(self.args[:2])} : {e}")
+
+    def readline(self):
+        line = self._process.stdout.readline()
+        if not line.endswith(b"\n"):
+            raise PlumbingError(f"{' '.join(self.args[:2])} s'est arrêté : {self._stderr()}")
+        return line[:-1]
+
+    def read(self, size):
+        data = self._process.stdout.read(size)
+        if len(data) != size:
+            raise PlumbingError(f"{' '.join(self.args[:2])} s'est arrêté : {self._stderr()}")
+        return data
+
+    def _stderr(self):
+        self.close()
+        return self._process.stderr.read().decode(errors="replace").strip() if self._process else ""
+
+    def close(self):
+        process = self._process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+class PlumbingSession:
+    """Construit les commits d'un dépôt à partir de HEAD et des chemins modifiés connus."""
+
+    def __init__(self, repo_root, git_dir, max_cached_trees=1024):
+        self.repo_root = repo_root
+        self.git_dir = git_dir
+        self.cat_file = GitProcess(["cat-file", "--batch"], repo_root)
+        self.hash_blobs = GitProcess(["hash-object", "-w", "--stdin-paths"], repo_root)
+        self.hash_commits = GitProcess(["hash-object", "-w", "-t", "commit", "--stdin-paths"], repo_root)
+        self.mktree = GitProcess(["mktree", "-z", "--missing", "--batch"], repo_root)
+        self.update_ref = GitProcess(["update-ref", "-m", "commit (gitobserver)", "--stdin"], repo_root)
+        self.max_cached_trees = max_cached_trees
+        self._trees = OrderedDict()  # oid -> entrées (les arbres sont immuables)
+        self._config = None
+        self._index_stat = None  # (mtime_ns, taille) de l'index après notre dernière écriture
+        self._commit_count = 0
+
+    def close(self):
+        for process in (self.cat_file, self.hash_blobs, self.hash_commits, self.mktree, self.update_ref):
+            process.close()
+
+    # Lecture
+
+    def _load_config(self):
+        """Configuration lue une seule fois par session."""
+        if self._config is None:
+            def git(*args):
+                return subprocess.run(["git", *args], cwd=self.repo_root, capture_output=True, text=True).stdout.strip()
+            self._config = {
+                "author": git("var", "GIT_AUTHOR_IDENT"),
+                "committer": git("var", "GIT_COMMITTER_IDENT"),
+                "gpgsign": git("config", "--bool", "commit.gpgsign") == "true",
+                "filemode": git("config", "--bool", "core.filemode") != "false",
+                "hooks": os.path.join(self.repo_root, git("rev-parse", "--git-path", "hooks")),
+            }
+            for key in ("author", "committer"):
+                if not self._config[key]:
+                    raise PlumbingUnsupported("identité Git non configurée")
+                # "Nom <email> horodatage fuseau" : la date est recalculée à chaque commit
+                self._config[key] = self._config[key].rsplit(" ", 2)[0]
+        return self._config
+
+    def read_object(self, name):
+        """Retourne (oid, type, contenu) ou None si l'objet n'existe pas."""
+        self.cat_file.write(name.encode() + b"\n")
+        header = self.cat_file.readline().decode()
+        if header.endswith(" missing") or header.endswith(" ambiguous"):
+            return None
+        oid, kind, size = header.split(" ")
+        data = self.cat_file.read(int(size))
+        self.cat_file.read(1)  # Saut de ligne final
+        return oid, kind, data
+
+    def read_tree(self, oid):
+        """Entrées d'un arbre : nom -> (mode, oid)."""
+        entries = self._trees.get(oid)
+        if entries is not None:
+            self._trees.move_to_end(oid)
+            return entries
+        obj = self.read_object(oid)
+        if obj is None or obj[1] != "tree":
+            raise PlumbingError(f"arbre introuvable : {oid}")
+        data, raw_size = obj[2], len(oid) // 2
+        entries = {}
+        position = 0
+        while position < len(data):
+            space = data.index(b" ", position)
+            nul = data.index(b"\0", space)
+            name = data[space + 1:nul].decode(errors="surrogateescape")
+            entries[name] = (data[position:space].decode(), data[nul + 1:nul + 1 + raw_size].hex())
+            position = nul + 1 + raw_size
+        self._cache_tree(oid, entries)
+        return entries
+
+    def _cache_tree(self, oid, entries):
+        """Garde les entrées d'un arbre lu ou écrit, en oubliant les moins récemment utilisés."""
+        self._trees[oid] = entries
+        self._trees.move_to_end(oid)
+        if len(self._trees) > self.max_cached_trees:
+            self._trees.popitem(last=False)
+
+    def read_commit(self, name):
+        """Retourne (oid, oid de l'arbre, message) du commit `name`, ou None s'il n'existe pas."""
+        obj = self.read_object(name)
+        if obj is None or obj[1] != "commit":
+            return None
+        headers, _, message = obj[2].partition(b"\n\n")
+        return obj[0], headers.split(b"\n", 1)[0].split(b" ")[1].decode(), message.decode(errors="replace")
+
+    def head(self):
+        """Retourne (oid du commit HEAD, oid de son arbre)."""
+        commit = self.read_commit("HEAD")
+        if commit is None:
+            raise PlumbingUnsupported("HEAD sans commit")
+        return commit[0], commit[1]
+
+    # Vérifications
+
+    def _check_commit_supported(self):
+        config = self._load_config()
+        if config["gpgsign"]:
+            raise PlumbingUnsupported("commits signés")
+        for hook in COMMIT_HOOKS:
+            if os.access(os.path.join(config["hooks"], hook), os.X_OK):
+                raise PlumbingUnsupported(f"hook {hook}")
+        for name in IN_PROGRESS:
+            if os.path.exists(os.path.join(self.git_dir, name)):
+                raise PlumbingUnsupported(f"opération en cours ({name})")
+        self._check_index()
+
+    def _check_index(self):
+        """Si l'index a été réécrit par un autre processus, il ne doit rien contenir d'indexé à part."""
+        current = self._stat_index()
+        if current == self._index_stat:
+            return
+        result = subprocess.run(["git", "diff-index", "--cached", "--quiet", "HEAD", "--"], cwd=self.repo_root)
+        if result.returncode != 0:
+            raise PlumbingUnsupported("changements déjà indexés")
+        self._index_stat = current
+
+    def _stat_index(self):
+        try:
+            st = os.stat(os.path.join(self.git_dir, "index"))
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    # Écriture
+
+    def _collect(self, paths, head_tree):
+        """Transforme les chemins modifiés en changements : chemin relatif -> (mode, oid) ou None (suppression)."""
+        filemode = self._load_config()["filemode"]
+        changes, to_hash = {}, []
+        for path in paths:
+            rel = os.path.relpath(path, self.repo_root)
+            if rel.startswith("..") or rel == ".":
+                continue
+            rel = rel.replace(os.sep, "/")
+            if "\n" in rel or rel.startswith('"') or rel.split("/")[0] == ".git":
+                raise PlumbingUnsupported(f"chemin non pris en charge : {rel}")
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                changes[rel] = None
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                raise PlumbingUnsupported(f"{rel} n'est pas un fichier ordinaire")
+            if filemode:
+                mode = "100755" if st.st_mode & stat.S_IXUSR else "100644"
+            else:
+                mode = self._head_mode(head_tree, rel) or "100644"
+            to_hash.append((rel, mode))
+
+        for start in range(0, len(to_hash), HASH_CHUNK):
+            chunk = to_hash[start:start + HASH_CHUNK]
+            self.hash_blobs.write(b"".join(rel.encode(errors="surrogateescape") + b"\n" for rel, _ in chunk))
+            for rel, mode in chunk:
+                changes[rel] = (mode, self.hash_blobs.readline().decode())
+        return changes
+
+    def tree_entry(self, tree, rel):
+        """Entrée (mode, oid) de `rel` dans l'arbre `tree`, ou None."""
+        parts = rel.split("/")
+        for part in parts[:-1]:
+            entry = self.read_tree(tree).get(part)
+            if entry is None or entry[0] != TREE_MODE:
+                return None
+            tree = entry[1]
+        return self.read_tree(tree).get(parts[-1])
+
+    def _head_mode(self, tree, rel):
+        entry = self.tree_entry(tree, rel)
+        return entry[0] if entry else None
+
+    def head_blobs(self):
+        """Fonction `rel` -> oid du blob dans HEAD (ou None), HEAD étant résolu une seule fois."""
+        commit = self.read_commit("HEAD")
+
+        def lookup(rel):
+            entry = self.tree_entry(commit[1], rel) if commit else None
+            return entry[1] if entry and entry[0] != TREE_MODE else None
+        return lookup
+
+    def _build(self, tree, changes):
+        """Applique `changes` (relatifs à `tree`) et retourne l'oid du nouvel arbre, ou None s'il est vide."""
+        original = self.read_tree(tree) if tree else {}
+        entries = dict(original)
+        nested = {}
+        for path, change in changes.items():
+            name, separator, rest = path.partition("/")
+            if separator:
+                nested.setdefault(name, {})[rest] = change
+                continue
+            current = entries.get(name)
+            if current and current[0] in (TREE_MODE, GITLINK_MODE):
+                raise PlumbingUnsupported(f"{name} est un dossier ou un sous-module")
+            if change is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = change
+        for name, sub_changes in nested.items():
+            current = entries.get(name)
+            if current and current[0] != TREE_MODE:
+                raise PlumbingUnsupported(f"{name} n'est pas un dossier")
+            subtree = self._build(current[1] if current else None, sub_changes)
+            if subtree is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = (TREE_MODE, subtree)
+
+        if entries == original:
+            return tree
+        if not entries:
+            return None
+        return self._write_tree(entries)
+
+    def _write_tree(self, entries):
+        lines = []
+        for name, (mode, oid) in entries.items():
+            kind = "tree" if mode == TREE_MODE else "commit" if mode == GITLINK_MODE else "blob"
+            lines.append(f"{mode} {kind} {oid}\t".encode() + name.encode(errors="surrogateescape") + b"\0")
+        self.mktree.write(b"".join(lines) + b"\0")
+        oid = self.mktree.readline().decode()
+        self._cache_tree(oid, entries)
+        return oid
+
+    def _write_commit(self, tree, parents, message):
+        config = self._load_config()
+        now = int(time.time())
+        offset = time.localtime(now).tm_gmtoff // 60
+        timezone = f"{'+' if offset >= 0 else '-'}{abs(offset) // 60:02d}{abs(offset) % 60:02d}"
+        # Même nettoyage que `git commit -m` : espaces de fin et lignes vides en bordure
+        body = "\n".join(line.rstrip() for line in message.strip().splitlines())
+        content = (f"tree {tree}\n" + "".join(f"parent {parent}\n" for parent in parents) +
+                   f"author {config['author']} {now} {timezone}\n"
+                   f"committer {config['committer']} {now} {timezone}\n\n{body}\n")
+        message_path = os.path.join(self.git_dir, "gitobserver", "COMMIT_OBJECT")
+        os.makedirs(os.path.dirname(message_path), exist_ok=True)
+        with open(message_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(content)
+        self.hash_commits.write(message_path.encode(errors="surrogateescape") + b"\n")
+        return self.hash_commits.readline().decode()
+
+    def _update_ref(self, command):
+        self.update_ref.write(f"start\n{command}\ncommit\n".encode())
+        for expected in (b"start: ok", b"commit: ok"):
+            if self.update_ref.readline() != expected:
+                raise PlumbingError("réponse inattendue de update-ref")
+
+    def _update_index(self, changes, null_oid):
+        entries = b"".join(
+            (f"0 {null_oid}\t" if change is None else f"{change[0]} {change[1]}\t").encode()
+            + rel.encode(errors="surrogateescape") + b"\0"
+            for rel, change in changes.items())
+        result = subprocess.run(["git", "update-index", "-z", "--index-info"], cwd=self.repo_root,
+                                input=entries, capture_output=True)
+        if result.returncode != 0:
+            print(f"{Fore.YELLOW}⚠️ Index non mis à jour après le commit : {result.stderr.decode(errors='replace').strip()}{Style.RESET_ALL}")
+        self._index_stat = self._stat_index()
+
+    def commit(self, paths, message):
+        """Committe les chemins `paths` (absolus) sur HEAD. Retourne l'oid du commit, ou None si rien n'a changé.
+
+        `message` peut être une fonction `message(ancien_arbre, nouvel_arbre)`,
+        appelée une fois l'arbre écrit (message généré depuis le diff).
+        """
+        self._check_commit_supported()
+        metrics = get_metrics()
+        head, head_tree = self.head()
+        with metrics.timed("git_command_seconds", command="hash-object"):
+            changes = self._collect(paths, head_tree)
+        with metrics.timed("git_command_seconds", command="mktree"):
+            tree = self._build(head_tree, changes)
+        if tree is None:
+            raise PlumbingUnsupported("arbre vide")
+        if tree == head_tree:
+            return None
+        if callable(message):
+            message = message(head_tree, tree)
+        with metrics.timed("git_command_seconds", command="commit-object"):
+            commit = self._write_commit(tree, [head], message)
+        with metrics.timed("git_command_seconds", command="update-ref"):
+            self._update_ref(f"update HEAD {commit} {head}")
+        with metrics.timed("git_command_seconds", command="update-index"):
+            self._update_index(changes, "0" * len(head))
+
+        self._commit_count += 1
+        if self._commit_count % GC_EVERY == 0:
+            subprocess.Popen(["git", "gc", "--auto", "--quiet"], cwd=self.repo_root)
+        return commit
+
+    # Checkpoints
+
+    def checkpoint(self, ref, paths, message, rebase_paths=None):
+        """Enregistre un checkpoint sous `ref` sans toucher à HEAD ni à l'index.
+
+        Les checkpoints forment une chaîne partant de HEAD ; chacun n'applique
+        que `paths` (les chemins modifiés depuis le précédent). Si HEAD a bougé
+        depuis le début de la chaîne, elle repart de HEAD avec `rebase_paths`.
+        Retourne l'oid du checkpoint, ou None si rien n'a changé.
+        """
+        head, head_tree = self.head()
+        tip = self.read_commit(ref)
+        if tip is not None and checkpoint_base(tip[2]) == head:
+            parent, base_tree, old = tip[0], tip[1], tip[0]
+        else:
+            parent, base_tree, old = head, head_tree, tip[0] if tip else "0" * len(head)
+            paths = paths if rebase_paths is None else rebase_paths
+        tree = self._build(base_tree, self._collect(paths, base_tree))
+        if tree is None:
+            raise PlumbingUnsupported("arbre vide")
+        if tree == base_tree:
+            return None
+        commit = self._write_commit(tree, [parent], f"{message}\n\n{BASE_TRAILER}: {head}")
+        self._update_ref(f"update {ref} {commit} {old}")
+        return commit
+
+    def delete_ref(self, ref):
+        if self.read_object(ref) is not None:
+            self._update_ref(f"delete {ref}")
+
+
+def checkpoint_base(message):
+    """Commit de base (HEAD au début de la chaîne) noté dans le message d'un checkpoint."""
+    for line in reversed(message.splitlines()):
+        if line.startswith(BASE_TRAILER + ": "):
+            return line.split(": ", 1)[1].strip()
+    return None
@@ -0,0 +1,303 @@
+"""Backend de surveillance par `os.scandir`, pour les arbres que l'observer natif ne peut pas suivre.
+
+Utilisé lorsque le dépôt est sur un système de fichiers réseau (NFS, SMB,
+montages Docker Desktop...), où inotify ne voit pas les modifications faites
+ailleurs, ou lorsque les watches natives échouent (limites
+`max_user_watches` / `max_user_instances` atteintes). Il produit les mêmes
+événements watchdog, donc `GitAutoCommitHandler` et `WatchScheduler` ne
+changent pas ; comme le backend inotify, il ne parcourt pas les dossiers
+ignorés. Les deux backends signalent les événements perdus par un
+`OverflowEvent`.
+"""
+import errno
+import os
+import time
+from functools import partial
+from watchdog.events import (FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent,  # type: ignore
+                             DirCreatedEvent, DirDeletedEvent, DirMovedEvent, FileSystemEvent)
+from watchdog.observers.api import BaseObserver, EventEmitter  # type: ignore
+
+# Erreurs des watches natives qui justifient le repli sur le scan
+WATCH_LIMIT_ERRORS = (errno.ENOSPC, errno.EMFILE, errno.ENFILE)
+# Systèmes de fichiers où les modifications faites par d'autres machines ne génèrent pas d'événement
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "virtiofs", "fuse.sshfs",
+                       "fuse.grpcfuse", "fakeowner", "vboxsf", "vmhgfs", "fuse.vmhgfs-fuse", "afs", "ceph"}
+RACY_NS = 2 * 10**9  # Un dossier modifié depuis moins longtemps est relu au scan suivant
+FULL_SCAN_SHARE = 0.05  # Part maximale du temps passée en scans complets
+
+
+class OverflowEvent(FileSystemEvent):
+    """Des événements de l'arbre `src_path` ont été perdus : seule une réconciliation complète est fiable."""
+
+    event_type = "overflow"
+    is_directory = True
+
+
+def filesystem_type(path, mounts="/proc/self/mounts"):
+    """Type du système de fichiers qui contient `path` (Linux), ou None s'il est inconnu."""
+    path = os.path.realpath(path)
+    best, best_type = "", None
+    try:
+        with open(mounts, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace("\\040", " ")
+                inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+                if inside and len(mount_point) >= len(best):
+                    best, best_type = mount_point, fields[2]
+    except OSError:
+        return None
+    return best_type
+
+
+def polling_reason(path):
+    """Raison de préférer le scan à l'observer natif pour `path`, ou None."""
+    fs_type = filesystem_type(path)
+    if fs_type in NETWORK_FILESYSTEMS:
+        return f"système de fichiers réseau ({fs_type})"
+    return None
+
+
+class DirState:
+    """Contenu connu d'un dossier lors du dernier scan."""
+
+    __slots__ = ("mtime_ns", "files", "dirs", "active")
+
+    def __init__(self, mtime_ns, files, dirs):
+        self.mtime_ns = mtime_ns
+        self.files = files  # nom -> (inode, taille, mtime_ns)
+        self.dirs = dirs  # nom -> inode
+        self.active = 0.0  # Dernière activité constatée (time.monotonic)
+
+
+class ScandirEmitter(EventEmitter):
+    """Émetteur watchdog qui compare des scans successifs de l'arbre.
+
+    Un dossier dont la date de modification n'a pas changé n'est pas relu :
+    aucune entrée n'y a été créée, supprimée ni renommée. Les fichiers d'un
+    tel dossier ne sont revus (un `lstat` chacun) que s'il a été actif dans
+    les `hot_window` dernières secondes, ou lors d'un scan complet toutes les
+    `full_interval` secondes (plus espacés sur les très gros arbres, pour
+    rester sous FULL_SCAN_SHARE du temps), pour les modifications sur place. L'intervalle
+    entre deux scans vaut `timeout` après une activité et double à chaque
+    scan calme, jusqu'à `max_interval`. Un scan qui trouve plus de
+    `max_events` différences (`npm install`, changement de branche) émet un
+    seul `OverflowEvent` au lieu du détail.
+    """
+
+    def __init__(self, event_queue, watch, *, timeout=1.0, event_filter=None, max_interval=10.0,
+                 full_interval=30.0, hot_window=60.0, max_events=10000, prune_for=None):
+        super().__init__(event_queue, watch, timeout=timeout, event_filter=event_filter)
+        self.prune = prune_for(watch.path) if prune_for else None  # Dossiers à ne pas parcourir
+        self.max_interval = max_interval
+        self.full_interval = full_interval
+        self.hot_window = hot_window
+        self.max_events = max_events
+        self.interval = timeout
+        self.stats = {"dirs": 0, "listed": 0, "files": 0}  # Compteurs du dernier scan
+        self._dirs = {}  # chemin -> DirState
+        self._last_full = 0.0
+        self._full_every = full_interval
+        self._ready = False
+        self._silent = False
+        self._rescan = False
+
+    def queue_events(self, timeout):
+        if not self._ready:
+            self.baseline()  # Dans le thread de l'émetteur : le démarrage de l'observer n'attend pas le scan
+            return
+        if self.stopped_event.wait(self.interval):
+            return
+        full = time.monotonic() - self._last_full >= self._full_every
+        if self.scan(full):
+            self.interval = self.timeout
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+    def baseline(self):
+        """Premier scan complet, sans événement."""
+        self._silent = True
+        try:
+            self.scan(full=True)
+        finally:
+            self._silent = False
+        self._ready = True
+
+    def rescan(self):
+        """Les règles d'exclusion ont changé : les dossiers désormais écartés sont oubliés au prochain scan."""
+        self._rescan = True
+
+    def _emit(self, event):
+        if not self._silent:
+            self.queue_event(event)
+
+    def scan(self, full=False):
+        """Compare l'arbre au scan précédent et émet les différences. Retourne le nombre d'événements."""
+        now = time.monotonic()
+        if full:
+            self._last_full = now
+        self.stats = {"dirs": 0, "listed": 0, "files": 0}
+        count = self._scan(now, full)
+        if full:
+            self._full_every = max(self.full_interval, (time.monotonic() - now) / FULL_SCAN_SHARE)
+        return count
+
+    def _scan(self, now, full):
+        root = self.watch.path
+        if self._rescan:
+            self._rescan = False
+            for directory in [d for d in self._dirs if d != root and self.prune and self.prune(d)]:
+                self._dirs.pop(directory, None)
+        created, deleted, modified = [], {}, []  # Créations et suppressions appariées par inode en fin de scan
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            self.stats["dirs"] += 1
+            state = self._dirs.get(directory)
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                if directory == root:
+                    self._emit(DirDeletedEvent(root))
+                    self._dirs.clear()
+                    return 1
+                continue  # Disparu depuis le scan du parent : vu au prochain scan
+            if full or state is None or state.mtime_ns != mtime_ns:
+                current = self._list(directory, mtime_ns)
+                if current is None:
+                    continue
+                # Dossier inconnu hors du premier scan : nouveau, tout son contenu est créé
+                previous = state or (DirState(0, {}, {}) if not self._silent else None)
+                if previous is not None and self._diff(directory, previous, current, created, deleted, modified):
+                    current.active = now
+                elif state is not None:
+                    current.active = state.active
+                self._dirs[directory] = state = current
+            elif now - state.active < self.hot_window:
+                # Dossier actif : ses fichiers sont revus pour les modifications sur place
+                for name, entry in state.files.items():
+                    path = os.path.join(directory, name)
+                    self.stats["files"] += 1
+                    try:
+                        st = os.lstat(path)
+                    except OSError:
+                        continue  # Supprimé pendant le scan : le dossier aura changé au prochain passage
+                    if (st.st_ino, st.st_size, st.st_mtime_ns) != entry:
+                        state.files[name] = (st.st_ino, st.st_size, st.st_mtime_ns)
+                        modified.append(path)
+                        state.active = now
+
+            if self.watch.is_recursive:
+                for name in state.dirs:
+                    path = os.path.join(directory, name)
+                    if not (self.prune and self.prune(path)):
+                        stack.append(path)
+
+        return self._emit_changes(created, deleted, modified)
+
+    def _diff(self, directory, previous, current, created, deleted, modified):
+        """Ajoute les différences entre deux contenus d'un dossier. Retourne True s'il y en a."""
+        count = len(created) + len(deleted) + len(modified)
+        for name, entry in current.files.items():
+            old = previous.files.get(name)
+            if old is None:
+                created.append((os.path.join(directory, name), entry[0], False))
+            elif old != entry:
+                modified.append(os.path.join(directory, name))
+        for name, inode in current.dirs.items():
+            if name not in previous.dirs:
+                created.append((os.path.join(directory, name), inode, True))
+        for name, entry in previous.files.items():
+            if name not in current.files:
+                deleted[(entry[0], False)] = os.path.join(directory, name)
+        for name, inode in previous.dirs.items():
+            if name not in current.dirs:
+                deleted[(inode, True)] = os.path.join(directory, name)
+                self._forget(os.path.join(directory, name))
+        return len(created) + len(deleted) + len(modified) > count
+
+    def _list(self, directory, mtime_ns):
+        self.stats["listed"] += 1
+        files, dirs = {}, {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs[entry.name] = entry.inode()
+                        else:
+                            st = entry.stat(follow_symlinks=False)
+                            files[entry.name] = (st.st_ino, st.st_size, st.st_mtime_ns)
+                            self.stats["files"] += 1
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        if time.time_ns() - mtime_ns < RACY_NS:
+            mtime_ns = 0  # Date trop récente (résolution grossière) : le dossier sera relu au prochain scan
+        return DirState(mtime_ns, files, dirs)
+
+    def _forget(self, directory):
+        prefix = directory + os.sep
+        for path in [path for path in self._dirs if path == directory or path.startswith(prefix)]:
+            del self._dirs[path]
+
+    def _emit_changes(self, created, deleted, modified):
+        count = len(created) + len(deleted) + len(modified)
+        if self.max_events and count > self.max_events:
+            self._emit(OverflowEvent(self.watch.path))
+            return count
+        count = 0
+        moved_dirs = ()  # Le contenu d'un dossier déplacé est couvert par son DirMovedEvent
+        for path, inode, is_dir in created:
+            if path.startswith(moved_dirs):
+                continue
+            source = deleted.pop((inode, is_dir), None)
+            if source is not None:
+                self._emit(DirMovedEvent(source, path) if is_dir else FileMovedEvent(source, path))
+                if is_dir:
+                    moved_dirs += (path + os.sep,)
+            else:
+                self._emit(DirCreatedEvent(path) if is_dir else FileCreatedEvent(path))
+            count += 1
+        for (_, is_dir), path in deleted.items():
+            self._emit(DirDeletedEvent(path) if is_dir else FileDeletedEvent(path))
+            count += 1
+        for path in modified:
+            self._emit(FileModifiedEvent(path))
+            count += 1
+        return count
+
+
+class PruningObserver(BaseObserver):
+    """Observer dont chaque watch peut écarter des sous-dossiers avec un prédicat `prune(chemin)`.
+
+    Le prédicat passé à `schedule` est transmis à l'émetteur de la watch
+    (argument `prune_for`), qui ne descend pas dans les dossiers écartés.
+    """
+
+    def __init__(self, emitter_class, timeout=1.0):
+        self._prunes = {}  # chemin de la watch -> prédicat
+        super().__init__(partial(emitter_class, prune_for=self._prunes.get), timeout=timeout)
+
+    def schedule(self, event_handler, path, *, recursive=False, event_filter=None, prune=None):
+        with self._lock:
+            self._prunes[path] = prune
+            return super().schedule(event_handler, path, recursive=recursive, event_filter=event_filter)
+
+    def rescan(self, watch):
+        """Réapplique le prédicat de `watch` après un changement des règles d'exclusion."""
+        with self._lock:
+            emitter = self._emitter_for_watch.get(watch)
+        if emitter is not None:
+            emitter.rescan()
+
+
+class ScandirObserver(PruningObserver):
+    """Observer watchdog qui utilise `ScandirEmitter` pour chaque watch."""
+
+    def __init__(self, min_interval=1.0, max_interval=10.0, full_interval=30.0):
+        emitter_class = partial(ScandirEmitter, max_interval=max_interval, full_interval=full_interval)
+        super().__init__(emitter_class, timeout=min_interval)
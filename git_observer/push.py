@@ -0,0 +1,175 @@
+"""Pushs groupés, tolérants aux coupures réseau.
+
+Les commits restent locaux : chaque branche à pousser est notée dans une file
+persistante (.git/gitobserver/push-queue.json), puis poussée au plus tard
+`interval` secondes après le premier commit en attente. Un seul push envoie
+tous les commits accumulés sur la branche. En cas d'échec, le push est
+retenté avec un délai exponentiel ; la file survit aux redémarrages.
+"""
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from colorama import Fore, Style
+from .executor import CommitQueueFull, log_failure
+from .metrics import get_metrics
+
+QUEUE_FILE = "push-queue.json"
+# Messages de Git indiquant un dépôt distant injoignable (plutôt qu'un push refusé)
+UNREACHABLE_MARKERS = ("could not resolve host", "unable to access", "could not read from remote",
+                       "connection refused", "connection timed out", "does not appear to be a git repository",
+                       "network is unreachable", "operation timed out")
+
+
+class PushQueue:
+    """File persistante des branches à pousser : branche -> état du push en attente."""
+
+    def __init__(self, path):
+        self.path = path
+        self.branches = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.branches = json.load(f).get("branches", {})
+        except (OSError, ValueError):
+            self.branches = {}
+
+    def save(self):
+        """Écriture atomique : fichier temporaire puis remplacement."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"branches": self.branches}, f, indent=2)
+        os.replace(temporary, self.path)
+
+
+class PushScheduler:
+    """Regroupe les commits locaux en un push par branche et par intervalle, avec reprise sur erreur.
+
+    `enqueue` est appelé par le worker Git après un commit ; le push lui-même
+    est confié au même worker (clé du dépôt) quand l'échéance arrive, ce qui
+    le sérialise avec les commits.
+    """
+
+    def __init__(self, repo_path, git_dir, scheduler, executor, interval=30, min_backoff=5, max_backoff=900,
+                 timeout=120):
+        self.repo_path = repo_path
+        self.scheduler = scheduler
+        self.executor = executor
+        self.interval = interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout  # Durée maximale d'un `git push`
+        self.queue = PushQueue(os.path.join(git_dir, "gitobserver", QUEUE_FILE))
+        self._deadline = None
+        self._lock = threading.Lock()
+
+    def pending(self):
+        """Branches en attente de push."""
+        with self._lock:
+            return dict(self.queue.branches)
+
+    def enqueue(self, branch):
+        """Note qu'un commit de `branch` est à pousser et planifie le push groupé."""
+        with self._lock:
+            entry = self.queue.branches.setdefault(branch, {"queued_at": time.time(), "commits": 0, "attempts": 0})
+            entry["commits"] += 1
+            self.queue.save()
+            retrying = entry["attempts"] > 0
+        if not retrying:  # Un push en échec garde son délai de reprise
+            self._schedule(self.interval, earlier_only=True)
+
+    def resume(self):
+        """Reprend les pushs restés en file (au démarrage)."""
+        with self._lock:
+            branches = len(self.queue.branches)
+        if branches:
+            print(f"{Fore.YELLOW}📤 {branches} branche(s) en attente de push depuis la dernière session{Style.RESET_ALL}")
+            self._schedule(0)
+
+    def _schedule(self, delay, earlier_only=False):
+        with self._lock:
+            when = time.monotonic() + delay
+            if self._deadline is None:
+                self._deadline = self.scheduler.call_at(when, self._on_due)
+            elif not earlier_only or self._deadline.cancelled or when < self._deadline.when:
+                self.scheduler.move(self._deadline, when)
+
+    def _on_due(self):
+        future = self.executor.submit(self.push_pending, key=self.repo_path)
+        future.add_done_callback(log_failure("Erreur lors du push"))
+        if future.done() and isinstance(future.exception(), CommitQueueFull):
+            self._schedule(self.min_backoff)  # File Git pleine : nouvel essai plus tard
+
+    def push_pending(self):
+        """Pousse chaque branche en attente (sur le worker Git). Retourne True si tout est parti."""
+        with self._lock:
+            snapshot = {branch: dict(entry) for branch, entry in self.queue.branches.items()}
+        retry_delays = []
+        for branch, entry in snapshot.items():
+            error = self._push(branch)
+            with self._lock:
+                current = self.queue.branches.get(branch)
+                if current is None:
+                    continue
+                if error is None:
+                    if current["commits"] == entry["commits"]:
+                        del self.queue.branches[branch]
+                    else:
+                        current["attempts"] = 0  # Nouveaux commits arrivés pendant le push
+                        retry_delays.append(self.interval)
+                else:
+                    current["attempts"] = current.get("attempts", 0) + 1
+                    current["last_error"] = error
+                    retry_delays.append(self.backoff(current["attempts"]))
+                self.queue.save()
+        if retry_delays:
+            delay = min(retry_delays)
+            print(f"{Fore.YELLOW}🔁 Nouvel essai de push dans {delay:.0f} s{Style.RESET_ALL}")
+            self._schedule(delay)
+        return not retry_delays
+
+    def backoff(self, attempts):
+        """Délai exponentiel (avec un peu d'aléa) avant l'essai suivant."""
+        delay = min(self.max_backoff, self.min_backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.0)
+
+    def _upstream(self, branch):
+        """Dépôt distant et ref de destination de `branch` (configuration de suivi, sinon origin/<branche>)."""
+        def config(key):
+            return subprocess.run(["git", "config", "--get", key], cwd=self.repo_path,
+                                  capture_output=True, text=True).stdout.strip()
+        return config(f"branch.{branch}.remote") or "origin", config(f"branch.{branch}.merge") or f"refs/heads/{branch}"
+
+    def _push(self, branch):
+        """Pousse `branch`. Retourne None en cas de succès, sinon le message d'erreur."""
+        remote, destination = self._upstream(branch)
+        # Jamais de demande d'identifiants : le push tourne en arrière-plan
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        metrics = get_metrics()
+        try:
+            with metrics.timed("git_command_seconds", command="push"):
+                result = subprocess.run(["git", "push", "--quiet", remote, f"refs/heads/{branch}:{destination}"],
+                                        cwd=self.repo_path, capture_output=True, text=True, env=env, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            error = f"délai de {self.timeout} s dépassé"
+            outcome = "timeout"
+        else:
+            if result.returncode == 0:
+                print(f"{Fore.GREEN}🚀 Push réussi : {branch} -> {remote}{Style.RESET_ALL}")
+                metrics.inc("pushes_total", outcome="ok")
+                return None
+            error = result.stderr.strip() or f"code {result.returncode}"
+            outcome = "rejected"
+
+        if any(marker in error.lower() for marker in UNREACHABLE_MARKERS):
+            print(f"{Fore.YELLOW}📴 Dépôt distant {remote} injoignable, commits gardés en local{Style.RESET_ALL}")
+            outcome = "unreachable"
+        else:
+            print(f"{Fore.RED}❌ Push de {branch} refusé : {error}{Style.RESET_ALL}")
+        metrics.inc("pushes_total", outcome=outcome)
+        return error
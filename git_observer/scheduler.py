@@ -0,0 +1,215 @@
+import heapq
+import itertools
+import threading
+import time
+from colorama import Fore, Style
+
+
+class Deadline:
+    """Échéance planifiée ; peut être annulée ou déplacée à moindre coût."""
+
+    __slots__ = ("when", "callback", "args", "cancelled", "scheduler")
+
+    def __init__(self, scheduler, when, callback, args):
+        self.scheduler = scheduler
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    def move(self, delay):
+        """Reporte l'échéance à `delay` secondes à partir de maintenant."""
+        self.scheduler.move(self, time.monotonic() + delay)
+
+
+class DeadlineScheduler:
+    """Tas d'échéances servi par un seul thread qui dort jusqu'à la prochaine.
+
+    Annuler ou déplacer une échéance ne retire rien du tas : l'ancienne entrée
+    devient périmée et est ignorée à son tour (le tas est compacté quand les
+    entrées périmées deviennent majoritaires). Les callbacks s'exécutent sur le
+    thread du planificateur et doivent rester courts ; le travail long (Git,
+    dialogues) est confié au `CommitExecutor`.
+    """
+
+    def __init__(self, name="deadline-scheduler"):
+        self.name = name
+        self._heap = []  # (échéance, numéro, Deadline)
+        self._stale = 0
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def call_later(self, delay, callback, *args):
+        """Planifie `callback(*args)` dans `delay` secondes."""
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        """Planifie `callback(*args)` à l'instant `when` (horloge `time.monotonic`)."""
+        deadline = Deadline(self, when, callback, args)
+        with self._condition:
+            self._push(deadline)
+        return deadline
+
+    def move(self, deadline, when):
+        """Déplace une échéance (la réactive si elle avait été annulée ou déjà exécutée)."""
+        with self._condition:
+            if not deadline.cancelled:
+                self._stale += 1
+            deadline.when = when
+            deadline.cancelled = False
+            self._push(deadline)
+
+    def cancel(self, deadline):
+        with self._condition:
+            if not deadline.cancelled:
+                deadline.cancelled = True
+                self._stale += 1
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap) - self._stale
+
+    def _push(self, deadline):
+        heapq.heappush(self._heap, (deadline.when, next(self._counter), deadline))
+        if self._stale > 64 and self._stale * 2 > len(self._heap):
+            self._compact()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        # Ne réveille le thread que si la nouvelle échéance passe en tête
+        if self._heap[0][2] is deadline:
+            self._condition.notify()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if not entry[2].cancelled and entry[0] == entry[2].when]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _next_due(self):
+        """Retire et retourne l'échéance suivante si elle est due, sinon le délai d'attente."""
+        while self._heap:
+            when, _, deadline = self._heap[0]
+            if deadline.cancelled or when != deadline.when:
+                heapq.heappop(self._heap)
+                self._stale = max(self._stale - 1, 0)
+                continue
+            delay = when - time.monotonic()
+            if delay > 0:
+                return None, delay
+            heapq.heappop(self._heap)
+            deadline.cancelled = True  # Exécutée : un `move` ultérieur la réarme
+            return deadline, 0
+        return None, None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline, delay = self._next_due()
+                while deadline is None:
+                    if self._stopped:
+                        return
+                    self._condition.wait(delay)
+                    deadline, delay = self._next_due()
+            try:
+                deadline.callback(*deadline.args)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Erreur dans une tâche planifiée : {e}{Style.RESET_ALL}")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+
+class LoopScheduler:
+    """Même interface que `DeadlineScheduler`, servie par une boucle asyncio.
+
+    Utilisable depuis n'importe quel thread (observer, workers Git) : les
+    minuteries de la boucle sont armées via `call_soon_threadsafe`. Reculer une
+    échéance déjà armée ne touche pas la boucle ; la minuterie se réarme
+    elle-même à son déclenchement si l'échéance a été repoussée.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._armed = {}  # Deadline -> instant de la minuterie armée (None : armement en cours)
+        self._lock = threading.Lock()
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        deadline = Deadline(self, when, callback, args)
+        self.move(deadline, when)
+        return deadline
+
+    def move(self, deadline, when):
+        with self._lock:
+            deadline.when = when
+            deadline.cancelled = False
+            if deadline in self._armed:
+                armed = self._armed[deadline]
+                if armed is None or armed <= when:
+                    return  # Armement en cours, ou minuterie plus proche qui se réarmera
+            self._armed[deadline] = None
+        self.loop.call_soon_threadsafe(self._arm, deadline)
+
+    def cancel(self, deadline):
+        with self._lock:
+            deadline.cancelled = True  # La minuterie éventuelle se déclenchera à vide
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for deadline in self._armed if not deadline.cancelled)
+
+    def _arm(self, deadline):
+        with self._lock:
+            if deadline.cancelled:
+                self._armed.pop(deadline, None)
+                return
+            when = self._armed[deadline] = deadline.when
+        # `loop.time()` et `time.monotonic()` partagent la même horloge
+        self.loop.call_at(when, self._fire, deadline, when)
+
+    def _fire(self, deadline, armed_when):
+        with self._lock:
+            if self._armed.get(deadline) != armed_when:
+                return  # Minuterie remplacée par une plus proche
+            if deadline.cancelled:
+                del self._armed[deadline]
+                return
+            if deadline.when > self.loop.time():
+                self._armed[deadline] = None  # Échéance repoussée entre-temps
+                rearm = True
+            else:
+                del self._armed[deadline]
+                deadline.cancelled = True  # Exécutée : un `move` ultérieur la réarme
+                rearm = False
+        if rearm:
+            self._arm(deadline)
+            return
+        try:
+            deadline.callback(*deadline.args)
+        except Exception as e:
+            print(f"{Fore.RED}❌ Erreur dans une tâche planifiée : {e}{Style.RESET_ALL}")
+
+    def stop(self):
+        pass
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Retourne le planificateur partagé par tous les dépôts du processus."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = DeadlineScheduler()
+        return _default_scheduler
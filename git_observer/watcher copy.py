@@ -1,10 +1,11 @@
 import os
 import time
 import argparse
-import hashlib
 from watchdog.events import FileSystemEventHandler # type: ignore
 from colorama import Fore, Style
-from git_handler import git_commit_push
+from git_observer.git_handler import GitHandler, STAGE_ALL
+from git_observer.change_index import ChangeIndex
+from git_observer.commit_summary import FileChange, summarize
 from git_observer.utils import get_current_directory
 from watchdog.observers import Observer # type: ignore
 import threading
@@ -13,8 +14,13 @@ import threading
 MODE_AUTO = "auto"
 MODE_PATTERN = "pattern"
 
-# Liste des fichiers modifiés
+# Type de changement (lettre de `git diff --raw`) de chaque événement
+EVENT_KINDS = {"created": "A", "modified": "M", "moved": "M", "deleted": "D"}
+
+# Liste des fichiers modifiés (chemin -> type d'événement)
 MODIFIED_FILES = {}
+# Dernier état connu des fichiers, séparé des types d'événements
+CHANGE_INDEX = ChangeIndex()
 
 class GitAutoCommitHandler(FileSystemEventHandler):
     """Surveille les fichiers et déclenche des commits automatiques ou sur modification."""
@@ -26,6 +32,9 @@ class GitAutoCommitHandler(FileSystemEventHandler):
         self.commit_delay = commit_delay
         self.default_message = default_message
         self.last_commit_time = time.time()
+        # Les fichiers modifiés sont suivis ici : tout le dépôt est indexé au commit
+        self.git_handler = GitHandler()
+        self.git_handler.staging_mode = STAGE_ALL
 
 
     def on_any_event(self, event):
@@ -43,6 +52,7 @@ class GitAutoCommitHandler(FileSystemEventHandler):
                 print(f"{Fore.CYAN}📌 {event_type.upper()} : {file_path}{Style.RESET_ALL}")
 
         elif event_type == "deleted":
+            CHANGE_INDEX.forget(file_path)
             MODIFIED_FILES[file_path] = "deleted"
             print(f"{Fore.RED}🗑️ SUPPRIMÉ : {file_path}{Style.RESET_ALL}")
 
@@ -54,24 +64,10 @@ class GitAutoCommitHandler(FileSystemEventHandler):
 
 
     def is_file_modified(self, file_path):
-        """Vérifie si un fichier a réellement changé en comparant son hash."""
+        """Vérifie si un fichier a réellement changé (stat, puis hash par blocs si besoin)."""
         if not os.path.exists(file_path):
             return False
-
-        try:
-            with open(file_path, "rb") as f:
-                file_hash = hashlib.sha256(f.read()).hexdigest()
-
-            previous_hash = MODIFIED_FILES.get(file_path, None)
-            
-            if file_hash != previous_hash:
-                MODIFIED_FILES[file_path] = file_hash
-                return True
-            
-        except Exception as e:
-            print(f"{Fore.YELLOW}⚠️ Erreur analyse fichier : {e}{Style.RESET_ALL}")
-            print(f"{Fore.YELLOW}⚠️ Fichier non trouvé : {file_path}{Style.RESET_ALL}")
-            return False
+        return CHANGE_INDEX.has_changed(file_path)
 
 
     def try_commit(self):
@@ -146,27 +142,18 @@ class GitAutoCommitHandler(FileSystemEventHandler):
         
         commit_message = self.default_message if self.default_message else self.generate_commit_message()
         
-        git_commit_push(commit_message)
+        self.git_handler.git_commit_push(commit_message)
         MODIFIED_FILES.clear()
         self.last_commit_time = time.time()
 
 
     def generate_commit_message(self):
-        """Génère un message de commit basé sur les modifications détectées."""
+        """Génère un message de commit borné (regroupé par dossier) à partir des modifications détectées."""
         
-        created = [f for f, t in MODIFIED_FILES.items() if t == "created"]
-        modified = [f for f, t in MODIFIED_FILES.items() if t == "modified"]
-        deleted = [f for f, t in MODIFIED_FILES.items() if t == "deleted"]
-
-        parts = []
-        if created:
-            parts.append(f"Ajouté : {', '.join(os.path.basename(f) for f in created)}{Style.RESET_ALL}")
-        if modified:
-            parts.append(f"Modifié : {', '.join(os.path.basename(f) for f in modified)}{Style.RESET_ALL}")
-        if deleted:
-            parts.append(f"Supprimé : {', '.join(os.path.basename(f) for f in deleted)}{Style.RESET_ALL}")
-
-        return " | ".join(parts) if parts else "Mise à jour automatique"
+        root = get_current_directory()
+        changes = [FileChange(EVENT_KINDS.get(event_type, "M"), os.path.relpath(path, root).replace(os.sep, "/"))
+                   for path, event_type in MODIFIED_FILES.items()]
+        return summarize(changes)
 
 
 def parse_arguments():
@@ -1,97 +1,465 @@
-import time
+import argparse
+import asyncio
+import threading
 import os
-import subprocess
-from watchdog.observers import Observer #type: ignore
-from watchdog.events import FileSystemEventHandler #type: ignore
+import sys
+from watchdog.events import (FileSystemEventHandler, FileCreatedEvent, DirCreatedEvent, FileModifiedEvent,  #type: ignore
+                             FileDeletedEvent, DirDeletedEvent, FileMovedEvent, DirMovedEvent)
 from colorama import Fore, Style
-from .git_handler import GitHandler
+from .commit_guard import parse_policy
+from .console import ConsoleSession
+from .debounce import CommitCoalescer
+from .executor import CommitQueueFull, log_failure
+from .git_handler import GitHandler, STAGE_ALL
+from .fsmonitor import FsmonitorServer
+from .ignore import IgnoreMatcher
+from .metrics import start_exporters
+from .notification import Notifier, parse_backend_names
+from .polling import OverflowEvent, PruningObserver, ScandirObserver, WATCH_LIMIT_ERRORS, polling_reason
+from .scheduler import LoopScheduler
 from .utils import get_current_directory
 
+if sys.platform.startswith("linux"):
+    # Une instance inotify par dépôt, élaguée des dossiers ignorés
+    from .inotify import PrunedInotifyObserver as NativeObserver
+else:
+    from watchdog.observers import Observer as NativeObserver  # type: ignore
+
+# Événements utiles au watcher : les ouvertures/fermetures de fichiers (lectures de Git,
+# des éditeurs...) ne sont pas demandées au noyau
+WATCHED_EVENTS = [FileCreatedEvent, DirCreatedEvent, FileModifiedEvent, FileDeletedEvent,
+                  DirDeletedEvent, FileMovedEvent, DirMovedEvent, OverflowEvent]
+
 class GitAutoCommitHandler(FileSystemEventHandler):
     """Classe qui écoute les modifications et pousse les commits automatiquement."""
     
-    def __init__(self):
+    def __init__(self, quiet_period=2.0, max_wait=30.0, git_handler=None, loop=None):
         super().__init__()
-        self.git_handler = GitHandler()
-        self.git_handler.start_notification_thread()  # Démarrage du thread de notification
+        if git_handler is None:
+            git_handler = GitHandler()
+            git_handler.enable_reminders()  # Rappel de commit après NOTIFICATION_DELAY sans commit
+        self.git_handler = git_handler
+        # Les rafales d'événements (sauvegarde, formateur, checkout...) sont regroupées en un seul lot
+        self.coalescer = CommitCoalescer(self.on_batch_ready, quiet_period=quiet_period, max_wait=max_wait,
+                                         scheduler=git_handler.scheduler, metrics_label=git_handler.metrics_label)
+        # Règles .gitignore / info/exclude / exclusions globales compilées une seule fois
+        self.ignore_matcher = IgnoreMatcher(self.git_handler.get_repo_root(), self.git_handler.get_git_dir())
+        self.watch_scheduler = None  # Renseigné par attach
+        self.fsmonitor = None  # Serveur du hook core.fsmonitor, renseigné par attach
+        self.loop = loop  # Boucle asyncio du watcher : les réconciliations y tournent en sous-processus asyncio
+        self.change_listeners = []  # Appelés à chaque modification retenue (thread de l'observer)
+        self._reconcile_deadline = None  # Prochaine réconciliation périodique
+        self._overflow_reconcile = False  # Réconciliation déjà demandée après un débordement
+        self._recorded = 0  # Modifications retenues : un événement qui n'en ajoute aucune a été filtré
+        self._lock = threading.Lock()
+
+    def attach(self, observer, watched_dir, fsmonitor_listener=None):
+        """Installe les watches du dépôt sur `observer` et démarre son serveur fsmonitor.
+
+        Retourne le nombre de watches installées.
+        """
+        # Journal des modifications servi au hook core.fsmonitor (`python -m git_observer.fsmonitor enable`)
+        self.fsmonitor = FsmonitorServer(self.git_handler.get_repo_root(), self.git_handler.get_git_dir(),
+                                         check_watches=self.check_tracked_watches)
+        self.ignore_matcher.keep_dir(self.fsmonitor.cookie_dir)
+
+        # Les dossiers ignorés (build/, .venv/, node_modules/...) ne sont pas surveillés,
+        # sauf ceux qui contiennent des fichiers suivis
+        self.watch_scheduler = WatchScheduler(observer, self, self.ignore_matcher, watched_dir)
+        watch_count = self.watch_scheduler.refresh()
+        self.fsmonitor.start(fsmonitor_listener)
+        return watch_count
+
+    def detach(self):
+        """Arrête le serveur fsmonitor et les réconciliations périodiques du dépôt."""
+        with self._lock:
+            if self._reconcile_deadline is not None:
+                self._reconcile_deadline.cancel()
+        if self.fsmonitor:
+            self.fsmonitor.stop()
+
+    def reconcile(self):
+        """Réconciliation complète avec `git status` (exécutée sur le worker Git du dépôt)."""
+        with self._lock:
+            self._overflow_reconcile = False
+        self.refresh_watches()
+        changed = self.git_handler.reconcile_status()
+        self.reconcile_again_if_overflowed()
+        return changed
+
+    async def reconcile_async(self):
+        """Réconciliation complète sur la boucle asyncio, sans occuper le worker Git."""
+        with self._lock:
+            self._overflow_reconcile = False
+        # Les règles d'exclusion et les fichiers suivis sont relus par des
+        # processus Git synchrones : hors de la boucle, dans un thread du pool par défaut
+        await asyncio.get_running_loop().run_in_executor(None, self.refresh_watches)
+        changed = await self.git_handler.reconcile_status_async()
+        self.reconcile_again_if_overflowed()
+        self.notify_listeners()
+        return changed
+
+    def refresh_watches(self):
+        """Relit les règles d'exclusion et les fichiers suivis, puis ajuste les watches si besoin."""
+        if self.ignore_matcher.refresh_if_changed() and self.watch_scheduler:
+            self.watch_scheduler.refresh()
+        self.check_tracked_watches()
+
+    def reconcile_again_if_overflowed(self):
+        """Des événements sont arrivés pendant une réconciliation en débordement : elle est relancée."""
+        if self.git_handler.dirty_set.overflowed:
+            self.request_overflow_reconcile()
+
+    def request_reconcile(self):
+        """Lance une réconciliation (boucle asyncio ou worker Git du dépôt) et retourne son `Future`."""
+        if self.loop is not None:
+            future = asyncio.run_coroutine_threadsafe(self.reconcile_async(), self.loop)
+        else:
+            future = self.git_handler.executor.submit(self.reconcile, key=self.git_handler.repo_path)
+        future.add_done_callback(log_failure("Erreur lors de la réconciliation"))
+        return future
+
+    def check_tracked_watches(self):
+        """Surveille les dossiers ignorés où des fichiers suivis sont apparus (`git add -f`).
+
+        Retourne False si les watches ont changé : les modifications
+        antérieures de ces fichiers n'ont pas été vues.
+        """
+        if not self.ignore_matcher.refresh_tracked():
+            return True
+        if self.watch_scheduler:
+            self.watch_scheduler.refresh()
+        return False
+
+    def restore_journal(self):
+        """Restaure les chemins modifiés de la session précédente depuis le journal, sur le worker Git.
+
+        L'observer tourne déjà : la lecture de HEAD passe par les sessions de
+        plomberie, qui ne servent qu'un thread à la fois. Retourne un `Future`
+        du nombre de chemins restaurés, ou de None si une réconciliation
+        complète doit être attendue (pas de journal ou premier démarrage).
+        """
+        future = self.git_handler.executor.submit(self._restore_journal, key=self.git_handler.repo_path)
+        future.add_done_callback(log_failure("Erreur lors de la restauration du journal"))
+        return future
+
+    def _restore_journal(self):
+        restored = self.git_handler.restore_journal(self.ignore_matcher)
+        if self.git_handler.journal is not None:
+            self.save_journal()  # Instantané des dossiers renouvelé pour le prochain démarrage
+        return restored
+
+    def save_journal(self):
+        self.git_handler.save_journal_dirs(self.ignore_matcher)
+
+    def notify_listeners(self):
+        for listener in self.change_listeners:
+            listener()
+
+    def schedule_reconciliation(self):
+        """Planifie une réconciliation toutes les RECONCILE_INTERVAL secondes."""
+        with self._lock:
+            if self._reconcile_deadline is None:
+                self._reconcile_deadline = self.git_handler.scheduler.call_later(
+                    self.git_handler.RECONCILE_INTERVAL, self._on_reconcile_due)
+            else:
+                self._reconcile_deadline.move(self.git_handler.RECONCILE_INTERVAL)
+
+    def _on_reconcile_due(self):
+        self.request_reconcile()
+        self.schedule_reconciliation()
+
+    def is_excluded(self, path, is_dir=None):
+        """Indique si un chemin doit être ignoré (.git et règles d'exclusion de Git)."""
+        return self.ignore_matcher.is_ignored(path, is_dir)
+
+    def dispatch(self, event):
+        """Alimente le journal fsmonitor avant le traitement habituel (sauf cookies de synchronisation)."""
+        metrics, repo = self.git_handler.metrics, self.git_handler.metrics_label
+        metrics.inc("events_received_total", repo=repo, type=event.event_type)
+        recorded = self._recorded
+        if not (self.fsmonitor and self.fsmonitor.on_event(event)):
+            super().dispatch(event)
+        if self._recorded == recorded:
+            metrics.inc("events_filtered_total", repo=repo, type=event.event_type)
+
+    def on_any_event(self, event):
+        """Recharge les règles d'exclusion lorsqu'un fichier .gitignore change."""
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return  # Ouvertures/fermetures : le matcher lit lui-même les .gitignore
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(path and self.ignore_matcher.is_ignore_file(path) for path in paths):
+            print(f"{Fore.MAGENTA}🔁 Règles d'exclusion rechargées{Style.RESET_ALL}")
+            self.ignore_matcher.reload()
+            if self.watch_scheduler:
+                self.watch_scheduler.refresh()
+
+    def record_change(self, path, event_type):
+        """Ajoute un chemin à l'ensemble des fichiers modifiés et à la fenêtre de regroupement."""
+        dirty_set = self.git_handler.dirty_set
+        dirty_set.add(path, event_type)
+        self._recorded += 1
+        self.git_handler.update_modification_time()
+        self.git_handler.journal_change(path, event_type)
+        self.coalescer.add(path, event_type)
+        self.notify_listeners()
+        # Trop de chemins pour l'ensemble : réconciliation immédiate
+        if dirty_set.overflowed:
+            self.request_overflow_reconcile()
+
+    def on_overflow(self, event):
+        """L'observer a perdu des événements (file inotify pleine, limite de watches, scan trop chargé)."""
+        print(f"{Fore.YELLOW}⚠️ Événements perdus sous {event.src_path} : réconciliation complète{Style.RESET_ALL}")
+        self._recorded += 1
+        self.git_handler.metrics.inc("event_overflows_total", repo=self.git_handler.metrics_label)
+        self.git_handler.dirty_set.mark_overflow()
+        self.git_handler.update_modification_time()
+        self.notify_listeners()
+        self.request_overflow_reconcile()
+
+    def request_overflow_reconcile(self):
+        """Réconciliation immédiate après un débordement, une seule à la fois."""
+        with self._lock:
+            if self._overflow_reconcile:
+                return
+            self._overflow_reconcile = True
+        self.request_reconcile().add_done_callback(self._on_overflow_reconcile_done)
+
+    def _on_overflow_reconcile_done(self, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                self._overflow_reconcile = False  # Non faite (file pleine, erreur) : le prochain débordement la redemande
+
+    def on_batch_ready(self, batch):
+        """Fin d'une fenêtre de regroupement : le lot est traité par le worker Git du dépôt."""
+        future = self.git_handler.executor.submit(self.commit_batch, batch, key=self.git_handler.repo_path)
+        future.add_done_callback(log_failure("Erreur lors du traitement du lot"))
+        future.add_done_callback(lambda done: self._on_batch_done(batch, done))
+
+    def _on_batch_done(self, batch, future):
+        """Lot refusé par une file Git pleine : ses chemins repartent dans une prochaine fenêtre."""
+        if future.cancelled() or not isinstance(future.exception(), CommitQueueFull):
+            return
+        for path, event_type in batch.paths.items():
+            self.git_handler.dirty_set.add(path, event_type)
+            self.coalescer.add(path, event_type)
+
+    def commit_batch(self, batch):
+        """Traite un lot d'événements regroupés (sur le worker Git).
+
+        Un seul commit si un message est trouvé, sinon un checkpoint si ce mode est activé.
+        """
+        # Les sauvegardes sans changement de contenu ne donnent ni recherche de marqueur ni checkpoint
+        modified = [path for path, event_type in batch.paths.items() if event_type == "modified"]
+        touched = set(modified) - set(self.git_handler.filter_changes(modified)) if modified else set()
+        paths = {path: event_type for path, event_type in batch.paths.items() if path not in touched}
+        if not paths:
+            print(f"{Fore.BLUE}💤 {len(touched)} fichier(s) sauvegardé(s) sans changement{Style.RESET_ALL}")
+            return
+
+        commit_message = None
+        for file_path, event_type in paths.items():
+            if event_type == "deleted":
+                self.git_handler.marker_scanner.forget(file_path)
+                self.git_handler.change_index.forget(file_path)
+                continue
+            commit_message = self.git_handler.extract_commit_message(file_path) or commit_message
+
+        if commit_message:
+            print(f"{Fore.BLUE}📦 {batch.event_count} événement(s) regroupé(s) sur {len(batch.paths)} fichier(s){Style.RESET_ALL}")
+            self.git_handler.git_commit_push(commit_message)
+        elif self.git_handler.checkpoints:
+            self.git_handler.checkpoint(list(paths))
+
+    def on_created(self, event):
+        """Déclenché lorsqu'un fichier ou un dossier est créé."""
+        if self.is_excluded(event.src_path, event.is_directory):
+            return
+        if not event.is_directory:
+            self.record_change(event.src_path, "created")
+
+    def on_deleted(self, event):
+        """Déclenché lorsqu'un fichier ou un dossier est supprimé."""
+        if not self.is_excluded(event.src_path, event.is_directory):
+            self.record_change(event.src_path, "deleted")
+
+    def on_moved(self, event):
+        """Déclenché lorsqu'un fichier ou un dossier est déplacé."""
+        if not self.is_excluded(event.src_path, event.is_directory):
+            self.record_change(event.src_path, "deleted")
+        if not self.is_excluded(event.dest_path, event.is_directory):
+            self.record_change(event.dest_path, "created")
 
     def on_modified(self, event):
         """Déclenché lorsqu'un fichier est modifié."""
-        if event.is_directory or any(excluded in event.src_path for excluded in [".git", "node_modules"]) or os.path.basename(event.src_path).startswith("."):
-            return  # Ignore les dossiers et fichiers cachés
+        if event.is_directory or self.is_excluded(event.src_path, False):
+            return  # Ignore les dossiers et les fichiers exclus par Git
+        if self.git_handler.change_index.stat_unchanged(event.src_path):
+            return  # Même `stat` qu'au dernier passage, relevé hors fenêtre racy : événement en double
 
         file_path = event.src_path
         print(f"{Fore.CYAN}🔄 Fichier modifié : {file_path}{Style.RESET_ALL}")
 
-        # Met à jour le temps de la dernière modification
-        self.git_handler.update_modification_time()
+        # Ajoute le fichier à l'ensemble des modifications et met à jour le temps de la dernière modification.
+        # La recherche de `commit_name=` est faite une seule fois par fichier, à la fin de la fenêtre.
+        self.record_change(file_path, "modified")
 
-        commit_message = self.git_handler.extract_commit_message(file_path)
-        if commit_message:
-            self.git_handler.git_commit_push(commit_message)
+class WatchScheduler:
+    """Installe la watch récursive du dépôt, sans descendre dans les sous-arbres ignorés.
 
-def start_watcher():
-    """Démarre la surveillance du dossier"""
+    Une seule watch par dépôt : avec un `PruningObserver` (inotify, scan),
+    l'émetteur écarte lui-même les dossiers que `IgnoreMatcher.is_dir_pruned`
+    désigne (`.git` hors dossier des cookies, dossiers ignorés sans fichier
+    suivi), aussi pour les dossiers créés ensuite. Les autres observers surveillent tout
+    l'arbre ; les événements ignorés sont filtrés par le gestionnaire.
+    """
+
+    def __init__(self, observer, event_handler, matcher, root):
+        self.observer = observer
+        self.root = root
+        self.event_handler = event_handler
+        self.matcher = matcher
+        self._watch = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Installe la watch, ou applique un changement des règles d'exclusion. Retourne le nombre de watches."""
+        pruning = isinstance(self.observer, PruningObserver)
+        with self._lock:
+            if self._watch is None:
+                options = {"prune": self.matcher.is_dir_pruned} if pruning else {}
+                self._watch = self.observer.schedule(self.event_handler, self.root, recursive=True,
+                                                     event_filter=WATCHED_EVENTS, **options)
+            elif pruning:
+                self.observer.rescan(self._watch)
+        return 1
+
+def start_observer(event_handler, watched_dir, backend="auto", fsmonitor_listener=None):
+    """Installe les watches du dépôt et démarre l'observer. Retourne (observer, nombre de watches).
+
+    `backend` : "native" (watchdog), "polling" (scan `os.scandir`) ou "auto" :
+    natif, sauf sur un système de fichiers réseau ou si les watches natives
+    échouent (limites inotify atteintes).
+    """
+    reason = None
+    if backend == "polling":
+        reason = "demandé"
+    elif backend == "auto":
+        reason = polling_reason(watched_dir)
+
+    if reason is None:
+        observer = NativeObserver()
+        watch_count = event_handler.attach(observer, watched_dir, fsmonitor_listener)
+        try:
+            observer.start()
+            return observer, watch_count
+        except OSError as e:
+            if backend != "auto" or e.errno not in WATCH_LIMIT_ERRORS:
+                raise
+            observer.unschedule_all()
+            event_handler.detach()
+            reason = str(e)
+
+    print(f"{Fore.YELLOW}🐢 Surveillance par scan des dossiers : {reason}{Style.RESET_ALL}")
+    observer = ScandirObserver()
+    watch_count = event_handler.attach(observer, watched_dir, fsmonitor_listener)
+    observer.start()
+    return observer, watch_count
+
+def parse_arguments():
+    """Analyse les arguments CLI pour configurer le comportement."""
+    parser = argparse.ArgumentParser(description="Surveille un dossier et effectue des commits sur demande.")
+    parser.add_argument("--reconcile-interval", type=int, default=300, help="Intervalle en secondes entre deux réconciliations complètes avec `git status`.")
+    parser.add_argument("--quiet-period", type=float, default=2.0, help="Secondes sans événement avant de traiter une rafale.")
+    parser.add_argument("--stage-all", action="store_true", help="Indexe tout l'arbre avec `git add .` au lieu des seuls fichiers modifiés.")
+    parser.add_argument("--max-wait", type=float, default=30.0, help="Attente maximale en secondes avant de traiter une rafale continue.")
+    parser.add_argument("--porcelain", action="store_true", help="Committe avec `git add` / `git commit` plutôt qu'avec la session de plomberie persistante.")
+    parser.add_argument("--checkpoint", action="store_true", help="Enregistre un checkpoint sous refs/gitobserver/<branche> pour chaque rafale sans message.")
+    parser.add_argument("--squash-interval", type=float, default=0, help="Secondes avant de regrouper les checkpoints en un commit poussé (0 : au prochain message uniquement).")
+    parser.add_argument("--push-interval", type=float, default=30, help="Secondes pendant lesquelles les commits s'accumulent avant un push groupé.")
+    parser.add_argument("--no-journal", action="store_true", help="Désactive le journal des fichiers modifiés (.git/gitobserver/dirty.journal) : réconciliation complète à chaque démarrage.")
+    parser.add_argument("--backend", choices=["auto", "native", "polling"], default="auto", help="Surveillance native (inotify...), par scan des dossiers, ou auto : scan sur les systèmes de fichiers réseau et si les limites de watches sont atteintes.")
+    parser.add_argument("--no-guard", action="store_true", help="Désactive le contrôle des fichiers avant commit (taille, binaires, secrets).")
+    parser.add_argument("--max-file-size", type=float, default=50, help="Taille maximale en Mio d'un fichier committé (0 : pas de limite).")
+    parser.add_argument("--guard-policy", type=str, default="", help="Politique par raison, par exemple size=hold,binary=exclude,secret=hold (allow, hold ou exclude).")
+    parser.add_argument("--secret-pattern", action="append", default=[], help="Expression régulière supplémentaire signalant un secret (option répétable).")
+    parser.add_argument("--metrics-file", type=str, default=None, help="Écrit les métriques périodiquement dans ce fichier (JSON si l'extension est .json, sinon format texte Prometheus).")
+    parser.add_argument("--metrics-interval", type=float, default=15, help="Secondes entre deux écritures du fichier de métriques.")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Sert /metrics, /metrics.json (GET) et /profile/start|stop (POST) sur 127.0.0.1:<port>.")
+    parser.add_argument("--notify", type=str, default="auto", help="Backends de rappel séparés par des virgules : toast, tk, console, headless (auto par défaut).")
+
+    return parser.parse_args()
+
+async def watch(args):
+    """Boucle asyncio du watcher.
+
+    Les événements watchdog sont filtrés sur le thread de l'observer puis
+    signalés à la boucle par `call_soon_threadsafe` ; les échéances (rappel,
+    regroupement, réconciliation) sont des minuteries de la boucle, `git
+    status` y tourne en sous-processus asyncio et les commits sont attendus
+    sur le worker Git. La saisie de stdin ne bloque rien de tout cela.
+    """
+    loop = asyncio.get_running_loop()
     watched_dir = get_current_directory()
     print(f"{Fore.MAGENTA}👀 Surveillance du dossier : {watched_dir}{Style.RESET_ALL}")
-    
-    event_handler = GitAutoCommitHandler()
-    observer = Observer()
-    observer.schedule(event_handler, watched_dir, recursive=True)
-    
-    # Variables pour suivre l'état
-    last_modification_time = 0
-    last_status = None
-    prompt_shown = False
-    
+
+    console = ConsoleSession(loop)
+    git_handler = GitHandler(scheduler=LoopScheduler(loop),
+                             notifier=Notifier(parse_backend_names(args.notify), readline=console.readline))
+    git_handler.RECONCILE_INTERVAL = args.reconcile_interval
+    if args.stage_all:
+        git_handler.staging_mode = STAGE_ALL
+    git_handler.use_plumbing = not args.porcelain
+    git_handler.checkpoints = args.checkpoint
+    git_handler.SQUASH_INTERVAL = args.squash_interval
+    git_handler.PUSH_INTERVAL = args.push_interval
+    if not args.no_journal:
+        git_handler.enable_journal()
+    if not args.no_guard:
+        git_handler.enable_guard(max_size=int(args.max_file_size * 1024 * 1024), policy=parse_policy(args.guard_policy),
+                                 secret_patterns=args.secret_pattern)
+    git_handler.enable_reminders()  # Rappel de commit après NOTIFICATION_DELAY sans commit
+
+    event_handler = GitAutoCommitHandler(quiet_period=args.quiet_period, max_wait=args.max_wait,
+                                         git_handler=git_handler, loop=loop)
+    event_handler.change_listeners.append(console.notify_change)
+    observer, watch_count = start_observer(event_handler, watched_dir, args.backend)
+    print(f"{Fore.MAGENTA}📁 {watch_count} watch(es) installée(s), sous-arbres ignorés exclus{Style.RESET_ALL}")
+    # Profils (SIGUSR2) écrits à côté du journal, sous .git/gitobserver
+    exporters = start_exporters(git_handler.metrics, args.metrics_file, args.metrics_interval, args.metrics_port,
+                                os.path.join(git_handler.get_git_dir(), "gitobserver"), git_handler.scheduler)
+
     try:
-        observer.start()
-        while True:
-            # Vérifie s'il y a des modifications
-            status_output = subprocess.run(["git", "status", "--porcelain"], 
-                                        capture_output=True, 
-                                        text=True).stdout.strip()
-            
-            current_time = time.time()
-            
-            # Affiche le prompt uniquement si:
-            # 1. Il y a des modifications
-            # 2. Au moins 2 secondes se sont écoulées depuis la dernière modification
-            # 3. Le prompt n'a pas déjà été affiché
-            if (status_output and 
-                current_time - last_modification_time > 2 and 
-                not prompt_shown):
-                print(f"\n{Fore.CYAN}💡 Vous pouvez entrer un message de commit : {Style.RESET_ALL}", end='', flush=True)
-                message = input()
-                if message and not message.startswith("[main"):
-                    event_handler.git_handler.git_commit_push(message)
-                prompt_shown = True
-            
-            # Met à jour les variables de suivi
-            if status_output != last_status:
-                last_status = status_output
-                last_modification_time = current_time
-                prompt_shown = False
-            
-            time.sleep(1)
-            
-    except KeyboardInterrupt:
+        # État initial : le journal de la session précédente, sinon une réconciliation complète attendue.
+        # Les modifications sur place pendant l'arrêt ne changent pas la date des dossiers : la réconciliation
+        # tourne alors en arrière-plan pour les rattraper.
+        if await asyncio.wrap_future(event_handler.restore_journal()) is None:
+            await event_handler.reconcile_async()
+        else:
+            event_handler.request_reconcile()
+        event_handler.schedule_reconciliation()
+        git_handler.resume_pushes()
+        console.start(git_handler)
+        await console.prompt_loop()
+    finally:
         print(f"\n{Fore.YELLOW}🛑 Arrêt de la surveillance...{Style.RESET_ALL}")
+        console.close()
         observer.stop()
-    observer.join()
-
-def input_with_timeout():
-    """Permet de recevoir une entrée utilisateur sans bloquer le programme"""
-    import sys
-    import select
-
-    # Vérifie si des données sont disponibles sur stdin
-    if sys.platform == 'win32':
-        import msvcrt
-        if msvcrt.kbhit():
-            return input(f"{Fore.GREEN}✏️ Entrez votre message de commit : {Style.RESET_ALL}")
-    else:
-        # Pour Linux/Mac
-        if select.select([sys.stdin], [], [], 0.0)[0]:
-            return input(f"{Fore.GREEN}✏️ Entrez votre message de commit : {Style.RESET_ALL}")
-    return None
+        observer.join()
+        event_handler.detach()
+        git_handler.executor.shutdown()
+        event_handler.save_journal()
+        git_handler.change_index.close()
+        git_handler.close_plumbing()
+        if git_handler.guard is not None:
+            git_handler.guard.close()
+        for exporter in exporters:
+            exporter.stop()
+
+def start_watcher():
+    """Démarre la surveillance du dossier"""
+    args = parse_arguments()
+    try:
+        asyncio.run(watch(args))
+    except KeyboardInterrupt:
+        pass  # Arrêt déjà signalé par `watch`
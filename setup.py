@@ -13,17 +13,18 @@ setup(
     install_requires=[
         "watchdog",
         "colorama",
-        "win10toast"
+        "win10toast; platform_system == 'Windows'"
     ],
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.9",
     entry_points={
         "console_scripts": [
             "git_observer=git_observer.main:start_watcher",
+            "git_observer_daemon=git_observer.daemon:start_daemon",
         ],
     },
 )
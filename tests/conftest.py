@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import subprocess
+import pytest
+
+
+def git(cwd, *args):
+    """Lance une commande Git et retourne sa sortie texte."""
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def load_alternate_watcher():
+    """Charge `watcher copy.py` (nom de fichier non importable) comme module."""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "git_observer", "watcher copy.py")
+    spec = importlib.util.spec_from_file_location("git_observer.watcher_copy", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Dépôt sur la branche `main` avec un premier commit, isolé de la configuration Git de la machine."""
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", os.devnull)
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    path = str(tmp_path / "repo")
+    os.makedirs(path)
+    git(path, "init", "-q")
+    git(path, "symbolic-ref", "HEAD", "refs/heads/main")
+    git(path, "config", "user.name", "Test")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "commit.gpgsign", "false")
+    write(os.path.join(path, "README.md"), "début\n")
+    git(path, "add", "README.md")
+    git(path, "commit", "-q", "-m", "init")
+    return path
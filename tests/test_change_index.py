@@ -0,0 +1,111 @@
+import os
+import time
+import pytest
+from git_observer.change_index import ChangeIndex
+from git_observer.polling import RACY_NS
+from .conftest import git, load_alternate_watcher, write
+
+
+@pytest.fixture
+def index():
+    index = ChangeIndex(parallel_threshold=4)
+    yield index
+    index.close()
+
+
+def age(path, seconds=10):
+    """Recule la mtime hors de la fenêtre racy."""
+    past = time.time_ns() - seconds * 10**9
+    os.utime(path, ns=(past, past))
+
+
+def test_touch_without_content_change_is_filtered(tmp_path, index):
+    path = str(tmp_path / "a.txt")
+    write(path, "a\n")
+    assert index.has_changed(path)  # Inconnu sans référence : modifié
+    os.utime(path)
+    assert not index.has_changed(path)  # `touch` : même contenu
+    write(path, "b\n")
+    assert index.has_changed(path)
+
+
+def test_baseline_marks_head_content_unchanged(repo, index):
+    readme = os.path.join(repo, "README.md")
+    head = git(repo, "rev-parse", "HEAD:README.md")
+    assert not index.has_changed(readme, baseline=lambda path: head)
+    write(readme, "modifié\n")
+    assert index.has_changed(readme, baseline=lambda path: head)
+
+
+def test_deleted_path_is_changed_and_forgotten(tmp_path, index):
+    path = str(tmp_path / "a.txt")
+    write(path, "a\n")
+    index.has_changed(path)
+    os.remove(path)
+    assert index.has_changed(path)
+    assert index.digest(path) is None
+
+
+def test_mode_change_is_a_change(tmp_path, index):
+    path = str(tmp_path / "run.sh")
+    write(path, "echo\n")
+    index.has_changed(path)
+    os.chmod(path, 0o755)
+    assert index.has_changed(path)
+
+
+def test_racy_entry_is_not_trusted_by_stat(tmp_path, index):
+    path = str(tmp_path / "a.txt")
+    write(path, "a\n")
+    index.has_changed(path)
+    # Relevé dans la fenêtre racy : le même `stat` ne prouve rien, l'événement est traité
+    assert not index.stat_unchanged(path)
+
+    age(path, seconds=2 * RACY_NS // 10**9)
+    index.has_changed(path)  # Relevé hors de la fenêtre
+    assert index.stat_unchanged(path)
+
+
+def test_racy_write_with_same_stat_is_still_detected(tmp_path, index):
+    path = str(tmp_path / "a.txt")
+    write(path, "a\n")
+    st = os.stat(path)
+    index.has_changed(path)
+    write(path, "b\n")  # Même taille ; la mtime est remise à l'identique
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert index.has_changed(path)
+
+
+def test_large_batches_are_hashed_on_the_pool(tmp_path, index):
+    paths = [str(tmp_path / f"f{i}.txt") for i in range(10)]
+    for path in paths:
+        write(path, path)
+    assert index.filter_changed(paths) == paths
+    assert index._pool is not None
+    for path in paths:
+        os.utime(path)
+    assert index.filter_changed(paths) == []
+
+
+def test_index_is_bounded(tmp_path):
+    index = ChangeIndex(max_entries=2)
+    paths = [str(tmp_path / f"f{i}.txt") for i in range(3)]
+    for path in paths:
+        write(path, path)
+        index.has_changed(path)
+    assert len(index) == 2
+    assert index.digest(paths[0]) is None
+
+
+def test_alternate_watcher_ignores_touch(repo, monkeypatch):
+    monkeypatch.chdir(repo)
+    module = load_alternate_watcher()
+    handler = module.GitAutoCommitHandler()
+    path = os.path.join(repo, "a.txt")
+    write(path, "a\n")
+    assert handler.is_file_modified(path)
+    os.utime(path)
+    assert not handler.is_file_modified(path)
+    write(path, "b\n")
+    assert handler.is_file_modified(path)
+    assert not handler.is_file_modified(os.path.join(repo, "absent.txt"))
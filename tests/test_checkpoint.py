@@ -0,0 +1,107 @@
+import os
+import pytest
+from git_observer.executor import CommitExecutor
+from git_observer.git_handler import GitHandler
+from git_observer.plumbing import BASE_TRAILER, PlumbingSession, checkpoint_base
+from git_observer.scheduler import DeadlineScheduler
+from .conftest import git, write
+
+REF = "refs/gitobserver/main"
+
+
+@pytest.fixture
+def session(repo):
+    session = PlumbingSession(repo, os.path.join(repo, ".git"))
+    yield session
+    session.close()
+
+
+@pytest.fixture(params=[True, False], ids=["plumbing", "porcelain"])
+def handler(repo, request):
+    scheduler, executor = DeadlineScheduler(), CommitExecutor()
+    handler = GitHandler(repo_path=repo, executor=executor, scheduler=scheduler)
+    handler.checkpoints = True
+    handler.use_plumbing = request.param
+    yield handler
+    handler.close_plumbing()
+    scheduler.stop()
+    executor.shutdown(wait=False)
+
+
+def modify(handler, name, content):
+    path = os.path.join(handler.repo_path, name)
+    write(path, content)
+    handler.dirty_set.add(path, "modified")
+    return path
+
+
+def test_checkpoint_base_reads_the_trailer():
+    assert checkpoint_base(f"Checkpoint\n\n{BASE_TRAILER}: abc123\n") == "abc123"
+    assert checkpoint_base("Commit ordinaire\n") is None
+
+
+def test_checkpoints_chain_without_touching_head_or_index(repo, session):
+    head = git(repo, "rev-parse", "HEAD")
+    a, b = os.path.join(repo, "a.txt"), os.path.join(repo, "b.txt")
+    write(a, "a\n")
+    first = session.checkpoint(REF, [a], "Checkpoint 1")
+    write(b, "b\n")
+    second = session.checkpoint(REF, [b], "Checkpoint 2")
+
+    assert git(repo, "rev-parse", REF) == second
+    assert git(repo, "rev-parse", f"{second}^") == first
+    assert git(repo, "rev-parse", f"{first}^") == head
+    assert git(repo, "ls-tree", "--name-only", second).split("\n") == ["README.md", "a.txt", "b.txt"]
+    assert checkpoint_base(git(repo, "cat-file", "commit", second)) == head
+    assert git(repo, "rev-parse", "HEAD") == head
+    assert git(repo, "diff", "--cached", "--name-only") == ""
+
+
+def test_unchanged_checkpoint_is_skipped(repo, session):
+    a = os.path.join(repo, "a.txt")
+    write(a, "a\n")
+    first = session.checkpoint(REF, [a], "Checkpoint 1")
+    assert session.checkpoint(REF, [a], "Checkpoint 2") is None
+    assert git(repo, "rev-parse", REF) == first
+
+
+def test_chain_restarts_from_moved_head_with_rebase_paths(repo, session):
+    a, b = os.path.join(repo, "a.txt"), os.path.join(repo, "b.txt")
+    write(a, "a\n")
+    session.checkpoint(REF, [a], "Checkpoint 1")
+    write(os.path.join(repo, "other.txt"), "autre\n")
+    git(repo, "add", "other.txt")
+    git(repo, "commit", "-q", "-m", "commit à la main")
+    head = git(repo, "rev-parse", "HEAD")
+
+    write(b, "b\n")
+    commit = session.checkpoint(REF, [b], "Checkpoint 2", rebase_paths=[a, b])
+
+    assert git(repo, "rev-parse", f"{commit}^") == head
+    assert checkpoint_base(git(repo, "cat-file", "commit", commit)) == head
+    assert git(repo, "ls-tree", "--name-only", commit).split("\n") == ["README.md", "a.txt", "b.txt", "other.txt"]
+
+
+def test_handler_checkpoints_then_squashes_into_one_commit(repo, handler):
+    head = git(repo, "rev-parse", "HEAD")
+    a = modify(handler, "a.txt", "a\n")
+    assert handler.checkpoint([a])
+    b = modify(handler, "b.txt", "b\n")
+    assert handler.checkpoint([b])
+
+    assert handler.checkpoint_count == 2
+    assert git(repo, "rev-parse", "HEAD") == head
+    assert set(handler.dirty_set.snapshot()) == {a, b}  # Gardés pour le commit réel
+
+    assert handler.squash_checkpoints("Regroupement")
+    assert git(repo, "rev-parse", "HEAD^") == head
+    assert git(repo, "log", "-1", "--format=%s") == "Regroupement"
+    assert git(repo, "ls-tree", "--name-only", "HEAD").split("\n") == ["README.md", "a.txt", "b.txt"]
+    assert git(repo, "for-each-ref", "refs/gitobserver/") == ""
+    assert handler.checkpoint_count == 0
+
+
+def test_squash_without_checkpoints_or_changes_does_nothing(repo, handler):
+    head = git(repo, "rev-parse", "HEAD")
+    assert handler.squash_checkpoints() is False
+    assert git(repo, "rev-parse", "HEAD") == head
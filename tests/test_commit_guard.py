@@ -0,0 +1,110 @@
+import os
+import pytest
+from git_observer.commit_guard import CommitGuard, classify, parse_policy
+from .conftest import git, write
+
+TOKEN = "ghp_" + "a" * 36
+
+
+@pytest.fixture
+def guard(repo):
+    guard = CommitGuard(repo, os.path.join(repo, ".git"), max_size=1024)
+    yield guard
+    guard.close()
+
+
+def binary(path, size=64):
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+
+
+def test_parse_policy():
+    assert parse_policy("size=allow, secret=exclude") == {"size": "allow", "secret": "exclude"}
+    assert parse_policy("") == {}
+    with pytest.raises(ValueError):
+        parse_policy("size=drop")
+    with pytest.raises(ValueError):
+        parse_policy("mtime=hold")
+
+
+def test_classify_reasons(tmp_path):
+    big, key, token, blob, ok = (str(tmp_path / name) for name in ("big.txt", "id_rsa", "config.py", "img.bin", "ok.txt"))
+    write(big, "x" * 2048)
+    write(key, "clé\n")
+    write(token, f"\nTOKEN = '{TOKEN}'\n")
+    binary(blob)
+    write(ok, "rien\n")
+    patterns = (r"\bgh[pousr]_[A-Za-z0-9]{36,}\b",)
+    assert classify(big, 1024, patterns, ("id_rsa",))[0] == "size"
+    assert classify(key, 1024, patterns, ("id_rsa",))[0] == "secret"
+    assert classify(token, 1024, patterns, ()) == ("secret", "motif d'identifiant ligne 2")
+    assert classify(blob, 1024, patterns, ())[0] == "binary"
+    assert classify(ok, 1024, patterns, ()) is None
+    assert classify(str(tmp_path / "absent"), 1024, patterns, ()) is None
+
+
+def test_default_policy_holds_size_and_secrets_but_allows_binaries(repo, guard):
+    big, env, blob, ok = (os.path.join(repo, name) for name in ("big.txt", ".env", "img.bin", "ok.txt"))
+    write(big, "x" * 2048)
+    write(env, "PASSWORD=1\n")
+    binary(blob)
+    write(ok, "rien\n")
+
+    allowed, offenders = guard.filter([big, env, blob, ok, os.path.join(repo, "supprimé.txt")])
+    assert sorted(allowed) == sorted([blob, ok, os.path.join(repo, "supprimé.txt")])
+    assert {path: reason for path, (reason, _) in offenders.items()} == {big: "size", env: "secret"}
+    assert set(guard.held) == {big, env}
+
+
+def test_env_templates_are_checked_by_content_only(repo, guard):
+    template = os.path.join(repo, ".env.example")
+    write(template, "PASSWORD=\n")
+    assert guard.filter([template]) == ([template], {})
+    write(template, f"GITHUB_TOKEN={TOKEN}\n")
+    allowed, offenders = guard.filter([template])
+    assert allowed == [] and offenders[template][0] == "secret"
+
+
+def test_allow_policy_lets_the_file_through(repo):
+    guard = CommitGuard(repo, os.path.join(repo, ".git"), max_size=1024, policy={"size": "allow"})
+    big = os.path.join(repo, "big.txt")
+    write(big, "x" * 2048)
+    assert guard.filter([big]) == ([big], {})
+
+
+def test_exclude_policy_writes_info_exclude_once(repo):
+    guard = CommitGuard(repo, os.path.join(repo, ".git"), policy={"binary": "exclude"})
+    blob = os.path.join(repo, "data", "img[1].bin")
+    os.makedirs(os.path.dirname(blob))
+    binary(blob)
+    guard.filter([blob])
+    os.utime(blob, ns=(1, 1))  # Nouveau verdict : la règle n'est pas dupliquée
+    guard.filter([blob])
+    with open(os.path.join(repo, ".git", "info", "exclude"), encoding="utf-8") as f:
+        assert f.read().splitlines().count("/data/img\\[1].bin") == 1
+    assert git(repo, "status", "--porcelain", "--untracked-files=all") == ""
+
+
+def test_fixed_file_is_released(repo, guard):
+    config = os.path.join(repo, "config.py")
+    write(config, f"TOKEN = '{TOKEN}'\n")
+    assert guard.filter([config])[0] == []
+    write(config, "TOKEN = None\n")
+    assert guard.filter([config]) == ([config], {})
+    assert guard.held == {}
+
+
+def test_unchanged_offender_uses_the_cached_verdict(repo, guard, monkeypatch):
+    big = os.path.join(repo, "big.txt")
+    write(big, "x" * 2048)
+    guard.filter([big])
+    classified = []
+    monkeypatch.setattr(guard, "_classify", lambda paths: classified.extend(paths) or [None] * len(paths))
+    allowed, offenders = guard.filter([big])
+    assert classified == []  # Pas relu : stat inchangé
+    assert allowed == [] and offenders[big][0] == "size"
+
+
+def test_invalid_policy_is_rejected(repo):
+    with pytest.raises(ValueError):
+        CommitGuard(repo, os.path.join(repo, ".git"), policy={"secret": "ignore"})
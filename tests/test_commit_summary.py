@@ -0,0 +1,63 @@
+import os
+from git_observer.commit_summary import MAX_GROUPS, SUBJECT_WIDTH, parse_diff, summarize_diff
+from .conftest import git, load_alternate_watcher, write
+
+
+def test_parse_raw_and_numstat_records():
+    output = (b":100644 100644 aaa bbb M\0src/a.py\0"
+              b":000000 100644 000 ccc A\0docs/new file.md\0"
+              b":100644 100644 ddd ddd R100\0old/name.py\0new/name.py\0"
+              b":100644 000000 eee 000 D\0gone.bin\0"
+              b"3\t1\tsrc/a.py\0"
+              b"10\t0\tdocs/new file.md\0"
+              b"0\t0\t\0old/name.py\0new/name.py\0"
+              b"-\t-\tgone.bin\0")
+    changes, complete = parse_diff(output)
+    assert complete
+    assert [(c.kind, c.path, c.old_path, c.added, c.deleted) for c in changes] == [
+        ("M", "src/a.py", None, 3, 1),
+        ("A", "docs/new file.md", None, 10, 0),
+        ("R", "new/name.py", "old/name.py", 0, 0),
+        ("D", "gone.bin", None, None, None),
+    ]
+    assert not changes[3].binary  # Fichier supprimé : pas considéré binaire
+
+
+def test_parse_empty_output():
+    assert parse_diff(b"") == ([], True)
+
+
+def test_parse_real_diff(repo):
+    write(os.path.join(repo, "README.md"), "début\nsuite\n")
+    git(repo, "mv", "README.md", "LISEZMOI.md")
+    write(os.path.join(repo, "image.bin"), "\0\1\2")
+    git(repo, "add", "-A")
+    output = git(repo, "diff", "--cached", "--raw", "--numstat", "-M", "-z").encode()
+    changes, _ = parse_diff(output)
+    by_path = {change.path: change for change in changes}
+    assert by_path["LISEZMOI.md"].kind == "R" and by_path["LISEZMOI.md"].old_path == "README.md"
+    assert by_path["image.bin"].kind == "A" and by_path["image.bin"].binary
+
+
+def test_summarize_diff(repo):
+    write(os.path.join(repo, "src", "a.py"), "a\nb\n")
+    git(repo, "add", "-A")
+    message = summarize_diff(repo)
+    assert message and "src" in message
+
+
+def test_alternate_watcher_message_is_bounded(repo, monkeypatch):
+    monkeypatch.chdir(repo)
+    module = load_alternate_watcher()
+    monkeypatch.setattr(module, "MODIFIED_FILES", {})
+    for i in range(500):
+        module.MODIFIED_FILES[os.path.join(repo, f"pkg{i % 40}", f"f{i}.py")] = "created" if i % 2 else "modified"
+    module.MODIFIED_FILES[os.path.join(repo, "gone.txt")] = "deleted"
+
+    message = module.GitAutoCommitHandler().generate_commit_message()
+    subject, _, body = message.partition("\n\n")
+    assert len(subject) <= SUBJECT_WIDTH
+    assert subject.startswith("Auto-commit : 501 fichiers")
+    assert len(body.splitlines()) == MAX_GROUPS + 1  # Dossiers principaux, puis le reste
+    assert repo not in message  # Chemins relatifs au dépôt
+    assert "\x1b" not in message  # Pas de codes couleur dans le message
@@ -0,0 +1,34 @@
+from git_observer.debounce import CommitCoalescer
+from git_observer.metrics import get_metrics
+from git_observer.scheduler import DeadlineScheduler
+
+
+def counter(name, **labels):
+    for counter_name, counter_labels, value in get_metrics().snapshot()["counters"]:
+        if counter_name == name and counter_labels == labels:
+            return value
+    return 0
+
+
+def test_debounce_metrics_are_labelled_per_repository():
+    scheduler, batches = DeadlineScheduler(), []
+    try:
+        coalescers = {repo: CommitCoalescer(batches.append, quiet_period=3600, max_wait=3600,
+                                            scheduler=scheduler, metrics_label=repo)
+                      for repo in ("/depot/a", "/depot/b")}
+        coalescers["/depot/a"].add("/depot/a/x.txt")
+        coalescers["/depot/a"].add("/depot/a/x.txt")
+        coalescers["/depot/b"].add("/depot/b/y.txt")
+        for coalescer in coalescers.values():
+            coalescer.flush()
+    finally:
+        scheduler.stop()
+
+    assert [sorted(batch.paths) for batch in batches] == [["/depot/a/x.txt"], ["/depot/b/y.txt"]]
+    assert counter("debounce_merged_total", repo="/depot/a") == 1
+    assert counter("debounce_merged_total", repo="/depot/b") == 0
+    assert counter("debounce_batches_total", repo="/depot/a") == 1
+    assert counter("debounce_batches_total", repo="/depot/b") == 1
+    histograms = {labels["repo"]: count for name, labels, _, _, _, count in get_metrics().snapshot()["histograms"]
+                  if name == "debounce_batch_paths" and "repo" in labels}
+    assert histograms["/depot/a"] == histograms["/depot/b"] == 1
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import pytest
+from git_observer.dirty_journal import DirtyJournal, blob_oid
+from git_observer.executor import CommitExecutor
+from git_observer.git_handler import GitHandler
+from git_observer.ignore import IgnoreMatcher
+from git_observer.scheduler import DeadlineScheduler
+from git_observer.watcher import GitAutoCommitHandler
+from .conftest import git, write
+
+
+@pytest.fixture
+def journal(repo):
+    return DirtyJournal(repo, os.path.join(repo, ".git"))
+
+
+@pytest.fixture
+def matcher(repo):
+    return IgnoreMatcher(repo, os.path.join(repo, ".git"))
+
+
+def head_blob(repo):
+    def lookup(rel):
+        output = git(repo, "ls-tree", "HEAD", "--", rel)
+        return output.split()[2] if output else None
+    return lookup
+
+
+def touch_dir(path):
+    """Avance la date du dossier : la granularité de l'horloge du noyau peut la laisser inchangée."""
+    later = time.time_ns() + 10**9
+    os.utime(path, ns=(later, later))
+
+
+def test_blob_oid_matches_git(repo):
+    path = os.path.join(repo, "README.md")
+    assert blob_oid(path, os.path.getsize(path)) == git(repo, "hash-object", "README.md")
+
+
+def test_flushed_records_are_replayed_by_a_new_journal(repo, journal):
+    a, b = os.path.join(repo, "a.txt"), os.path.join(repo, "b.txt")
+    write(a, "a\n")
+    write(b, "b\n")
+    assert journal.record(a, "created")
+    assert not journal.record(b, "created")  # Flush déjà demandé
+    journal.flush({a})  # b n'est plus modifié : pas écrit
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"p": "tronqu')  # Arrêt brutal au milieu d'une ligne
+
+    replayed = DirtyJournal(repo, os.path.join(repo, ".git"))
+    assert replayed.load()
+    assert set(replayed.entries) == {"a.txt"}
+    assert replayed.entries["a.txt"]["h"] == git(repo, "hash-object", "a.txt")
+
+
+def test_load_without_journal(journal):
+    assert journal.load() is False
+
+
+def test_compact_keeps_only_live_paths(repo, journal):
+    a, b = os.path.join(repo, "a.txt"), os.path.join(repo, "b.txt")
+    write(a, "a\n")
+    write(b, "b\n")
+    journal.record(a, "created")
+    journal.record(b, "created")
+    journal.flush({a, b})
+    journal.compact({b})
+    with open(journal.path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+    assert set(journal.entries) == {"b.txt"}
+
+
+def test_confirm_drops_paths_back_to_head(repo, journal):
+    readme, new, gone, removed = (os.path.join(repo, name) for name in ("README.md", "new.txt", "gone.txt", "README2"))
+    write(readme, "modifié\n")
+    write(new, "nouveau\n")
+    write(gone, "temporaire\n")
+    for path in (readme, new, gone):
+        journal.record(path, "modified")
+    journal.flush({readme, new, gone})
+    write(readme, "début\n")  # Revenu au contenu de HEAD
+    os.remove(gone)  # Créé puis supprimé sans avoir été suivi
+
+    confirmed = journal.confirm(head_blob(repo), [(removed, "created")])
+    assert sorted(confirmed) == [(new, "modified")]
+
+
+def test_confirm_keeps_deleted_tracked_files(repo, journal):
+    readme = os.path.join(repo, "README.md")
+    journal.record(readme, "modified")
+    journal.flush({readme})
+    os.remove(readme)
+    assert journal.confirm(head_blob(repo)) == [(readme, "deleted")]
+
+
+def test_sweep_without_snapshot(journal, matcher):
+    assert journal.sweep(matcher) is None
+
+
+def test_sweep_finds_files_created_while_stopped(repo, journal, matcher):
+    write(os.path.join(repo, "src", "old.py"), "ancien\n")
+    write(os.path.join(repo, ".gitignore"), "build/\n")
+    journal.save_dirs(matcher)
+
+    created, nested = os.path.join(repo, "src", "new.py"), os.path.join(repo, "docs", "guide", "index.md")
+    write(created, "nouveau\n")
+    write(nested, "guide\n")
+    write(os.path.join(repo, "build", "out.o"), "binaire\n")
+    touch_dir(os.path.join(repo, "src"))
+    touch_dir(repo)
+
+    changes = journal.sweep(matcher)
+    assert (created, "created") in changes
+    assert (nested, "created") in changes  # Nouveau dossier : tout son contenu
+    assert not any(path.startswith(os.path.join(repo, "build")) for path, _ in changes)
+
+
+@pytest.fixture
+def handler(repo):
+    scheduler, executor = DeadlineScheduler(), CommitExecutor()
+    git_handler = GitHandler(repo_path=repo, executor=executor, scheduler=scheduler)
+    git_handler.enable_journal()
+    yield GitAutoCommitHandler(quiet_period=3600, max_wait=3600, git_handler=git_handler)
+    git_handler.close_plumbing()
+    scheduler.stop()
+    executor.shutdown(wait=False)
+
+
+def test_restore_runs_on_the_git_worker(repo, handler, monkeypatch):
+    git_handler = handler.git_handler
+    path = os.path.join(repo, "a.txt")
+    write(path, "a\n")
+    git_handler.journal.record(path, "created")
+    git_handler.journal.flush({path})
+    threads = []
+    restore = git_handler.restore_journal
+    monkeypatch.setattr(git_handler, "restore_journal",
+                        lambda matcher: threads.append(threading.current_thread()) or restore(matcher))
+
+    assert handler.restore_journal().result(5) == 1
+    assert threads[0] is not threading.current_thread()
+    assert git_handler.dirty_set.snapshot() == {path: "created"}
+    assert os.path.exists(git_handler.journal.dirs_path)  # Instantané renouvelé après le rejeu
+
+
+def test_first_start_asks_for_a_full_reconcile(handler):
+    assert handler.restore_journal().result(5) is None
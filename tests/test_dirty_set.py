@@ -0,0 +1,70 @@
+from git_observer.dirty_set import DirtySet
+
+
+def test_add_bumps_version_and_keeps_last_event():
+    dirty = DirtySet()
+    dirty.add("/r/a", "created")
+    dirty.add("/r/a", "modified")
+    assert dirty.version == 2
+    assert dirty.snapshot() == {"/r/a": "modified"}
+
+
+def test_reconcile_keeps_paths_added_during_status():
+    dirty = DirtySet()
+    dirty.add("/r/old")
+    since = dirty.version
+    dirty.add("/r/during")  # Arrivé pendant `git status`
+    dirty.reconcile(["/r/status"], since)
+    assert set(dirty.snapshot()) == {"/r/during", "/r/status"}
+
+
+def test_discard_keeps_paths_changed_after_commit_started():
+    dirty = DirtySet()
+    dirty.add("/r/a")
+    dirty.add("/r/b")
+    until = dirty.version
+    dirty.add("/r/b")
+    dirty.discard(["/r/a", "/r/b"], until)
+    assert dirty.snapshot() == {"/r/b": "modified"}
+
+
+def test_clear_until_version():
+    dirty = DirtySet()
+    dirty.add("/r/a")
+    until = dirty.version
+    dirty.add("/r/b")
+    dirty.clear(until)
+    assert dirty.snapshot() == {"/r/b": "modified"}
+
+
+def test_overflow_until_reconcile():
+    dirty = DirtySet(max_size=2)
+    for name in "abc":
+        dirty.add(f"/r/{name}")
+    assert dirty.overflowed and len(dirty) == 0 and dirty
+    dirty.add("/r/d")
+    assert len(dirty) == 0  # Plus de détail jusqu'à la réconciliation
+    dirty.reconcile(["/r/a"], dirty.version)
+    assert not dirty.overflowed
+    assert dirty.snapshot() == {"/r/a": "modified"}
+
+
+def test_mark_overflow_drops_detail():
+    dirty = DirtySet()
+    dirty.add("/r/a")
+    version = dirty.version
+    dirty.mark_overflow()
+    assert dirty.overflowed and dirty.version > version
+    assert dirty.snapshot() == {}
+
+
+def test_overflow_survives_changes_during_status():
+    dirty = DirtySet()
+    dirty.mark_overflow()
+    since = dirty.version
+    dirty.add("/r/late")  # Modifié après la lecture de `git status`, non conservé en débordement
+    assert not dirty.reconcile(["/r/a"], since)
+    assert dirty.overflowed
+    assert dirty.reconcile(["/r/a", "/r/late"], dirty.version)
+    assert not dirty.overflowed
+    assert set(dirty.snapshot()) == {"/r/a", "/r/late"}
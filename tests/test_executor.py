@@ -0,0 +1,68 @@
+import threading
+import time
+import pytest
+from git_observer.executor import CommitExecutor, CommitQueueFull, log_failure
+
+
+def test_executor_runs_same_key_in_submission_order():
+    executor = CommitExecutor(max_workers=4)
+    order = []
+
+    def task(value):
+        time.sleep(0.01 * (5 - value))  # Les premières tâches sont les plus lentes
+        order.append(value)
+        return value
+
+    futures = [executor.submit(task, value, key="repo") for value in range(5)]
+    assert [future.result(5) for future in futures] == list(range(5))
+    assert order == list(range(5))
+    executor.shutdown()
+
+
+def test_executor_runs_other_keys_in_parallel():
+    executor = CommitExecutor(max_workers=2)
+    release = threading.Event()
+    blocked = executor.submit(release.wait, 5, key="a")
+    assert executor.submit(lambda: "b", key="b").result(5) == "b"
+    assert not blocked.done()
+    release.set()
+    assert blocked.result(5)
+    executor.shutdown()
+
+
+def test_executor_rejects_when_queue_full():
+    executor = CommitExecutor(max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+    executor.submit(lambda: started.set() or release.wait(5), key="repo")
+    started.wait(5)
+    queued = executor.submit(lambda: "queued", key="repo")
+    rejected = executor.submit(lambda: "rejected", key="repo")
+    with pytest.raises(CommitQueueFull):
+        rejected.result(1)
+    assert executor.qsize("repo") == 1
+    release.set()
+    assert queued.result(5) == "queued"
+    executor.shutdown()
+
+
+def test_executor_passes_exceptions_to_future():
+    executor = CommitExecutor()
+    future = executor.submit(lambda: 1 / 0, key="repo")
+    with pytest.raises(ZeroDivisionError):
+        future.result(5)
+    executor.shutdown()
+
+
+def test_log_failure_reports_errors_but_not_full_queue(capsys):
+    executor = CommitExecutor(max_queue=0)
+    executor.submit(lambda: None, key="repo").add_done_callback(log_failure("Erreur du test"))
+    assert "Erreur du test" not in capsys.readouterr().out  # File pleine : signalée une seule fois, par submit
+    executor.max_queue = 16
+    future = executor.submit(lambda: 1 / 0, key="repo")
+    future.add_done_callback(log_failure("Erreur du test"))
+    with pytest.raises(ZeroDivisionError):
+        future.result(5)
+    time.sleep(0.05)
+    assert "Erreur du test : division by zero" in capsys.readouterr().out
+    executor.shutdown()
@@ -0,0 +1,101 @@
+import os
+import pytest
+from watchdog.events import DirCreatedEvent, FileCreatedEvent, FileModifiedEvent, FileMovedEvent
+from git_observer.fsmonitor import COOKIE_PREFIX, ChangeJournal, FsmonitorServer, disable, enable
+from git_observer.polling import OverflowEvent
+from .conftest import git
+
+
+def test_changes_since_token():
+    journal = ChangeJournal()
+    start = journal.token()
+    journal.record("a.txt")
+    middle = journal.token()
+    journal.record("src/")
+    token, paths = journal.changes_since(start)
+    assert token == journal.token()
+    assert paths == {"a.txt", "src/"}
+    assert journal.changes_since(middle)[1] == {"src/"}
+    assert journal.changes_since(token)[1] == set()
+
+
+def test_unknown_tokens_ask_for_full_scan():
+    journal = ChangeJournal()
+    journal.record("a.txt")
+    other = ChangeJournal()
+    for token in ("", "1:2:3", "gitobserver:autre:0", "gitobserver:" + journal.instance + ":x", other.token()):
+        assert journal.changes_since(token) == (journal.token(), None)
+
+
+def test_truncated_journal_asks_for_full_scan():
+    journal = ChangeJournal(max_entries=2)
+    start = journal.token()
+    for name in "abc":
+        journal.record(name)
+    assert journal.changes_since(start)[1] is None
+    assert journal.changes_since(f"gitobserver:{journal.instance}:1")[1] == {"b", "c"}
+
+
+def test_reset_invalidates_tokens():
+    journal = ChangeJournal()
+    token = journal.token()
+    journal.reset()
+    journal.record("a")
+    assert journal.changes_since(token)[1] is None
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = str(tmp_path)
+    return FsmonitorServer(root, os.path.join(root, ".git"))
+
+
+def test_events_are_journaled_relative_to_root(server):
+    root = server.repo_root
+    start = server.journal.token()
+    server.on_event(FileModifiedEvent(os.path.join(root, "src", "a.py")))
+    server.on_event(DirCreatedEvent(os.path.join(root, "build")))
+    server.on_event(FileMovedEvent(os.path.join(root, "old.txt"), os.path.join(root, "new.txt")))
+    server.on_event(FileModifiedEvent(os.path.join(root, ".git", "index")))
+    assert server.journal.changes_since(start)[1] == {"src/a.py", "build/", "old.txt", "new.txt"}
+
+
+def test_cookie_events_are_swallowed(server):
+    cookie = os.path.join(server.cookie_dir, COOKIE_PREFIX + "1")
+    start = server.journal.token()
+    assert server.on_event(FileCreatedEvent(cookie))
+    assert server.journal.changes_since(start)[1] == set()
+
+
+def test_overflow_resets_journal(server):
+    start = server.journal.token()
+    server.on_event(OverflowEvent(server.repo_root))
+    assert server.journal.changes_since(start)[1] is None
+
+
+def test_answer_format(server, monkeypatch):
+    monkeypatch.setattr(server, "sync", lambda: True)
+    start = server.journal.token()
+    server.journal.record("b.txt")
+    server.journal.record("a.txt")
+    assert server.answer(start) == server.journal.token() + "\0a.txt\0b.txt\0"
+    assert server.answer("inconnu") == server.journal.token() + "\0/\0"
+
+    monkeypatch.setattr(server, "sync", lambda: False)  # Cookie jamais reçu
+    assert server.answer(start).endswith("\0/\0")
+    monkeypatch.setattr(server, "sync", lambda: True)
+    server.check_watches = lambda: False  # Nouvelles watches : parcours complet
+    assert server.answer(start).endswith("\0/\0")
+
+
+def test_disable_restores_untracked_cache(repo):
+    enable(repo)
+    assert git(repo, "config", "core.untrackedCache") == "true"
+    disable(repo)
+    assert git(repo, "config", "--list", "--local").count("untrackedcache") == 0
+    assert "fsmonitor" not in git(repo, "config", "--list", "--local")
+
+    git(repo, "config", "core.untrackedCache", "false")  # Réglage de l'utilisateur
+    enable(repo)
+    disable(repo)
+    assert git(repo, "config", "core.untrackedCache") == "false"
@@ -0,0 +1,68 @@
+import os
+import pytest
+from git_observer.ignore import IgnoreMatcher
+from .conftest import git, write
+
+
+@pytest.fixture
+def tree(repo):
+    write(os.path.join(repo, ".gitignore"), "build/\nnode_modules/\n*.log\n!keep.log\n")
+    write(os.path.join(repo, "src", ".gitignore"), "generated/\n")
+    for name in ("build/out.o", "node_modules/pkg/index.js", "src/main.py", "src/generated/api.py", "debug.log"):
+        write(os.path.join(repo, name), "x\n")
+    return repo
+
+
+def test_ignored_paths(tree):
+    matcher = IgnoreMatcher(tree)
+    assert matcher.is_ignored(os.path.join(tree, "debug.log"))
+    assert not matcher.is_ignored(os.path.join(tree, "keep.log"), is_dir=False)
+    assert matcher.is_ignored(os.path.join(tree, "build", "out.o"))
+    assert matcher.is_ignored(os.path.join(tree, ".git", "index"))
+    assert not matcher.is_ignored(os.path.join(tree, "src", "main.py"))
+    assert matcher.is_ignored(os.path.join(tree, "src", "generated", "api.py"))
+
+
+def test_pruned_dirs_and_ignored_roots(tree):
+    matcher = IgnoreMatcher(tree)
+    pruned = {name: matcher.is_dir_pruned(os.path.join(tree, *name.split("/")))
+              for name in ("build", "node_modules", "node_modules/pkg", "src", "src/generated", ".git")}
+    assert pruned == {"build": True, "node_modules": True, "node_modules/pkg": True, "src": False,
+                      "src/generated": True, ".git": True}
+    assert not matcher.is_dir_pruned(tree)
+    assert matcher.ignored_roots() == ["build", "node_modules", "src/generated"]
+def test_kept_dir_is_not_pruned(tree):
+    matcher = IgnoreMatcher(tree)
+    matcher.keep_dir(os.path.join(tree, "build", "cookies"))
+    assert not matcher.is_dir_pruned(os.path.join(tree, "build"))
+    assert not matcher.is_dir_pruned(os.path.join(tree, "build", "cookies"))
+    assert matcher.is_dir_pruned(os.path.join(tree, "build", "other"))
+
+
+def test_tracked_files_under_ignored_dir(tree):
+    matcher = IgnoreMatcher(tree)
+    build, deep = os.path.join(tree, "build"), os.path.join(tree, "node_modules", "pkg")
+    assert matcher.is_dir_pruned(build) and matcher.is_dir_pruned(deep)
+    assert not matcher.refresh_tracked()  # Aucun fichier suivi sous les dossiers ignorés
+
+    git(tree, "add", "-f", "node_modules/pkg/index.js")
+    assert matcher.refresh_tracked()
+    assert not matcher.is_dir_pruned(os.path.join(tree, "node_modules"))
+    assert not matcher.is_dir_pruned(deep)
+    assert matcher.is_dir_pruned(build)
+    assert not matcher.refresh_tracked()  # Index inchangé : pas de nouvel appel
+
+    git(tree, "rm", "-q", "--cached", "node_modules/pkg/index.js")
+    assert matcher.refresh_tracked()
+    assert matcher.is_dir_pruned(deep)
+
+
+def test_tracked_file_under_ignored_dir_is_not_ignored(tree):
+    matcher = IgnoreMatcher(tree)
+    kept, other = os.path.join(tree, "build", "out.o"), os.path.join(tree, "build", "new.o")
+    write(other, "x\n")
+    matcher.is_dir_pruned(os.path.join(tree, "build"))  # Dossier rencontré par les watches
+    git(tree, "add", "-f", "build/out.o")
+    matcher.refresh_tracked()
+    assert not matcher.is_ignored(kept)
+    assert matcher.is_ignored(other)
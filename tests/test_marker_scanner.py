@@ -0,0 +1,54 @@
+import mmap
+import os
+from unittest import mock
+from git_observer.marker_scanner import MarkerScanner
+
+
+def write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_marker_message(tmp_path):
+    path = write_bytes(tmp_path / "a.py", b'x = 1\n# commit_name="Ajout du parseur"\ny = 2\n')
+    assert MarkerScanner().scan(path) == "Ajout du parseur"
+    assert MarkerScanner().scan(write_bytes(tmp_path / "b.py", b"x = 1\n")) is None
+
+
+def test_unchanged_file_is_not_read_again(tmp_path):
+    path = write_bytes(tmp_path / "a.py", b"commit_name=Premier\n")
+    scanner = MarkerScanner()
+    assert scanner.scan(path) == "Premier"
+    with mock.patch.object(scanner, "_read", side_effect=AssertionError("relu")):
+        assert scanner.scan(path) == "Premier"  # Lot repris ou commit raté : le marqueur est retrouvé
+    write_bytes(path, b"commit_name=Second message\n")
+    os.utime(path, ns=(1, 1))
+    assert scanner.scan(path) == "Second message"
+
+
+def test_binary_and_large_files_are_skipped(tmp_path):
+    scanner = MarkerScanner(max_file_size=100)
+    assert scanner.scan(write_bytes(tmp_path / "bin", b"\0\1commit_name=binaire\n")) is None
+    assert scanner.scan(write_bytes(tmp_path / "big", b"commit_name=gros\n" + b"x" * 200)) is None
+    assert scanner.scan(write_bytes(tmp_path / "empty", b"")) is None
+
+
+def test_large_text_file_goes_through_mmap(tmp_path):
+    path = write_bytes(tmp_path / "big.txt", b"a" * 5000 + b"\ncommit_name=Fin du fichier")
+    scanner = MarkerScanner(mmap_threshold=1024, sniff_size=512)
+    with mock.patch("git_observer.marker_scanner.mmap.mmap", wraps=mmap.mmap) as mapped:
+        assert scanner.scan(path) == "Fin du fichier"
+    assert mapped.called
+
+
+def test_cache_is_a_bounded_lru(tmp_path):
+    scanner = MarkerScanner(max_entries=2)
+    paths = [write_bytes(tmp_path / f"{name}.txt", b"x\n") for name in "abc"]
+    scanner.scan(paths[0])
+    scanner.scan(paths[1])
+    scanner.scan(paths[0])  # `a` redevient le plus récent
+    scanner.scan(paths[2])
+    assert list(scanner._cache) == [paths[0], paths[2]]
+    scanner.forget(paths[0])
+    assert list(scanner._cache) == [paths[2]]
@@ -0,0 +1,61 @@
+import os
+import pytest
+from git_observer.plumbing import PlumbingSession, PlumbingUnsupported
+from .conftest import git, write
+
+
+@pytest.fixture
+def session(repo):
+    session = PlumbingSession(repo, os.path.join(repo, ".git"))
+    yield session
+    session.close()
+
+
+def test_commit_is_fsck_clean_and_leaves_index_clean(repo, session):
+    head = git(repo, "rev-parse", "HEAD")
+    readme, new, nested = (os.path.join(repo, name) for name in ("README.md", "new.txt", "src/pkg/module.py"))
+    write(readme, "modifié\n")
+    write(new, "nouveau\n")
+    write(nested, "print('ok')\n")
+
+    commit = session.commit([readme, new, nested], "Premier commit de plomberie")
+
+    assert commit == git(repo, "rev-parse", "HEAD")
+    assert git(repo, "rev-parse", "HEAD^") == head
+    assert git(repo, "log", "-1", "--format=%s") == "Premier commit de plomberie"
+    assert git(repo, "ls-tree", "-r", "--name-only", "HEAD").split("\n") == ["README.md", "new.txt", "src/pkg/module.py"]
+    git(repo, "fsck", "--strict", "--no-dangling")
+    assert git(repo, "status", "--porcelain") == ""
+    assert git(repo, "diff", "--cached", "--name-only") == ""
+
+
+def test_deletion(repo, session):
+    readme, kept = os.path.join(repo, "README.md"), os.path.join(repo, "src/kept.txt")
+    write(kept, "gardé\n")
+    session.commit([kept], "Ajout")
+    os.remove(readme)
+    session.commit([readme], "Suppression")
+    assert git(repo, "ls-tree", "-r", "--name-only", "HEAD") == "src/kept.txt"
+    git(repo, "fsck", "--strict", "--no-dangling")
+    assert git(repo, "status", "--porcelain") == ""
+
+
+def test_empty_tree_falls_back(repo, session):
+    readme = os.path.join(repo, "README.md")
+    os.remove(readme)
+    with pytest.raises(PlumbingUnsupported):
+        session.commit([readme], "Arbre vide")  # Laissé à `git commit`
+
+
+def test_unchanged_paths_make_no_commit(repo, session):
+    head = git(repo, "rev-parse", "HEAD")
+    assert session.commit([os.path.join(repo, "README.md")], "Rien") is None
+    assert git(repo, "rev-parse", "HEAD") == head
+
+
+def test_hand_staged_changes_are_not_committed(repo, session):
+    other = os.path.join(repo, "other.txt")
+    write(other, "indexé à la main\n")
+    git(repo, "add", "other.txt")
+    with pytest.raises(PlumbingUnsupported):
+        session.commit([os.path.join(repo, "README.md")], "Refusé")
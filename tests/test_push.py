@@ -0,0 +1,94 @@
+import os
+import pytest
+from git_observer.executor import CommitExecutor
+from git_observer.push import PushQueue, PushScheduler, QUEUE_FILE
+from git_observer.scheduler import DeadlineScheduler
+from .conftest import git, write
+
+
+@pytest.fixture
+def remote(repo, tmp_path):
+    path = str(tmp_path / "remote.git")
+    git(str(tmp_path), "init", "-q", "--bare", path)
+    git(repo, "remote", "add", "origin", path)
+    return path
+
+
+@pytest.fixture
+def pusher(repo):
+    scheduler = DeadlineScheduler()
+    executor = CommitExecutor()
+    # Intervalles longs : les tests appellent `push_pending` eux-mêmes
+    pusher = PushScheduler(repo, os.path.join(repo, ".git"), scheduler, executor,
+                           interval=3600, min_backoff=60, max_backoff=600)
+    yield pusher
+    scheduler.stop()
+    executor.shutdown()
+
+
+def commit(repo, name):
+    write(os.path.join(repo, name), name)
+    git(repo, "add", name)
+    git(repo, "commit", "-q", "-m", name)
+    return git(repo, "rev-parse", "HEAD")
+
+
+def test_pending_commits_go_out_in_one_push(repo, remote, pusher):
+    commit(repo, "a.txt")
+    pusher.enqueue("main")
+    head = commit(repo, "b.txt")
+    pusher.enqueue("main")
+    assert pusher.pending()["main"]["commits"] == 2
+
+    assert pusher.push_pending()
+    assert git(remote, "rev-parse", "refs/heads/main") == head
+    assert pusher.pending() == {}
+
+
+def test_unreachable_remote_keeps_queue_until_it_returns(repo, remote, pusher):
+    head = commit(repo, "a.txt")
+    pusher.enqueue("main")
+    os.rename(remote, remote + ".off")
+
+    assert not pusher.push_pending()
+    entry = pusher.pending()["main"]
+    assert entry["attempts"] == 1
+    assert "remote.git" in entry["last_error"]
+    assert not pusher.push_pending()
+    assert pusher.pending()["main"]["attempts"] == 2
+
+    os.rename(remote + ".off", remote)
+    assert pusher.push_pending()
+    assert git(remote, "rev-parse", "refs/heads/main") == head
+    assert pusher.pending() == {}
+
+
+def test_missing_remote_is_retried(repo, pusher):
+    commit(repo, "a.txt")
+    pusher.enqueue("main")  # Aucun dépôt distant `origin`
+    assert not pusher.push_pending()
+    assert pusher.pending()["main"]["attempts"] == 1
+
+
+def test_queue_survives_restart(repo, remote, pusher):
+    commit(repo, "a.txt")
+    pusher.enqueue("main")
+    queue = PushQueue(os.path.join(repo, ".git", "gitobserver", QUEUE_FILE))
+    assert queue.branches["main"]["commits"] == 1
+
+    scheduler, executor = DeadlineScheduler(), CommitExecutor()
+    try:
+        restarted = PushScheduler(repo, os.path.join(repo, ".git"), scheduler, executor, interval=3600)
+        assert set(restarted.pending()) == {"main"}
+        assert restarted.push_pending()
+    finally:
+        scheduler.stop()
+        executor.shutdown()
+    assert PushQueue(queue.path).branches == {}
+
+
+def test_backoff_grows_and_is_capped(pusher):
+    delays = [pusher.backoff(attempts) for attempts in range(1, 8)]
+    assert 48 <= delays[0] <= 60
+    assert 96 <= delays[1] <= 120
+    assert all(480 <= delay <= 600 for delay in delays[4:])
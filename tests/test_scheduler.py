@@ -0,0 +1,47 @@
+import time
+import pytest
+from git_observer.scheduler import DeadlineScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = DeadlineScheduler()
+    yield scheduler
+    scheduler.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "délai dépassé"
+        time.sleep(0.01)
+
+
+def test_deadlines_run_in_time_order(scheduler):
+    order = []
+    scheduler.call_later(0.15, order.append, "c")
+    scheduler.call_later(0.05, order.append, "a")
+    scheduler.call_later(0.10, order.append, "b")
+    wait_for(lambda: len(order) == 3)
+    assert order == ["a", "b", "c"]
+
+
+def test_moved_and_cancelled_deadlines(scheduler):
+    order = []
+    moved = scheduler.call_later(0.01, order.append, "moved")
+    cancelled = scheduler.call_later(0.02, order.append, "cancelled")
+    scheduler.call_later(0.05, order.append, "fixed")
+    moved.move(0.1)
+    cancelled.cancel()
+    wait_for(lambda: len(order) == 2)
+    time.sleep(0.05)
+    assert order == ["fixed", "moved"]
+    assert len(scheduler) == 0
+
+
+def test_executed_deadline_can_be_rearmed(scheduler):
+    calls = []
+    deadline = scheduler.call_later(0.01, calls.append, 1)
+    wait_for(lambda: calls == [1])
+    deadline.move(0.01)
+    wait_for(lambda: calls == [1, 1])
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import threading
+import pytest
+from git_observer.debounce import CommitBatch
+from git_observer.executor import CommitExecutor
+from git_observer.git_handler import GitHandler
+from git_observer.scheduler import DeadlineScheduler
+from git_observer.watcher import GitAutoCommitHandler
+
+
+@pytest.fixture
+def handler(repo):
+    scheduler, executor = DeadlineScheduler(), CommitExecutor(max_queue=1)
+    git_handler = GitHandler(repo_path=repo, executor=executor, scheduler=scheduler)
+    yield GitAutoCommitHandler(quiet_period=3600, max_wait=3600, git_handler=git_handler)
+    scheduler.stop()
+    executor.shutdown(wait=False)
+
+
+def test_batch_rejected_by_full_queue_is_requeued(repo, handler):
+    executor, key = handler.git_handler.executor, handler.git_handler.repo_path
+    release, started = threading.Event(), threading.Event()
+    executor.submit(lambda: started.set() or release.wait(5), key=key)
+    started.wait(5)
+    executor.submit(lambda: None, key=key)  # La file (une place) est pleine
+
+    path = os.path.join(repo, "a.txt")
+    batch = CommitBatch()
+    batch.add(path, "created")
+    handler.on_batch_ready(batch)
+    release.set()
+
+    assert handler.git_handler.dirty_set.snapshot() == {path: "created"}
+    assert handler.coalescer._batch.paths == {path: "created"}  # Repris dans la fenêtre suivante
+
+
+def test_reconcile_async_refreshes_watches_off_the_loop(repo, handler, monkeypatch):
+    threads = []
+    monkeypatch.setattr(handler, "refresh_watches", lambda: threads.append(threading.current_thread()))
+    path = os.path.join(repo, "a.txt")
+    with open(path, "w") as f:
+        f.write("a\n")
+
+    async def reconcile():
+        return threading.current_thread(), await handler.reconcile_async()
+
+    loop_thread, changed = asyncio.run(reconcile())
+
+    assert changed
+    assert threads and threads[0] is not loop_thread
+    assert path in handler.git_handler.dirty_set.snapshot()